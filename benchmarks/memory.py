@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Measure the memory xdis uses on the bytecode files in test/bytecode_*,
+and check it against the budgets in memory_budgets.json.
+
+Each file goes through these stages, each kept alive for the next:
+
+  load          xdis.load.load_module()
+  bytecode      Bytecode() of every code object, with its instructions
+                decoded into a list
+  line_offsets  LineOffsetInfo() of the module, including children
+  extended      Bytecode.dis() of every code object in the extended format
+
+For each stage, tracemalloc gives the *peak* memory allocated while it
+ran and the memory *retained* once it is done. These are added up over
+the files of each bytecode version, and divided by the number of
+instructions in those files. Per-instruction figures don't change much
+when files are added to test/, but go up when, say, Instruction or a
+code type gets a new field.
+
+A version whose figures go over its budget fails the check, and the exit
+code is 1. Object sizes differ between Python versions, so budgets only
+apply when run by the same Python minor version as made them. After an
+intended change, remake the budgets with --update.
+
+This needs Python 3.9 or later, for tracemalloc.reset_peak().
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import os.path as osp
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+SRCDIR = osp.dirname(osp.dirname(osp.abspath(__file__)))
+
+if __name__ == "__main__":
+    # Measure this checkout rather than an installed xdis.
+    sys.path.insert(0, SRCDIR)
+
+from xdis.bytecode import Bytecode  # noqa
+from xdis.bytecode_graal import Bytecode_Graal  # noqa
+from xdis.codetype.base import iscode  # noqa
+from xdis.disasm import get_opcode  # noqa
+from xdis.lineoffsets import LineOffsetInfo  # noqa
+from xdis.load import load_module  # noqa
+from xdis.version_info import PythonImplementation  # noqa
+
+CORPUS_DIR = osp.join(SRCDIR, "test")
+BUDGETS_PATH = osp.join(osp.dirname(osp.abspath(__file__)), "memory_budgets.json")
+
+STAGES = ("load", "bytecode", "line_offsets", "extended")
+
+# How far above what was measured --update puts the budgets: a fraction
+# of the measurement, but at least FILE_SLACK[stage] bytes per file. Even
+# in a new process, what is allocated varies a little from run to run:
+# up to about 600 bytes a file when loading, and 100 or so in the other
+# stages. So budgets of versions with few instructions a file are
+# looser; for the others, a new 8-byte field in every Instruction goes
+# over.
+DEFAULT_HEADROOM = 0.01
+FILE_SLACK = {"load": 1024, "bytecode": 256, "line_offsets": 256, "extended": 256}
+
+BUDGETS_FORMAT_VERSION = 1
+
+
+def version_files(corpus_dir: str = CORPUS_DIR) -> Dict[str, List[str]]:
+    """
+    Return the bytecode files under ``corpus_dir`` by the version in
+    their directory's name, e.g. "3.8" for test/bytecode_3.8.
+    """
+    versions = {}
+    for dirname in sorted(os.listdir(corpus_dir)):
+        path = osp.join(corpus_dir, dirname)
+        if dirname.startswith("bytecode_") and osp.isdir(path):
+            files = [
+                osp.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith((".pyc", ".pyo"))
+            ]
+            if files:
+                versions[dirname[len("bytecode_") :]] = files
+    return versions
+
+
+def all_code_objects(co) -> list:
+    code_objects = [co]
+    for code in code_objects:
+        code_objects.extend(c for c in code.co_consts if iscode(c))
+    return code_objects
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard what is written to stdout and stderr."""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+def pipeline(path: str) -> List[Tuple[str, Callable[[dict], object]]]:
+    """
+    Return the stages to run on bytecode file ``path``. Each is given a
+    dictionary of what the earlier stages returned, by stage name.
+    """
+
+    def load(done: dict) -> tuple:
+        return load_module(path)
+
+    def bytecode(done: dict) -> list:
+        version, _, magic_int, co, python_implementation = done["load"][:5]
+        opc = get_opcode(version, python_implementation, magic_int=magic_int)
+        bytecode_class = (
+            Bytecode_Graal
+            if python_implementation == PythonImplementation.Graal
+            else Bytecode
+        )
+        done["opc"] = opc
+        return [
+            (bc, list(bc))
+            for bc in (bytecode_class(c, opc) for c in all_code_objects(co))
+        ]
+
+    def line_offsets(done: dict) -> LineOffsetInfo:
+        return LineOffsetInfo(done["opc"], done["load"][3], include_children=True)
+
+    def extended(done: dict) -> list:
+        return [bc.dis(asm_format="extended") for bc, _ in done["bytecode"]]
+
+    return [
+        ("load", load),
+        ("bytecode", bytecode),
+        ("line_offsets", line_offsets),
+        ("extended", extended),
+    ]
+
+
+def measure_file(path: str) -> Optional[Tuple[int, Dict[str, Tuple[int, int]]]]:
+    """
+    Run the stages on bytecode file ``path`` and return its number of
+    instructions and each stage's (peak, retained) bytes, or None if a
+    stage fails.
+    """
+    # A first, untraced, run imports opcode modules and fills caches
+    # that aren't down to this file.
+    try:
+        with quiet():
+            done = {}
+            for stage, fn in pipeline(path):
+                done[stage] = fn(done)
+    except Exception:
+        return None
+    ninstructions = sum(len(instructions) for _, instructions in done["bytecode"])
+    del done
+
+    measured = {}
+    done = {}
+    with quiet():
+        for stage, fn in pipeline(path):
+            gc.collect()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            done[stage] = fn(done)
+            peak = tracemalloc.get_traced_memory()[1]
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+            measured[stage] = (peak - before, retained - before)
+    return ninstructions, measured
+
+
+def measure_version(paths: List[str]) -> dict:
+    """
+    Return the per-instruction peak and retained bytes of each stage
+    over the bytecode files ``paths``.
+    """
+    files = ninstructions = 0
+    peaks = dict.fromkeys(STAGES, 0)
+    retained = dict.fromkeys(STAGES, 0)
+    for path in paths:
+        result = measure_file(path)
+        if result is None:
+            continue
+        n, measured = result
+        files += 1
+        ninstructions += n
+        for stage, (peak, kept) in measured.items():
+            peaks[stage] += peak
+            retained[stage] += kept
+
+    result = {"files": files, "instructions": ninstructions}
+    if ninstructions:
+        for stage in STAGES:
+            result[stage] = {
+                "peak": round(peaks[stage] / ninstructions, 1),
+                "retained": round(retained[stage] / ninstructions, 1),
+            }
+    return result
+
+
+def measure_in_child(paths: List[str]) -> dict:
+    """
+    Return measure_version() of ``paths``, run in a new process with a
+    fixed hash seed.
+    """
+    # String hashes, and with them how sets and dictionaries lay out and
+    # grow, change from run to run unless the hash seed is fixed.
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = osp.join(tmp_dir, "result.json")
+        subprocess.run(
+            [sys.executable, osp.abspath(__file__), "--child", output_path],
+            input=json.dumps(paths),
+            text=True,
+            env=env,
+            check=True,
+        )
+        with open(output_path) as fp:
+            return json.load(fp)
+
+
+def measure(
+    versions: Optional[List[str]] = None,
+    corpus_dir: str = CORPUS_DIR,
+    jobs: int = 1,
+    verbose: bool = True,
+) -> Dict[str, dict]:
+    """
+    Measure each bytecode version in ``versions``, or all of them, and
+    return the results by version.
+
+    What is allocated depends on what was run before, such as when a
+    dictionary that xdis caches things in is resized. So that figures
+    don't depend on which versions are measured, each version is
+    measured in a new process with the same hash seed; ``jobs`` of
+    them are run at a time.
+    """
+    work = [
+        (version, paths)
+        for version, paths in version_files(corpus_dir).items()
+        if not versions or version in versions
+    ]
+    results = {}
+    with ThreadPoolExecutor(jobs) as pool:
+        measured = pool.map(measure_in_child, [paths for _, paths in work])
+        for (version, _), result in zip(work, measured):
+            if not result["instructions"]:
+                continue
+            results[version] = result
+            if verbose:
+                print_result(version, result)
+    return results
+
+
+def print_result(version: str, result: dict) -> None:
+    print(
+        "%-12s %4d files %7d instructions  "
+        % (version, result["files"], result["instructions"])
+        + "  ".join(
+            "%s %.0f/%.0f" % (stage, result[stage]["peak"], result[stage]["retained"])
+            for stage in STAGES
+        ),
+        flush=True,
+    )
+
+
+def python_minor() -> str:
+    return "%d.%d" % sys.version_info[:2]
+
+
+def budget(value: float, headroom: float, slack: float) -> float:
+    return value + max(abs(value) * headroom, slack)
+
+
+def make_budgets(results: Dict[str, dict], headroom: float) -> dict:
+    """Return budgets ``headroom`` above the measurements ``results``."""
+    budgets = {}
+    for version, result in results.items():
+        budgets[version] = {
+            stage: {
+                kind: round(
+                    budget(
+                        result[stage][kind],
+                        headroom,
+                        FILE_SLACK[stage] * result["files"] / result["instructions"],
+                    ),
+                    1,
+                )
+                for kind in ("peak", "retained")
+            }
+            for stage in STAGES
+        }
+    return {
+        "format_version": BUDGETS_FORMAT_VERSION,
+        "python_version": python_minor(),
+        "python_implementation": platform.python_implementation(),
+        "headroom": headroom,
+        "unit": "bytes per instruction",
+        "versions": budgets,
+    }
+
+
+def check_budgets(
+    results: Dict[str, dict], budgets: dict, tolerance: float = 0.0
+) -> List[str]:
+    """
+    Return a description of each figure in ``results`` that is over its
+    budget in ``budgets`` by more than ``tolerance``, a fraction of the
+    budget.
+    """
+    over = []
+    for version, result in sorted(results.items()):
+        version_budgets = budgets["versions"].get(version)
+        if version_budgets is None:
+            continue
+        for stage in STAGES:
+            for kind in ("peak", "retained"):
+                budget = version_budgets[stage][kind]
+                value = result[stage][kind]
+                if value > budget + abs(budget) * tolerance:
+                    over.append(
+                        "%s %s %s: %.1f bytes per instruction, budget %.1f"
+                        % (version, stage, kind, value, budget)
+                    )
+    return over
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check the memory xdis uses on the bytecode files in "
+        "test/bytecode_* against budgets."
+    )
+    parser.add_argument(
+        "--version",
+        "-V",
+        action="append",
+        help='only measure this bytecode version, e.g. "3.8" or "pypy38"; '
+        "can be given more than once",
+    )
+    parser.add_argument(
+        "--budgets",
+        default=BUDGETS_PATH,
+        help="JSON file of budgets (default %(default)s)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="write budgets from this run instead of checking them",
+    )
+    parser.add_argument(
+        "--headroom",
+        type=float,
+        default=DEFAULT_HEADROOM,
+        help="with --update, how far above the measurements, as a fraction, "
+        "to set budgets (default %(default)s)",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of versions to measure at a time (default %(default)s)",
+    )
+    parser.add_argument("--output", "-o", help="write measurements as JSON to this file")
+    parser.add_argument(
+        "--corpus",
+        default=CORPUS_DIR,
+        help="directory of bytecode_* directories to measure (default %(default)s)",
+    )
+    # Used by measure_in_child(): measure the files named in the JSON list
+    # on stdin and write the result as JSON to this file.
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if not hasattr(tracemalloc, "reset_peak"):
+        sys.stderr.write("This needs Python 3.9 or later.\n")
+        return 2
+
+    if args.child:
+        paths = json.load(sys.stdin)
+        tracemalloc.start()
+        result = measure_version(paths)
+        with open(args.child, "w") as fp:
+            json.dump(result, fp)
+        return 0
+
+    results = measure(args.version, args.corpus, args.jobs)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+
+    if args.update:
+        budgets = make_budgets(results, args.headroom)
+        if args.version and osp.exists(args.budgets):
+            # Keep the budgets of versions not measured.
+            with open(args.budgets) as fp:
+                old = json.load(fp)
+            if old.get("python_version") == budgets["python_version"]:
+                budgets["versions"] = dict(old["versions"], **budgets["versions"])
+        with open(args.budgets, "w") as fp:
+            json.dump(budgets, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+        print("\nWrote budgets for %d versions to %s" % (len(results), args.budgets))
+        return 0
+
+    with open(args.budgets) as fp:
+        budgets = json.load(fp)
+    if budgets["python_version"] != python_minor():
+        print(
+            "\nBudgets were made with Python %s, not %s; not checking them."
+            % (budgets["python_version"], python_minor())
+        )
+        return 0
+    over = check_budgets(results, budgets)
+    if over:
+        print("\nOver budget:")
+        for line in over:
+            print("  " + line)
+        return 1
+    print("\nAll %d versions are within budget." % len(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
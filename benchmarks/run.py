@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Time xdis over the bytecode files in test/bytecode_*, or in the
+bytecode_* directories of --corpus.
+
+The files are grouped into version families: CPython 1.x, 2.x, 3.0-3.10
+and 3.11+, PyPy, Graal, RustPython and Dropbox. For each family, these
+are timed, each over all the family's files:
+
+  header          reading the bytecode file header
+  load_code       unmarshalling the code object
+  instructions    decoding the instructions of every code object
+  dis-<format>    Bytecode.dis() of every code object, for each asm format
+  dumps           xdis.marsh.dumps() of the module code object
+  roundtrip       xdis.roundtrip_pyc.roundtrip_pyc()
+
+Files that an operation doesn't work on are left out of its timing.
+
+As with pyperf, each benchmark is run enough times in a loop for a
+sample to take at least --min-time seconds, and --samples samples are
+taken after a warmup. Only the standard library is used.
+
+Results are written as JSON with --output. Given --baseline, a JSON file
+from an earlier run, the median of each benchmark is compared against
+it, and the exit code is 1 if any is slower by more than --threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import os.path as osp
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+SRCDIR = osp.dirname(osp.dirname(osp.abspath(__file__)))
+
+# Benchmark this checkout rather than an installed xdis.
+sys.path.insert(0, SRCDIR)
+
+from xdis.bytecode import Bytecode, get_instructions_bytes  # noqa
+from xdis.bytecode_graal import Bytecode_Graal, get_instructions_bytes_graal  # noqa
+from xdis.carve import header_size  # noqa
+from xdis.codetype.base import iscode  # noqa
+from xdis.disasm import get_opcode  # noqa
+from xdis.load import load_module_from_file_object  # noqa
+from xdis.marsh import dumps  # noqa
+from xdis.roundtrip_pyc import roundtrip_pyc  # noqa
+from xdis.unmarshal import load_code  # noqa
+from xdis.version import __version__  # noqa
+from xdis.version_info import PythonImplementation  # noqa
+
+CORPUS_DIR = osp.join(SRCDIR, "test")
+
+ASM_FORMATS = ("classic", "extended", "bytes", "extended-bytes")
+
+RESULTS_FORMAT_VERSION = 1
+
+
+def family_of(dirname: str) -> str:
+    """
+    Return the version family of the files in test directory ``dirname``,
+    e.g. "bytecode_3.8".
+    """
+    name = dirname[len("bytecode_") :]
+    if "dropbox" in name:
+        return "dropbox"
+    if "pypy" in name:
+        return "pypy"
+    if name.startswith("graal"):
+        return "graal"
+    if name.startswith("rust"):
+        return "rust"
+    version = tuple(int(part) for part in name.split(".")[:2])
+    if version < (2, 0):
+        return "cpython-1"
+    if version < (3, 0):
+        return "cpython-2"
+    if version < (3, 11):
+        return "cpython-3.0-3.10"
+    return "cpython-3.11+"
+
+
+def corpus_files(corpus_dir: str = CORPUS_DIR) -> Dict[str, List[str]]:
+    """
+    Return the bytecode files under ``corpus_dir`` by version family.
+    """
+    families: Dict[str, List[str]] = {}
+    for dirname in sorted(os.listdir(corpus_dir)):
+        path = osp.join(corpus_dir, dirname)
+        if not (dirname.startswith("bytecode_") and osp.isdir(path)):
+            continue
+        files = families.setdefault(family_of(dirname), [])
+        files.extend(
+            osp.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.endswith((".pyc", ".pyo"))
+        )
+    return families
+
+
+def all_code_objects(co) -> list:
+    code_objects = [co]
+    for code in code_objects:
+        code_objects.extend(c for c in code.co_consts if iscode(c))
+    return code_objects
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard what is written to stdout and stderr."""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+class Module:
+    """A loaded bytecode file and what the benchmarks need from it."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fp:
+            self.data = fp.read()
+        with quiet():
+            (
+                self.version,
+                _,
+                self.magic_int,
+                self.co,
+                self.python_implementation,
+            ) = load_module_from_file_object(
+                io.BytesIO(self.data), filename=path
+            )[:5]
+        self.opc = get_opcode(
+            self.version, self.python_implementation, magic_int=self.magic_int
+        )
+        self.is_graal = self.python_implementation == PythonImplementation.Graal
+        self.code_objects = all_code_objects(self.co)
+        self.marshaled = self.data[header_size(self.magic_int) :]
+
+
+def header(m: Module) -> None:
+    load_module_from_file_object(io.BytesIO(m.data), filename=m.path, get_code=False)
+
+
+def unmarshal(m: Module) -> bool:
+    # Some formats, such as Dropbox's encrypted code objects, need more
+    # than load_code() to read; those don't give back a code object.
+    return iscode(
+        load_code(m.marshaled, m.magic_int, track_roundtrip_metadata=False)
+    )
+
+
+def instructions(m: Module) -> None:
+    get_instructions = (
+        get_instructions_bytes_graal if m.is_graal else get_instructions_bytes
+    )
+    for co in m.code_objects:
+        for _ in get_instructions(co, m.opc):
+            pass
+
+
+def disassembler(asm_format: str) -> Callable[[Module], None]:
+    def disassemble(m: Module) -> None:
+        bytecode_class = Bytecode_Graal if m.is_graal else Bytecode
+        for co in m.code_objects:
+            bytecode_class(co, m.opc).dis(asm_format=asm_format)
+
+    return disassemble
+
+
+def dump(m: Module) -> None:
+    dumps(m.co, python_version=m.version)
+
+
+def roundtrip(m: Module) -> bool:
+    # roundtrip_pyc() reports what it does on stdout and stderr.
+    with quiet():
+        return roundtrip_pyc(m.path, True, False) == 0
+
+
+BENCHMARK_FUNCTIONS: Dict[str, Callable[[Module], object]] = {
+    "header": header,
+    "load_code": unmarshal,
+    "instructions": instructions,
+    **{"dis-" + asm_format: disassembler(asm_format) for asm_format in ASM_FORMATS},
+    "dumps": dump,
+    "roundtrip": roundtrip,
+}
+
+BENCHMARKS = tuple(BENCHMARK_FUNCTIONS)
+
+
+def works(fn: Callable[[Module], object], m: Module) -> bool:
+    """Return True if fn(m) runs without raising or returning False."""
+    try:
+        with quiet():
+            return fn(m) is not False
+    except Exception:
+        return False
+
+
+def make_benchmark(
+    fn: Callable[[Module], object], modules: List[Module]
+) -> Tuple[int, Callable[[], None]]:
+    """
+    Return the number of ``modules`` that ``fn`` works on and a function
+    that runs ``fn`` once over each of them.
+    """
+    covered = [m for m in modules if works(fn, m)]
+
+    def run_all() -> None:
+        for m in covered:
+            fn(m)
+
+    return len(covered), run_all
+
+
+def time_benchmark(
+    fn: Callable, samples: int, min_time: float, warmups: int = 1
+) -> dict:
+    """
+    Time ``fn`` and return its loop count and per-loop times.
+    """
+    for _ in range(warmups):
+        fn()
+
+    # Calibrate: double the loop count until a sample takes min_time.
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 2**20:
+            break
+        loops *= 2
+
+    values = [elapsed / loops]
+    for _ in range(samples - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        values.append((time.perf_counter() - start) / loops)
+
+    return {
+        "loops": loops,
+        "values": values,
+        "median": statistics.median(values),
+        "min": min(values),
+        "mean": statistics.mean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def run_family(
+    family: str,
+    paths: List[str],
+    benchmarks: Optional[List[str]],
+    samples: int,
+    min_time: float,
+    verbose: bool,
+) -> dict:
+    """
+    Run ``benchmarks``, or all of them, over the bytecode files ``paths``
+    of version family ``family``.
+    """
+    modules = []
+    for path in paths:
+        try:
+            modules.append(Module(path))
+        except Exception:
+            pass
+
+    results = {}
+    for bench, bench_fn in BENCHMARK_FUNCTIONS.items():
+        if benchmarks and bench not in benchmarks:
+            continue
+        nfiles, fn = make_benchmark(bench_fn, modules)
+        if nfiles == 0:
+            continue
+        name = f"{bench}/{family}"
+        result = time_benchmark(fn, samples, min_time)
+        result.update(family=family, benchmark=bench, files=nfiles)
+        results[name] = result
+        if verbose:
+            print(
+                f"{name:40} {nfiles:5} files  {format_time(result['median'])}"
+                f" +- {format_time(result['stdev'])}",
+                flush=True,
+            )
+    return results
+
+
+def run(
+    families: Optional[List[str]] = None,
+    benchmarks: Optional[List[str]] = None,
+    samples: int = 5,
+    min_time: float = 0.1,
+    corpus_dir: str = CORPUS_DIR,
+    verbose: bool = True,
+) -> dict:
+    """
+    Run the benchmarks and return the results, in the form written as
+    JSON.
+    """
+    results = {}
+    # roundtrip_pyc() leaves the file it writes behind when a roundtrip
+    # fails; keep those out of the system temporary directory.
+    saved_tempdir = tempfile.tempdir
+    try:
+        with tempfile.TemporaryDirectory() as tempfile.tempdir:
+            for family, paths in sorted(corpus_files(corpus_dir).items()):
+                if not families or family in families:
+                    results.update(
+                        run_family(family, paths, benchmarks, samples, min_time, verbose)
+                    )
+    finally:
+        tempfile.tempdir = saved_tempdir
+
+    return {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "metadata": {
+            "xdis_version": __version__,
+            "python_version": platform.python_version(),
+            "python_implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "samples": samples,
+            "min_time": min_time,
+        },
+        "benchmarks": results,
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Print how each benchmark in ``results`` compares with ``baseline``
+    and return the names of those that are slower by more than
+    ``threshold``, a fraction.
+    """
+    regressions = []
+    print()
+    print(f"{'benchmark':40} {'baseline':>10} {'current':>10}  change")
+    for name, result in sorted(results["benchmarks"].items()):
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            continue
+        change = result["median"] / base["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:40} {format_time(base['median']):>10} "
+            f"{format_time(result['median']):>10}  {change:+7.1%}{flag}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time xdis over the bytecode files in test/bytecode_*."
+    )
+    parser.add_argument("--output", "-o", help="write results as JSON to this file")
+    parser.add_argument("--baseline", "-b", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="slowdown, as a fraction, counted as a regression (default 0.10)",
+    )
+    parser.add_argument(
+        "--family",
+        "-f",
+        action="append",
+        help="only run this version family; can be given more than once",
+    )
+    parser.add_argument(
+        "--benchmark",
+        "-k",
+        action="append",
+        choices=BENCHMARKS,
+        help="only run this benchmark; can be given more than once",
+    )
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.1,
+        help="minimum seconds per sample (default 0.1)",
+    )
+    parser.add_argument(
+        "--corpus",
+        default=CORPUS_DIR,
+        help="directory of bytecode_* directories to time (default %(default)s); "
+        "see synthetic.py",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="list version families and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for family, paths in sorted(corpus_files(args.corpus).items()):
+            print(f"{family:20} {len(paths):5} files")
+        return 0
+
+    results = run(
+        args.family, args.benchmark, args.samples, args.min_time, args.corpus
+    )
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+            fp.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(
+                f"\n{len(regressions)} benchmark(s) slower than the baseline by "
+                f"more than {args.threshold:.0%}"
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Generate large bytecode files for seeing how xdis scales.
+
+The bytecode files in test/ are small. This writes, for each CPython
+interpreter it can find, one bytecode file per case below, each pushing
+one dimension to an extreme:
+
+  consts           a module with 100,000 distinct constants
+  long_function    a function of about 50,000 instructions
+  nested_closures  50 levels of nested functions, each using the
+                   variables of all the functions it is nested in
+  extended_arg     jumps over more than 65,535 instructions, so that
+                   jump arguments need two EXTENDED_ARG prefixes
+  exception_table  a function with 5,000 try/except blocks
+  interned_strings 50,000 distinct names and string constants
+
+--scale multiplies these sizes; --scale 0.01 gives small files quickly.
+
+Source for each case is compiled by each interpreter, and the code object
+it gives back is unmarshalled by xdis and written with
+xdis.load.write_bytecode_file(). So the files are also a test of what
+xdis writes for those versions; each is checked to load back.
+
+Files go to OUTPUT_DIR/bytecode_<version>/<case>.pyc, the layout of test/,
+so "run.py --corpus OUTPUT_DIR" times them.
+"""
+
+import argparse
+import glob
+import os
+import os.path as osp
+import shutil
+import subprocess
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+SRCDIR = osp.dirname(osp.dirname(osp.abspath(__file__)))
+
+# Use this checkout rather than an installed xdis.
+sys.path.insert(0, SRCDIR)
+
+from xdis.load import load_module, write_bytecode_file  # noqa
+from xdis.magics import magic2int, magic_int2tuple  # noqa
+from xdis.unmarshal import load_code  # noqa
+
+DEFAULT_OUTPUT_DIR = osp.join(osp.dirname(osp.abspath(__file__)), "synthetic")
+
+# Versions whose "pythonX.Y" is looked for on $PATH.
+PYTHON_VERSIONS = ["2.7"] + ["3.%d" % minor for minor in range(0, 16)]
+
+# Run by each interpreter: compile the source on stdin, and write the
+# interpreter's magic number followed by the marshaled code object. This
+# has to work on every Python version.
+COMPILE_SCRIPT = """
+import marshal, platform, sys
+if platform.python_implementation() != "CPython":
+    sys.exit(3)
+try:
+    from importlib.util import MAGIC_NUMBER
+except ImportError:
+    import imp
+    MAGIC_NUMBER = imp.get_magic()
+source = getattr(sys.stdin, "buffer", sys.stdin).read()
+co = compile(source, sys.argv[1], "exec")
+getattr(sys.stdout, "buffer", sys.stdout).write(MAGIC_NUMBER + marshal.dumps(co))
+"""
+
+
+def scaled(n: int, scale: float, minimum: int = 1) -> int:
+    return max(minimum, int(n * scale))
+
+
+def consts_source(scale: float) -> str:
+    n = scaled(100000, scale)
+    # Cycle through ints, floats and strings so that each has its own
+    # marshal type code.
+    values = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            values.append(repr(i * 7919))
+        elif kind == 1:
+            values.append(repr(i + 0.5))
+        else:
+            values.append(repr("c%d" % i))
+    return "values = [\n%s\n]\n" % ",\n".join(values)
+
+
+def long_function_source(scale: float) -> str:
+    # Each line is 4 instructions: load, load, add, store.
+    n = scaled(50000, scale) // 4
+    lines = ["def long_function(%s):" % ", ".join("v%d" % i for i in range(20))]
+    for i in range(n):
+        lines.append("    v%d = v%d + %d" % (i % 20, (i + 7) % 20, i % 1000))
+    lines.append("    return v0")
+    return "\n".join(lines) + "\n"
+
+
+def nested_closures_source(scale: float) -> str:
+    # The tokenizer doesn't allow more than 100 levels of indentation.
+    depth = min(scaled(50, scale, 2), 90)
+    lines = []
+    for level in range(depth):
+        indent = "    " * level
+        lines.append("%sdef f%d(a%d):" % (indent, level, level))
+        used = " + ".join("a%d" % i for i in range(level + 1))
+        lines.append("%s    b%d = %s" % (indent, level, used))
+    indent = "    " * depth
+    lines.append("%sreturn %s" % (indent, " + ".join("b%d" % i for i in range(depth))))
+    for level in reversed(range(depth - 1)):
+        indent = "    " * (level + 1)
+        lines.append("%sreturn f%d" % (indent, level + 1))
+    return "\n".join(lines) + "\n"
+
+
+def extended_arg_source(scale: float) -> str:
+    # Each line of the loop body is 4 instructions, so the backward jump
+    # of the loop and the forward jump of the "if" go past 65,535
+    # instructions, and so also past 65,535 bytes.
+    n = scaled(70000, scale) // 4
+    lines = ["def extended_arg(x, y):", "    while x:", "        if y:"]
+    for i in range(n):
+        lines.append("            x = y + %d" % (i % 1000))
+    lines += ["        else:", "            y = x", "    return y"]
+    return "\n".join(lines) + "\n"
+
+
+def exception_table_source(scale: float) -> str:
+    n = scaled(5000, scale)
+    lines = ["def exception_table(f, x):"]
+    for i in range(n):
+        lines += [
+            "    try:",
+            "        x = f(x, %d)" % i,
+            "    except ValueError:",
+            "        x = %d" % i,
+        ]
+    lines.append("    return x")
+    return "\n".join(lines) + "\n"
+
+
+def interned_strings_source(scale: float) -> str:
+    n = scaled(50000, scale)
+    return "".join('name_%d = "string_%d"\n' % (i, i) for i in range(n))
+
+
+CASES: Dict[str, Callable[[float], str]] = {
+    "consts": consts_source,
+    "long_function": long_function_source,
+    "nested_closures": nested_closures_source,
+    "extended_arg": extended_arg_source,
+    "exception_table": exception_table_source,
+    "interned_strings": interned_strings_source,
+}
+
+
+def find_interpreters() -> List[str]:
+    """
+    Return the Python interpreters on $PATH or installed by pyenv, along
+    with the running one.
+    """
+    interpreters = [sys.executable]
+    for version in PYTHON_VERSIONS:
+        path = shutil.which("python" + version)
+        if path:
+            interpreters.append(path)
+    pyenv_root = os.environ.get("PYENV_ROOT", osp.join(osp.expanduser("~"), ".pyenv"))
+    interpreters += sorted(glob.glob(osp.join(pyenv_root, "versions", "*", "bin", "python")))
+    return interpreters
+
+
+def compile_with(python: str, source: str, filename: str) -> Optional[Tuple[int, bytes]]:
+    """
+    Compile ``source`` with the interpreter ``python``, and return its
+    magic int and the marshaled code object, or None if that interpreter
+    can't be run or isn't CPython.
+    """
+    try:
+        result = subprocess.run(
+            [python, "-c", COMPILE_SCRIPT, filename],
+            input=source.encode("utf-8"),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0 or len(result.stdout) < 4:
+        return None
+    return magic2int(result.stdout[:4]), result.stdout[4:]
+
+
+def generate(
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    interpreters: Optional[List[str]] = None,
+    cases: Optional[List[str]] = None,
+    scale: float = 1.0,
+    verbose: bool = True,
+) -> List[str]:
+    """
+    Write the bytecode files for ``cases``, or all of them, for each of
+    ``interpreters``, or those that find_interpreters() finds. Return the
+    paths written.
+    """
+    if interpreters is None:
+        interpreters = find_interpreters()
+    if cases is None:
+        cases = list(CASES)
+
+    sources = {case: CASES[case](scale) for case in cases}
+    magics_seen = set()
+    written = []
+    for python in interpreters:
+        probe = compile_with(python, "", "probe.py")
+        if probe is None or probe[0] in magics_seen:
+            # Not usable, or another interpreter for a version already done.
+            continue
+        magic_int = probe[0]
+        magics_seen.add(magic_int)
+        version = magic_int2tuple(magic_int)[:2]
+        dirname = osp.join(output_dir, "bytecode_%d.%d" % version)
+        os.makedirs(dirname, exist_ok=True)
+
+        for case, source in sources.items():
+            compiled = compile_with(python, source, case + ".py")
+            if compiled is None:
+                if verbose:
+                    print("%s: can't compile %s; skipped" % (python, case))
+                continue
+            co = load_code(compiled[1], magic_int, track_roundtrip_metadata=False)
+            path = osp.join(dirname, case + ".pyc")
+            # With optimize_refs, shared objects are worked out from the
+            # code object itself, so no roundtrip metadata is needed.
+            write_bytecode_file(
+                path, co, magic_int, filesize=len(source), optimize_refs=True
+            )
+
+            # Make sure that what was written loads back.
+            try:
+                load_module(path)
+            except Exception as e:
+                os.remove(path)
+                if verbose:
+                    print("%s: %s doesn't load back: %s; removed" % (python, path, e))
+                continue
+            written.append(path)
+            if verbose:
+                print("%s: wrote %s (%d bytes)" % (python, path, osp.getsize(path)))
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate large bytecode files for seeing how xdis scales."
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        default=DEFAULT_OUTPUT_DIR,
+        help="where to write bytecode_<version> directories (default %(default)s)",
+    )
+    parser.add_argument(
+        "--python",
+        action="append",
+        help="interpreter to compile with; can be given more than once "
+        "(default: those found on $PATH and in pyenv)",
+    )
+    parser.add_argument(
+        "--case",
+        "-c",
+        action="append",
+        choices=list(CASES),
+        help="only generate this case; can be given more than once",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the size of each case by this (default 1.0)",
+    )
+    args = parser.parse_args(argv)
+    written = generate(args.output_dir, args.python, args.case, args.scale)
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,9 @@ import sys
 
 from xdis import findlinestarts
 from xdis.bytecode import offset2line
+from xdis.bytecode_graal import Bytecode_Graal, get_instructions_bytes_graal
 from xdis.load import load_module
+from xdis.op_imports import get_opcode_module
 from xdis.opcodes import opcode_27, opcode_36
 from xdis.version_info import PYTHON_VERSION_TRIPLE
 
@@ -183,6 +185,21 @@ def findlabels():
     assert expect == offset_map
 
 
+def test_bytecode_graal_iter():
+    test_pyc = osp.join(
+        osp.dirname(osp.abspath(__file__)),
+        "..",
+        "test",
+        "bytecode_graal310",
+        "00_chained-compare.graalpy310.pyc",
+    )
+    version, _, _, co, python_implementation = load_module(test_pyc)[:5]
+    opc = get_opcode_module(version, python_implementation)
+    instructions = list(Bytecode_Graal(co, opc))
+    assert instructions
+    assert instructions == list(get_instructions_bytes_graal(co, opc))
+
+
 if __name__ == "__main__":
     # test_get_jump_targets()
     # test_offset2line()
@@ -0,0 +1,97 @@
+"""
+Unit tests for xdis.cache
+"""
+
+import glob
+import os
+import os.path as osp
+
+import pytest
+import xdis.unmarshal
+from xdis.cache import CACHE_SUFFIX, CodeCache
+from xdis.load import load_module
+from xdis.unmarshal import UnmarshalLimitError, UnmarshalLimits
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def bytecode_27_files():
+    bytecode_dir = osp.join(get_srcdir(), "..", "test", "bytecode_2.7")
+    return sorted(glob.glob(osp.join(bytecode_dir, "*.pyc")))
+
+
+def test_warm_load_skips_unmarshal(tmp_path, monkeypatch) -> None:
+    pyc_path = bytecode_27_files()[0]
+    cache = CodeCache(str(tmp_path))
+    cold = load_module(pyc_path, cache=cache)
+    assert len(glob.glob(str(tmp_path / ("*" + CACHE_SUFFIX)))) == 1
+
+    def no_unmarshal(*args, **kwargs):
+        raise AssertionError("cached load should not unmarshal")
+
+    monkeypatch.setattr(xdis.unmarshal, "load_code", no_unmarshal)
+    warm = load_module(pyc_path, cache=cache)
+    assert warm[0] == cold[0]
+    assert warm[2] == cold[2]
+    assert warm[3].co_code == cold[3].co_code
+    assert warm[3].co_name == cold[3].co_name
+
+
+def test_lru_eviction(tmp_path) -> None:
+    pyc_paths = bytecode_27_files()[:3]
+    cache = CodeCache(str(tmp_path))
+    sizes = []
+    for i, pyc_path in enumerate(pyc_paths):
+        load_module(pyc_path, cache=cache)
+        with open(pyc_path, "rb") as fp:
+            entry_path = cache.path(cache.key(fp.read()))
+        # Make the use order unambiguous to the mtime-based LRU.
+        os.utime(entry_path, (i + 1, i + 1))
+        sizes.append(osp.getsize(entry_path))
+
+    # Only room for the most recently used entry.
+    cache = CodeCache(str(tmp_path), max_size=sizes[-1])
+    cache.evict()
+    entries = glob.glob(str(tmp_path / ("*" + CACHE_SUFFIX)))
+    assert len(entries) == 1
+    with open(pyc_paths[-1], "rb") as fp:
+        assert entries[0] == cache.path(cache.key(fp.read()))
+
+    cache.clear()
+    assert glob.glob(str(tmp_path / ("*" + CACHE_SUFFIX))) == []
+
+
+def test_limits_bypass_cache(tmp_path) -> None:
+    pyc_path = bytecode_27_files()[0]
+    cache = CodeCache(str(tmp_path))
+    load_module(pyc_path, cache=cache)
+
+    # A cached entry doesn't let a load with limits skip checking them.
+    with pytest.raises(UnmarshalLimitError):
+        load_module(pyc_path, cache=cache, limits=UnmarshalLimits(max_objects=3))
+
+
+def test_cache_key_options() -> None:
+    cache = CodeCache()
+    data = b"\0" * 64
+    keys = {
+        cache.key(data),
+        cache.key(data, save_file_offsets=True),
+        cache.key(data, track_roundtrip_metadata=True),
+        cache.key(data, fast_load=True),
+    }
+    assert len(keys) == 4
+
+
+def test_warm_load_fills_code_objects(tmp_path) -> None:
+    pyc_path = bytecode_27_files()[0]
+    cache = CodeCache(str(tmp_path))
+    cold_code_objects = {}
+    load_module(pyc_path, code_objects=cold_code_objects, cache=cache)
+    warm_code_objects = {}
+    co = load_module(pyc_path, code_objects=warm_code_objects, cache=cache)[3]
+    assert len(warm_code_objects) == len(cold_code_objects) > 0
+    assert warm_code_objects[str(co)] is co
@@ -0,0 +1,48 @@
+"""
+Unit tests for xdis.carve
+"""
+
+import os.path as osp
+
+from xdis.carve import carve, carve_buffer
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def test_carve(tmp_path) -> None:
+    bytecode_dir = osp.join(get_srcdir(), "..", "test")
+    pyc_paths = [
+        osp.join(bytecode_dir, "bytecode_2.7", "01_dead_code.pyc"),
+        osp.join(bytecode_dir, "bytecode_3.8", "00_chained-compare.pyc"),
+        osp.join(bytecode_dir, "bytecode_3.12", "00_chained-compare.pyc"),
+    ]
+
+    # Surround each bytecode file with junk, including something that
+    # looks like a 3.8 magic number but isn't followed by a code object.
+    blob = bytearray(b"\x7fELF" + b"\x00" * 100)
+    expected = []
+    for pyc_path in pyc_paths:
+        with open(pyc_path, "rb") as fp:
+            data = fp.read()
+        blob += b"\x55\x0d\x0d\x0a" + b"junk" * 20
+        expected.append((len(blob), len(data)))
+        blob += data
+    blob += b"\xff" * 50
+
+    blob_path = tmp_path / "bundle.bin"
+    blob_path.write_bytes(bytes(blob))
+
+    found = list(carve(str(blob_path)))
+    assert [(record.offset, record.size) for record in found] == expected
+    assert found[0].version.startswith("2.7")
+    assert found[1].version.startswith("3.8")
+    assert found[2].version.startswith("3.12")
+
+    assert list(carve_buffer(bytes(blob))) == found
+
+    empty_path = tmp_path / "empty.bin"
+    empty_path.write_bytes(b"")
+    assert list(carve(str(empty_path))) == []
@@ -32,5 +32,68 @@ def test_codeType2Portable():
         assert eval(cc_new.to_native()) == 5
 
 
+def test_portable_slots():
+    five_code = five.__code__
+    cc = xdis.codetype.codeType2Portable(five_code, version_triple=(3, 8))
+    assert not hasattr(cc, "__dict__")
+    assert cc.collection_order == {}
+    assert cc.reference_objects == set()
+
+    # Roundtrip metadata is stored only when there is some.
+    cc.reference_objects = {"five"}
+    assert cc.reference_objects == {"five"}
+    cc_new = cc.replace(co_name="five_renamed")
+    assert cc_new.reference_objects == {"five"}
+    assert cc_new.co_name == "five_renamed"
+
+
+def test_portable_metadata_in_place():
+    # Adding to the collections in place has to stick, even when the
+    # code object has no metadata stored yet.
+    five_code = five.__code__
+    cc = xdis.codetype.codeType2Portable(five_code, version_triple=(3, 8))
+    cc.reference_objects.add("five")
+    assert cc.reference_objects == {"five"}
+    key = frozenset({"a", "b"})
+    cc.collection_order[key] = ("b", "a")
+    assert cc.collection_order == {key: ("b", "a")}
+    assert cc.reference_objects == {"five"}
+
+
+def test_to_native_nested():
+    if IS_PYPY or IS_GRAAL:
+        return
+    source = (
+        "def outer():\n"
+        "    def inner():\n"
+        "        return 7\n"
+        "    return inner()\n"
+        "x = outer()\n"
+    )
+
+    def to_portable(code):
+        cc = xdis.codetype.codeType2Portable(code)
+        cc.co_consts = tuple(
+            to_portable(const) if isinstance(const, types.CodeType) else const
+            for const in cc.co_consts
+        )
+        return cc
+
+    cc = to_portable(compile(source, "<nested>", "exec"))
+    memo = {}
+    new_code = cc.to_native(memo=memo)
+    assert isinstance(new_code, types.CodeType)
+    assert not any(
+        isinstance(const, xdis.codetype.CodeBase) for const in new_code.co_consts
+    )
+    assert memo[id(cc)] is new_code
+    assert len(memo) == 3
+    namespace = {}
+    exec(new_code, namespace)
+    assert namespace["x"] == 7
+
+
 if __name__ == "__main__":
     test_codeType2Portable()
+    test_portable_slots()
+    test_to_native_nested()
@@ -1,3 +1,4 @@
+import json
 import os
 import platform
 import re
@@ -132,6 +133,79 @@ def test_funcoutput(test_name, version, formats: List[str]):
         run_check_disasm(test_tuple, disassemble_file_xasm)
 
 
+def test_jsonl() -> None:
+    pyc_path = os.path.join(get_srcdir(), "..", "test", "bytecode_3.11", "04_withas.py.pyc")
+    out = StringIO()
+    disassemble_file(pyc_path, out, asm_format="jsonl")
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert records[0]["type"] == "file"
+    assert records[0]["version"] == "3.11"
+    code_records = [r for r in records if r["type"] == "code"]
+    assert [r["name"] for r in code_records][:2] == ["<module>", "formatweekday"]
+    assert [r["id"] for r in code_records] == list(range(len(code_records)))
+    assert all(r["parent"] == 0 for r in code_records[1:])
+
+    # Instruction records follow their code object's record.
+    code_id = None
+    for record in records[1:]:
+        if record["type"] == "code":
+            code_id = record["id"]
+        else:
+            assert record["code"] == code_id
+
+    formatweekday = code_records[1]
+    assert formatweekday["exception_table"][0] == {
+        "start": 6,
+        "end": 10,
+        "target": 36,
+        "depth": 1,
+        "lasti": True,
+    }
+    instructions = {
+        r["offset"]: r
+        for r in records
+        if r["type"] == "instruction" and r["code"] == formatweekday["id"]
+    }
+    assert instructions[6]["handler"] == 36
+    assert instructions[4]["handler"] is None
+    assert instructions[40]["opname"] == "POP_JUMP_FORWARD_IF_TRUE"
+    assert instructions[40]["jump_target"] == 50
+    assert instructions[2]["argval"] == "'self'"
+    assert instructions[2]["line"] == 11
+    assert instructions[8]["starts_line"] and instructions[8]["line"] == 12
+
+    out = StringIO()
+    disassemble_file(pyc_path, out, asm_format="jsonl", methods=("formatweekday",))
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["name"] for r in records if r["type"] == "code"] == ["formatweekday"]
+
+
+def test_jsonl_repeatable() -> None:
+    # Records for the same file should be the same from run to run; in
+    # particular, code object constants shouldn't show their address.
+    pyc_path = os.path.join(get_srcdir(), "..", "test", "bytecode_3.8", "01_assert2.pyc")
+    runs = []
+    for _ in range(2):
+        out = StringIO()
+        disassemble_file(pyc_path, out, asm_format="jsonl")
+        runs.append(out.getvalue())
+    assert runs[0] == runs[1]
+
+    records = [json.loads(line) for line in runs[0].splitlines()]
+    code_consts = [
+        r
+        for r in records
+        if r["type"] == "instruction"
+        and r["argrepr"] is not None
+        and r["argrepr"].startswith("<code object")
+    ]
+    assert code_consts
+    for record in code_consts:
+        assert " at 0x" not in record["argrepr"]
+        assert record["argrepr"] == record["argval"]
+
+
 if __name__ == "__main__":
     test_funcoutput(
         ("../test/bytecode_3.0/04_raise.pyc", "testdata/raise-3.0.right"),
@@ -0,0 +1,66 @@
+"""
+Unit tests for xdis.dropbox.decrypt25
+"""
+
+import os
+import os.path as osp
+import random
+import shutil
+
+import pytest
+from xdis.dropbox.decrypt25 import MX, fix_dir, tea_decipher, tea_decipher_bytes
+from xdis.load import load_module
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+DROPBOX_PYC = osp.join(get_srcdir(), "..", "test", "bytecode_2.5dropbox", "codeop.pyc")
+
+
+def reference_tea_decipher(v, key):
+    # The original straightforward version of tea_decipher().
+    DELTA = 0x9E3779B9
+    n = len(v)
+    rounds = 6 + 52 // n
+    sum = rounds * DELTA
+    y = v[0]
+    while sum != 0:
+        e = (sum >> 2) & 3
+        for p in range(n - 1, -1, -1):
+            z = v[(n + p - 1) % n]
+            v[p] = (v[p] - MX(z, y, sum, key, p, e)) & 0xFFFFFFFF
+            y = v[p]
+        sum -= DELTA
+    return v
+
+
+def test_tea_decipher() -> None:
+    rand = random.Random(25)
+    for n in (1, 2, 3, 4, 5, 16, 101):
+        v = [rand.getrandbits(32) for _ in range(n)]
+        key = tuple(rand.getrandbits(32) for _ in range(4))
+        expected = reference_tea_decipher(list(v), key)
+        assert tea_decipher(list(v), key) == expected
+        data = b"".join(word.to_bytes(4, "little") for word in v)
+        assert tea_decipher_bytes(data, key) == b"".join(
+            word.to_bytes(4, "little") for word in expected
+        )
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_fix_dir(tmp_path, workers: int) -> None:
+    version, _, magic_int, co = load_module(DROPBOX_PYC)[:4]
+    assert version == (2, 5, "0dropbox")
+
+    for i in range(3):
+        shutil.copy(DROPBOX_PYC, tmp_path / f"codeop{i}.pyc")
+    assert fix_dir(str(tmp_path), workers=workers) == []
+
+    for name in sorted(os.listdir(tmp_path)):
+        fixed = load_module(str(tmp_path / name))
+        assert fixed[2] == magic_int
+        assert fixed[3].co_code == co.co_code
+        assert fixed[3].co_names == co.co_names
@@ -0,0 +1,109 @@
+"""
+Unit tests for xdis.instruction_dump
+"""
+
+import os.path as osp
+from collections import Counter
+
+import pytest
+from xdis.bytecode import get_instructions_bytes
+from xdis.codetype.base import iscode
+from xdis.disasm import get_opcode
+from xdis.instruction_dump import InstructionDump, InstructionDumpWriter, dump_files
+from xdis.load import load_module
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+PATHS = [
+    osp.join(get_srcdir(), "..", "test", "bytecode_%s" % version, name)
+    for version, name in (
+        ("2.7", "01_hexstring.pyc"),
+        ("3.8", "01_assert2.pyc"),
+        ("3.11", "04_withas.py.pyc"),
+        ("graal311", "01_assert2.graalpy311.pyc"),
+    )
+]
+
+
+def test_dump_roundtrip(tmp_path) -> None:
+    dump_path = str(tmp_path / "dump.xid")
+    assert dump_files(dump_path, PATHS) == (len(PATHS), [])
+
+    # Columns that go to temporary files while writing come out the same.
+    small_path = str(tmp_path / "small.xid")
+    with InstructionDumpWriter(small_path, buffer_size=3) as writer:
+        for path in PATHS:
+            writer.add_file(path)
+    with open(dump_path, "rb") as fp1, open(small_path, "rb") as fp2:
+        assert fp1.read() == fp2.read()
+
+    with InstructionDump(dump_path) as dump:
+        modules = list(dump.modules())
+        assert [m.path for m in modules] == PATHS
+        assert [m.version.split(".")[:2] for m in modules[:3]] == [
+            ["2", "7"],
+            ["3", "8"],
+            ["3", "11"],
+        ]
+        assert modules[3].implementation == "Graal"
+
+        version, _, magic_int, co, python_implementation = load_module(PATHS[2])[:5]
+        opc = get_opcode(version, python_implementation, magic_int=magic_int)
+        code = dump.code_object(modules[2].first_code)
+        assert code.name == "<module>" and code.parent == -1
+        # The code objects of 04_withas.py are all in the module.
+        nested = [c for c in co.co_consts if iscode(c)]
+        for i, c in enumerate(nested, modules[2].first_code + 1):
+            dumped = dump.code_object(i)
+            assert dumped.name == c.co_name
+            assert dumped.parent == modules[2].first_code
+            expected = list(get_instructions_bytes(c, opc))
+            got = list(dumped.instructions())
+            assert [(i.offset, i.opcode, i.opname, i.arg) for i in got] == [
+                (i.offset, i.opcode, i.opname, i.arg) for i in expected
+            ]
+            assert list(dumped.column("offset")) == [i.offset for i in expected]
+
+        formatweekday = dump.code_object(modules[2].first_code + 1)
+        instr = list(formatweekday.instructions())[1]
+        assert (instr.opname, instr.argval, instr.line) == ("LOAD_FAST", "'self'", 11)
+
+        assert sum(m.n_code_objects for m in modules) == dump.n_code_objects
+        opnames = Counter(dump.string(i) for i in dump.column("opname"))
+        assert sum(opnames.values()) == dump.n_instructions
+        assert opnames["RETURN_VALUE"] > 0
+
+
+def test_failed_file(tmp_path) -> None:
+    # A file that fails partway through leaves nothing of itself behind.
+    version, _, magic_int, co, python_implementation = load_module(PATHS[1])[:5]
+
+    class BadName(str):
+        def __str__(self):
+            raise ValueError("bad name")
+
+    nested = [c for c in co.co_consts if iscode(c)][0]
+    nested.co_name = BadName(nested.co_name)
+    dump_path = str(tmp_path / "dump.xid")
+    with InstructionDumpWriter(dump_path) as writer:
+        writer.add_file(PATHS[0])
+        with pytest.raises(ValueError):
+            writer.add_code(co, version, python_implementation, magic_int)
+        writer.add_file(PATHS[2])
+
+    expected_path = str(tmp_path / "expected.xid")
+    dump_files(expected_path, [PATHS[0], PATHS[2]])
+    with InstructionDump(dump_path) as dump, InstructionDump(expected_path) as expected:
+        assert dump.n_instructions == expected.n_instructions
+        assert dump.n_code_objects == expected.n_code_objects
+        assert list(dump.column("offset")) == list(expected.column("offset"))
+        assert [m.path for m in dump.modules()] == [PATHS[0], PATHS[2]]
+
+
+def test_not_a_dump(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        InstructionDump(PATHS[1])
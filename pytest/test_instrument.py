@@ -0,0 +1,55 @@
+"""
+Unit tests for xdis.instrument
+"""
+
+import io
+import os.path as osp
+
+import xdis.instrument
+from xdis.disasm import disassemble_file
+from xdis.instrument import PHASES, Profiler
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def test_profile_disassembly() -> None:
+    pyc_path = osp.join(get_srcdir(), "..", "test", "bytecode_3.8", "01_assert2.pyc")
+    spans = []
+    out = io.StringIO()
+    with Profiler(trace_allocations=True, callback=spans.append) as profiler:
+        assert xdis.instrument.profiler is profiler
+        disassemble_file(pyc_path, out)
+    assert xdis.instrument.profiler is None
+
+    assert set(PHASES) <= set(profiler.phases)
+    assert {span.phase for span in spans} == set(profiler.phases)
+    assert profiler.counters["bytes written"] == len(out.getvalue())
+    assert profiler.counters["instructions"] > 0
+    assert profiler.peak_memory is not None
+    for span in spans:
+        assert 0 <= span.self_time <= span.elapsed
+        assert span.allocated is not None
+
+    # Every code object in the file is unmarshalled and decoded.
+    unmarshalled = {span.code for span in spans if span.phase == "unmarshal"}
+    decoded = {span.code for span in spans if span.phase == "decode" and span.code}
+    assert unmarshalled == decoded
+    assert any(name.startswith("<module>:") for name in unmarshalled)
+
+    report = io.StringIO()
+    profiler.report(report)
+    text = report.getvalue()
+    for phase in PHASES:
+        assert "\n%s " % phase in text
+    assert "slowest code objects" in text
+
+
+def test_no_profiler() -> None:
+    pyc_path = osp.join(get_srcdir(), "..", "test", "bytecode_3.8", "01_assert2.pyc")
+    out = io.StringIO()
+    assert xdis.instrument.profiler is None
+    disassemble_file(pyc_path, out)
+    assert out.getvalue()
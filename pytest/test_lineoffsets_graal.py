@@ -0,0 +1,48 @@
+"""
+Unit tests for xdis.lineoffsets_graal
+"""
+
+import os.path as osp
+
+from xdis.lineoffsets_graal import find_linestarts_graal, get_source_map
+from xdis.load import load_module
+from xdis.op_imports import get_opcode_module
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def test_source_map() -> None:
+    pyc_path = osp.join(
+        get_srcdir(),
+        "..",
+        "test",
+        "bytecode_graal310",
+        "00_chained-compare.graalpy310.pyc",
+    )
+    version, _, _, co, python_implementation = load_module(pyc_path)[:5]
+    opc = get_opcode_module(version, python_implementation)
+
+    source_map = get_source_map(co, opc)
+    assert get_source_map(co, opc) is source_map
+    assert len(source_map.startLineMap) == len(co.co_code)
+
+    # Each byte of an instruction maps to that instruction's span.
+    offsets = list(source_map.offsets)
+    for i, offset in enumerate(offsets):
+        end = offsets[i + 1] if i + 1 < len(offsets) else source_map.covered_end
+        for byte_offset in range(offset, end):
+            assert source_map.get_line(byte_offset) == source_map.start_lines[i]
+            assert source_map.startLineMap[byte_offset] == source_map.start_lines[i]
+            assert source_map.get_span(byte_offset)[2:] == (
+                source_map.end_lines[i],
+                source_map.end_columns[i],
+            )
+    assert source_map.get_line(len(co.co_code)) == 0
+
+    linestarts = find_linestarts_graal(co, opc, dup_lines=True)
+    assert linestarts
+    for offset, line in linestarts.items():
+        assert source_map.get_line(offset) == line
@@ -0,0 +1,100 @@
+"""
+Unit tests for xdis.load_async
+"""
+
+import asyncio
+import glob
+import io
+import os.path as osp
+import threading
+import time
+
+import pytest
+from xdis.load import load_module
+from xdis.load_async import load_many, load_module_async
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+class SlowFileSystem:
+    """
+    Stand-in for a high-latency file system: every open() sleeps first.
+    Keeps track of how many opens were in progress at the same time.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def open(self, path: str, mode: str):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return open(path, mode)
+
+
+def bytecode_paths():
+    bytecode_dir = osp.join(get_srcdir(), "..", "test", "bytecode_3.8")
+    return sorted(glob.glob(osp.join(bytecode_dir, "*.pyc")))[:8]
+
+
+def test_load_module_async() -> None:
+    path = bytecode_paths()[0]
+    result = asyncio.run(load_module_async(path))
+    expected = load_module(path)
+    assert result[0] == expected[0]
+    assert result[3].co_code == expected[3].co_code
+
+    with pytest.raises(ImportError):
+        asyncio.run(load_module_async(path + "-does-not-exist"))
+
+
+def test_load_module_async_opener() -> None:
+    # The opener doesn't have to read from the local file system.
+    path = bytecode_paths()[0]
+    with open(path, "rb") as fp:
+        files = {"mem:good.pyc": fp.read(), "mem:short.pyc": b"\0" * 10}
+
+    def opener(name: str, mode: str):
+        if name not in files:
+            raise FileNotFoundError(name)
+        return io.BytesIO(files[name])
+
+    result = asyncio.run(load_module_async("mem:good.pyc", opener=opener))
+    assert result[3].co_code == load_module(path)[3].co_code
+
+    with pytest.raises(ImportError, match="too short"):
+        asyncio.run(load_module_async("mem:short.pyc", opener=opener))
+    with pytest.raises(ImportError, match="doesn't exist"):
+        asyncio.run(load_module_async("mem:missing.pyc", opener=opener))
+
+
+def test_load_many() -> None:
+    paths = bytecode_paths()
+    paths.insert(3, paths[0] + "-does-not-exist")
+    fs = SlowFileSystem(delay=0.05)
+
+    async def collect():
+        return [
+            result
+            async for result in load_many(paths, concurrency=4, opener=fs.open)
+        ]
+
+    results = asyncio.run(collect())
+    assert len(results) == len(paths)
+    assert 1 < fs.max_active <= 4
+    for path, result in zip(paths, results):
+        if path.endswith("-does-not-exist"):
+            assert isinstance(result, ImportError)
+        else:
+            assert result[3].co_code == load_module(path)[3].co_code
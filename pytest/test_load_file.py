@@ -1,10 +1,18 @@
+import glob
 import os
 import os.path as osp
+import zipfile
 
 import pytest
 from xdis import IS_GRAAL, IS_PYPY
 from xdis.codetype import CodeTypeUnionFields
-from xdis.load import check_object_path, load_file, load_module
+from xdis.load import (
+    check_object_path,
+    load_archive_modules,
+    load_file,
+    load_module,
+    load_modules,
+)
 from xdis.version_info import PYTHON_VERSION_TRIPLE
 
 
@@ -85,5 +93,57 @@ def test_load_file() -> None:
             print("ok %s" % field)
 
 
+@pytest.mark.parametrize("workers", [1, 2])
+def test_load_modules(workers: int) -> None:
+    bytecode_dir = osp.join(get_srcdir(), "..", "test", "bytecode_3.8")
+    paths = sorted(glob.glob(osp.join(bytecode_dir, "*.pyc")))[:4]
+    paths.insert(2, osp.join(bytecode_dir, "does-not-exist.pyc"))
+
+    results = list(load_modules(paths, workers=workers, chunksize=2))
+    assert len(results) == len(paths)
+    for path, result in zip(paths, results):
+        if path.endswith("does-not-exist.pyc"):
+            assert isinstance(result, ImportError)
+            continue
+        expected = load_module(path)
+        assert result[0] == expected[0]
+        assert result[3].co_code == expected[3].co_code
+        assert result[3].co_filename == expected[3].co_filename
+
+
+def make_wheel(tmp_path) -> tuple:
+    bytecode_dir = osp.join(get_srcdir(), "..", "test", "bytecode_3.8")
+    paths = sorted(glob.glob(osp.join(bytecode_dir, "*.pyc")))[:3]
+    wheel_path = str(tmp_path / "pkg-1.0-py3-none-any.whl")
+    with zipfile.ZipFile(wheel_path, "w") as zf:
+        zf.writestr("pkg/__init__.py", "")
+        for path in paths:
+            zf.write(path, "pkg/__pycache__/" + osp.basename(path))
+    return wheel_path, paths
+
+
+def test_load_archive_member(tmp_path) -> None:
+    wheel_path, paths = make_wheel(tmp_path)
+    member = wheel_path + "!/pkg/__pycache__/" + osp.basename(paths[0])
+    result = load_module(member)
+    expected = load_module(paths[0])
+    assert result[0] == expected[0]
+    assert result[3].co_code == expected[3].co_code
+
+    with pytest.raises(ImportError):
+        load_module(wheel_path + "!/pkg/__pycache__/missing.pyc")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_load_archive_modules(tmp_path, workers: int) -> None:
+    wheel_path, paths = make_wheel(tmp_path)
+    results = list(load_archive_modules(wheel_path, workers=workers))
+    assert [filename for filename, _ in results] == [
+        wheel_path + "!/pkg/__pycache__/" + osp.basename(path) for path in paths
+    ]
+    for path, (_, result) in zip(paths, results):
+        assert result[3].co_code == load_module(path)[3].co_code
+
+
 if __name__ == "__main__":
     test_load_file()
@@ -0,0 +1,141 @@
+"""
+Unit tests for xdis.marsh
+"""
+
+import io
+import marshal
+import os.path as osp
+from importlib.util import MAGIC_NUMBER
+from types import SimpleNamespace
+
+from xdis.codetype.base import iscode
+from xdis.load import load_module
+from xdis.magics import magic2int
+from xdis.marsh import _StreamWriter, dump, dumps, localsplus
+from xdis.roundtrip_pyc import compare_code_objects
+from xdis.unmarshal import load_code
+from xdis.version_info import PYTHON_VERSION_TRIPLE
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def test_dump_streams_like_dumps(tmp_path) -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.4", "roundtrip_pyc", "01_extended_arg.pyc"
+    )
+    version, _, _, co, _, _, _, _ = load_module(pyc_path)
+    expected = dumps(co, python_version=version)
+
+    out_path = tmp_path / "out.marshal"
+    with open(out_path, "wb") as fp:
+        dump(co, fp, python_version=version)
+    assert out_path.read_bytes() == expected
+
+
+def test_stream_writer_buffering() -> None:
+    buffer = io.BytesIO()
+    writer = _StreamWriter(buffer, (3, 8), buffer_size=4)
+    writer.write("abc")
+    # Nothing is written until the buffer fills ...
+    assert buffer.getvalue() == b""
+    writer.write(b"de")
+    assert buffer.getvalue() == b"abcde"
+    writer.write(b"f")
+    # ... or it is flushed.
+    writer.flush()
+    assert buffer.getvalue() == b"abcdef"
+
+
+def test_dumps_optimize_refs() -> None:
+    names = ("self", "x", "self")
+    obj = (
+        names,
+        names,
+        "filename.py",
+        ("filename.py", 3, 3, 1.5, 1.5, b"ab", b"ab", "café", "café"),
+        frozenset({"a", "b"}),
+        frozenset({"a", "b"}),
+        [True, None, Ellipsis],
+        {"k": names},
+    )
+    version = PYTHON_VERSION_TRIPLE
+    shared = dumps(obj, python_version=version, optimize_refs=True)
+    assert marshal.loads(shared) == obj
+    assert len(shared) <= len(marshal.dumps(obj))
+
+
+def test_code_optimize_refs() -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.4", "roundtrip_pyc", "01_extended_arg.pyc"
+    )
+    version, _, magic_int, co, _, _, _, _ = load_module(pyc_path)
+    # Pretend the code object was built in memory.
+    co.reference_objects = set()
+    shared = dumps(co, python_version=version, optimize_refs=True)
+    # The 3.4 header is 12 bytes.
+    assert len(shared) <= osp.getsize(pyc_path) - 12
+    assert compare_code_objects(co, load_code(shared, magic_int))
+
+
+def test_dump_code_posonlyargcount() -> None:
+    pyc_path = osp.join(get_srcdir(), "..", "test", "bytecode_3.8", "04_def_annotate.pyc")
+    version, _, magic_int, co, _, _, _, _ = load_module(pyc_path)
+    test1 = [c for c in co.co_consts if iscode(c) and c.co_name == "test1"][0]
+    test1.co_posonlyargcount = 2
+    written = dumps(co, python_version=version, optimize_refs=True)
+    co2 = load_code(written, magic_int)
+    assert compare_code_objects(co, co2)
+    test1 = [c for c in co2.co_consts if iscode(c) and c.co_name == "test1"][0]
+    assert test1.co_posonlyargcount == 2
+
+
+def test_dump_code_311_layout() -> None:
+    # 3.11 and later marshal co_localsplusnames and co_localspluskinds in
+    # place of co_varnames, co_cellvars and co_freevars, and add
+    # co_qualname and co_exceptiontable.
+    pyc_path = osp.join(get_srcdir(), "..", "test", "bytecode_3.11", "04_withas.py.pyc")
+    version, _, magic_int, co, _, _, _, _ = load_module(pyc_path)
+    written = dumps(co, python_version=version, optimize_refs=True)
+    co2 = load_code(written, magic_int)
+    assert compare_code_objects(co, co2)
+    assert co2.co_qualname == co.co_qualname
+    assert co2.co_exceptiontable == co.co_exceptiontable
+
+    # "b" is an argument that is also a cell; "c" is only a cell.
+    code = SimpleNamespace(
+        co_varnames=("a", "b"), co_cellvars=("b", "c"), co_freevars=("d",)
+    )
+    assert localsplus(code) == (("a", "b", "c", "d"), bytes([0x20, 0x60, 0x40, 0x80]))
+
+
+def test_dump_code_layout() -> None:
+    # Writing a portable code object for the running Python should give
+    # what marshal itself can load, cell and free variables included.
+    source = (
+        "def outer(a, b):\n"
+        "    c = a\n"
+        "    def inner():\n"
+        "        try:\n"
+        "            return a + b + c\n"
+        "        except TypeError:\n"
+        "            return None\n"
+        "    return inner\n"
+    )
+    native = compile(source, "layout.py", "exec")
+    magic_int = magic2int(MAGIC_NUMBER)
+    portable = load_code(marshal.dumps(native), magic_int)
+    written = dumps(portable, python_version=PYTHON_VERSION_TRIPLE, optimize_refs=True)
+    co = marshal.loads(written)
+
+    outer = co.co_consts[0]
+    assert outer.co_cellvars == native.co_consts[0].co_cellvars
+    inner = [c for c in outer.co_consts if hasattr(c, "co_code")][0]
+    assert inner.co_freevars == ("a", "b", "c")
+
+    namespace = {}
+    exec(co, namespace)
+    assert namespace["outer"](1, 2)() == 4
+    assert namespace["outer"]("x", 2)() is None
@@ -0,0 +1,46 @@
+"""
+Check the memory xdis uses on some of the test bytecode against
+benchmarks/memory_budgets.json. "make check-memory" checks all of it,
+without the tolerance given here.
+"""
+
+import importlib.util
+import json
+import os.path as osp
+import platform
+import tracemalloc
+
+import pytest
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+# benchmarks/ isn't a package; load memory.py without putting it on sys.path.
+spec = importlib.util.spec_from_file_location(
+    "xdis_benchmarks_memory", osp.join(get_srcdir(), "..", "benchmarks", "memory.py")
+)
+memory = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(memory)
+
+with open(memory.BUDGETS_PATH) as fp:
+    BUDGETS = json.load(fp)
+
+# The budgets themselves are only 1% above what was measured. Here, just
+# catch growth that is well beyond run-to-run variation.
+TOLERANCE = 0.1
+
+
+@pytest.mark.skipif(
+    not hasattr(tracemalloc, "reset_peak")
+    or BUDGETS["python_version"] != memory.python_minor()
+    or BUDGETS["python_implementation"] != platform.python_implementation(),
+    reason="budgets were made with %s %s"
+    % (BUDGETS["python_implementation"], BUDGETS["python_version"]),
+)
+def test_memory_budgets() -> None:
+    results = memory.measure(["2.7", "3.8"], jobs=2, verbose=False)
+    assert set(results) == {"2.7", "3.8"}
+    assert memory.check_budgets(results, BUDGETS, TOLERANCE) == []
@@ -0,0 +1,260 @@
+"""
+Unit tests for xdis.unmarshal
+"""
+
+import gc
+import io
+import os.path as osp
+import struct
+import weakref
+
+import pytest
+from xdis.load import load_module, load_modules
+from xdis.magics import magic2int
+from xdis.unmarshal import (
+    CodeObjectRegistry,
+    StringInternPool,
+    UnmarshalLimitError,
+    UnmarshalLimits,
+    load_code,
+)
+
+# A 3.8 magic number. Any cross-version magic would do.
+MAGIC_INT_38 = magic2int(b"\x55\x0d\x0d\x0a")
+
+
+def get_srcdir() -> str:
+    filename = osp.normcase(osp.dirname(osp.abspath(__file__)))
+    return osp.realpath(filename)
+
+
+def test_declared_size_past_end_of_input() -> None:
+    # A tuple claiming 2**32 - 1 elements, and a string claiming 2**31 bytes.
+    for data in (
+        b"(" + struct.pack("<I", 0xFFFFFFFF),
+        b"s" + struct.pack("<I", 1 << 31),
+    ):
+        with pytest.raises(UnmarshalLimitError):
+            load_code(data + b"N" * 10, MAGIC_INT_38)
+
+
+def test_limits() -> None:
+    nested = b")\x01" * 50 + b"N"
+    assert load_code(nested, MAGIC_INT_38) is not None
+    with pytest.raises(UnmarshalLimitError):
+        load_code(nested, MAGIC_INT_38, limits=UnmarshalLimits(max_depth=20))
+
+    flat = b")\x05" + b"N" * 5
+    assert load_code(flat, MAGIC_INT_38, limits=UnmarshalLimits(max_objects=6)) == (
+        None,
+    ) * 5
+    with pytest.raises(UnmarshalLimitError):
+        load_code(flat, MAGIC_INT_38, limits=UnmarshalLimits(max_objects=5))
+    with pytest.raises(UnmarshalLimitError):
+        load_code(flat, MAGIC_INT_38, limits=UnmarshalLimits(max_container_length=4))
+
+    string = b"s" + struct.pack("<I", 100) + b"x" * 100
+    with pytest.raises(UnmarshalLimitError):
+        load_code(string, MAGIC_INT_38, limits=UnmarshalLimits(max_bytes=50))
+
+
+def test_load_module_limits() -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.8", "00_chained-compare.pyc"
+    )
+    co = load_module(pyc_path, limits=UnmarshalLimits(max_depth=50))[3]
+    assert co.co_code == load_module(pyc_path)[3].co_code
+    with pytest.raises(UnmarshalLimitError):
+        load_module(pyc_path, limits=UnmarshalLimits(max_objects=3))
+
+
+def test_load_module_truncated(tmp_path) -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.8", "00_chained-compare.pyc"
+    )
+    with open(pyc_path, "rb") as fp:
+        data = fp.read()
+    truncated_path = str(tmp_path / "truncated.pyc")
+    with open(truncated_path, "wb") as fp:
+        fp.write(data[:70])
+
+    # Without limits a truncated file is just ill-formed ...
+    with pytest.raises(ImportError):
+        load_module(truncated_path)
+    # ... but with them the caller gets the limit that was hit.
+    with pytest.raises(UnmarshalLimitError):
+        load_module(truncated_path, limits=UnmarshalLimits())
+
+
+def test_code_objects_registry_per_call() -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.8", "00_chained-compare.pyc"
+    )
+    with open(pyc_path, "rb") as fp:
+        data = fp.read()[16:]
+
+    # Nothing is shared between calls that don't supply a registry.
+    assert not any(isinstance(default, dict) for default in load_code.__defaults__)
+    registry = CodeObjectRegistry(max_size=5)
+    load_code(data, MAGIC_INT_38, code_objects=registry)
+    assert len(registry) == 1
+    for _ in range(20):
+        load_code(data, MAGIC_INT_38, code_objects=registry)
+    assert len(registry) == 5
+
+    # Code objects from calls without a registry aren't kept anywhere.
+    refs = [weakref.ref(load_code(data, MAGIC_INT_38)) for _ in range(300)]
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+
+def test_track_roundtrip_metadata() -> None:
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_3.4", "roundtrip_pyc", "01_extended_arg.pyc"
+    )
+    tracked = load_module(pyc_path, track_roundtrip_metadata=True)[3]
+    assert tracked.reference_objects
+
+    untracked = load_module(pyc_path)[3]
+    assert untracked.collection_order == {}
+    assert untracked.reference_objects == set()
+    assert untracked.co_code == tracked.co_code
+    assert untracked.co_consts == tracked.co_consts
+
+
+def test_string_intern_pool() -> None:
+    pyc_dir = osp.join(get_srcdir(), "..", "test", "bytecode_3.8")
+    paths = [
+        osp.join(pyc_dir, name)
+        for name in ("00_chained-compare.pyc", "01_assert2.pyc")
+    ]
+    pool = StringInternPool()
+    co1, co2 = [load_module(path, intern_pool=pool)[3] for path in paths]
+    assert co1.co_filename != co2.co_filename
+    assert pool.hits > 0 and pool.stats()["bytes_saved"] > 0
+
+    # "<module>" is read separately from each file, but stored once.
+    assert co1.co_name == co2.co_name == "<module>"
+    assert co1.co_name is co2.co_name
+    assert co1.co_code == load_module(paths[0])[3].co_code
+
+    with pytest.raises(ValueError):
+        list(load_modules(paths, workers=2, intern_pool=pool))
+
+
+def test_dispatch_table() -> None:
+    from xdis.magics import GRAAL3_MAGICS
+    from xdis.unmarsh_graal import VersionIndependentUnmarshallerGraal
+
+    # "i" with and without FLAG_REF.
+    assert load_code(b"i\x05\x00\x00\x00", MAGIC_INT_38) == 5
+    assert load_code(b"\xe9\x05\x00\x00\x00", MAGIC_INT_38) == 5
+
+    um = VersionIndependentUnmarshallerGraal(
+        io.BytesIO(b""), sorted(GRAAL3_MAGICS)[0], False
+    )
+    assert len(um.dispatch) == 256
+    assert um.dispatch[ord("C")] == (um.t_code_graal, False)
+    assert um.dispatch[ord("C") | 0x80] == (um.t_code_graal, True)
+    assert um.dispatch[ord("~")] == (None, False)
+
+
+def test_graal_arrays() -> None:
+    from xdis.magics import GRAAL3_MAGICS
+    from xdis.unmarsh_graal import VersionIndependentUnmarshallerGraal
+
+    def read_array(data: bytes):
+        um = VersionIndependentUnmarshallerGraal(
+            io.BytesIO(data), sorted(GRAAL3_MAGICS)[0], False
+        )
+        return um.t_graal_readArray(save_ref=False, bytes_for_s=False)
+
+    assert read_array(b"i" + struct.pack("<I3i", 3, 1, -2, 3)) == (1, -2, 3)
+    assert read_array(b"d" + struct.pack("<I2d", 2, 0.5, -1.0)) == (0.5, -1.0)
+    assert read_array(b"l" + struct.pack("<i2q", 2, 1 << 40, -1)) == (1 << 40, -1)
+    assert read_array(b"B" + struct.pack("<I", 3) + b"\x01\x00\x02") == (
+        True,
+        False,
+        True,
+    )
+    with pytest.raises(UnmarshalLimitError):
+        read_array(b"i" + struct.pack("<I3i", 3, 1, -2, 3)[:-1])
+
+
+def test_rust_locations() -> None:
+    from xdis.codetype.code313rust import SourceLocation, SourceLocations
+
+    pyc_path = osp.join(
+        get_srcdir(),
+        "..",
+        "test",
+        "bytecode_rust-40-313",
+        "00_chained-compare.rustpython-313.pyc",
+    )
+    co = load_module(pyc_path)[3]
+    locations = co.locations
+    assert isinstance(locations, SourceLocations)
+    assert len(locations) == len(co.co_code) // 2
+    first = locations[0]
+    assert isinstance(first, SourceLocation)
+    assert first.line_number == locations.line_numbers[0]
+    assert first.column_offset == locations.column_offsets[0] + 1
+    assert locations == tuple(locations)
+    assert locations[1:3] == (locations[1], locations[2])
+
+
+def test_large_tuples() -> None:
+    # A tuple too big for TYPE_SMALL_TUPLE, marked with FLAG_REF and then
+    # referred back to.
+    big = tuple(range(300))
+    data = (
+        b")\x02"
+        + bytes((ord("(") | 0x80,))
+        + struct.pack("<I", len(big))
+        + b"".join(b"i" + struct.pack("<i", i) for i in big)
+        + b"r"
+        + struct.pack("<I", 0)
+    )
+    assert load_code(data, MAGIC_INT_38) == (big, big)
+
+
+def test_self_referencing_tuple() -> None:
+    # A tuple whose first item refers to the tuple itself. That reference
+    # can only get the placeholder saved while the tuple is read, but the
+    # items after it, and later references to the tuple, must still be
+    # numbered right.
+    data = (
+        b")\x03"
+        + bytes((ord("(") | 0x80,))
+        + struct.pack("<I", 2)
+        + b"r"
+        + struct.pack("<I", 0)
+        + bytes((ord("z") | 0x80, 1))
+        + b"a"
+        + b"r"
+        + struct.pack("<I", 0)
+        + b"r"
+        + struct.pack("<I", 1)
+    )
+    inner, again, a = load_code(data, MAGIC_INT_38)
+    assert inner[1] == "a" and a == "a"
+    assert again is inner
+
+
+def test_reference_zero() -> None:
+    # PyPy refers to the first object it saved as reference 0.
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_pypy39", "00_import.pypy39.pyc"
+    )
+    co = load_module(pyc_path)[3]
+    assert co.co_names[:3] == ("sys", "os", "path")
+
+    # Graal numbers its references differently; reference 0 here is
+    # the string "return".
+    pyc_path = osp.join(
+        get_srcdir(), "..", "test", "bytecode_graal312", "05_nonlocal.graalpy312.pyc"
+    )
+    co = load_module(pyc_path)[3]
+    not_bug = co.co_consts[1]
+    assert not_bug.co_name == "not_bug"
+    assert not_bug.co_consts[1] == "return"
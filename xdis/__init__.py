@@ -77,9 +77,11 @@ from xdis.load import (
     is_bytecode_extension,
     is_pypy,
     is_python_source,
+    load_archive_modules,
     load_file,
     load_module,
     load_module_from_file_object,
+    load_modules,
     write_bytecode_file,
 )
 from xdis.magics import (
@@ -214,9 +216,11 @@ __all__ = [
     "is_bytecode_extension",
     "is_pypy",
     "is_python_source",
+    "load_archive_modules",
     "load_file",
     "load_module",
     "load_module_from_file_object",
+    "load_modules",
     "write_bytecode_file",
     # lineoffsets
     "LineOffsetInfo",
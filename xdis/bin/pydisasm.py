@@ -9,10 +9,18 @@
 import os
 import os.path as osp
 import sys
+import zipfile
 
 import click
 
 from xdis import disassemble_file
+from xdis.cache import CodeCache
+from xdis.instrument import Profiler
+from xdis.load import (
+    ARCHIVE_MEMBER_SEP,
+    is_bytecode_extension,
+    split_archive_path,
+)
 from xdis.version import __version__
 from xdis.version_info import PYTHON_VERSION_STR, PYTHON_VERSION_TRIPLE
 
@@ -24,12 +32,41 @@ PATTERNS = ("*.pyc", "*.pyo")
 case_sensitive = {"case_sensitive": False}
 
 
+def expand_archives(paths):
+    """
+    Replace any zip archive (wheel, egg, zipapp, ...) in ``paths`` with
+    the "archive!/member" names of the bytecode files inside it.
+    """
+    for path in paths:
+        if (
+            osp.isfile(path)
+            and not is_bytecode_extension(path)
+            and not path.endswith(".py")
+            and zipfile.is_zipfile(path)
+        ):
+            with zipfile.ZipFile(path) as zf:
+                for member in zf.namelist():
+                    if is_bytecode_extension(member):
+                        yield path + ARCHIVE_MEMBER_SEP + member
+        else:
+            yield path
+
+
 @click.command(context_settings={"help_option_names": ["--help", "-help", "-h"]})
 @click.option(
     "--format",
     "-F",
     type=click.Choice(
-        ["xasm", "bytes", "classic", "dis", "extended", "extended-bytes", "header"],
+        [
+            "xasm",
+            "bytes",
+            "classic",
+            "dis",
+            "extended",
+            "extended-bytes",
+            "header",
+            "jsonl",
+        ],
         **case_sensitive
     ),
     help="Select disassembly style.",
@@ -56,15 +93,43 @@ case_sensitive = {"case_sensitive": False}
     "-x",
     help="Show bytecode file hex addresses for the start of each code object.",
 )
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help=(
+        "Reuse bytecode files parsed in earlier runs, stored under "
+        "$XDG_CACHE_HOME/xdis. --no-cache always parses the files."
+    ),
+)
+@click.option(
+    "--stats/--no-stats",
+    default=False,
+    help=(
+        "After disassembling, write to stderr the time and memory allocated "
+        "in each phase and code object. Tracing allocations slows things down."
+    ),
+)
 @click.version_option(version=__version__)
 @click.argument("files", nargs=-1, type=click.Path(readable=True), required=True)
-def main(format: str, method: tuple, show_source: bool, show_file_offsets, files):
+def main(
+    format: str,
+    method: tuple,
+    show_source: bool,
+    show_file_offsets,
+    cache: bool,
+    stats: bool,
+    files,
+):
     """Disassembles a Python bytecode file.
 
     We handle bytecode for virtually every release of Python and some releases of PyPy.
     The version of Python in the bytecode doesn't have to be the same version as
     the Python interpreter used to run this program. For example, you can disassemble Python 3.6.9
     bytecode from Python 2.7.15 and vice versa.
+
+    FILES can also be zip archives such as wheels, eggs or zipapps, in
+    which case all bytecode files in them are disassembled, or a single
+    member of one given as ARCHIVE!/MEMBER.
     """
     if not ((2, 7) <= PYTHON_VERSION_TRIPLE < (3, 16)):
         mess = "This code works on 3.6 to 3.15; you have %s."
@@ -77,10 +142,20 @@ def main(format: str, method: tuple, show_source: bool, show_file_offsets, files
         sys.stderr.write(mess % (PYTHON_VERSION_STR, PYTHON_VERSION_STR))
         sys.exit(2)
 
+    code_cache = CodeCache() if cache else None
+
+    profiler = None
+    if stats:
+        profiler = Profiler(trace_allocations=True)
+        profiler.start()
+
     rc = 0
-    for path in files:
+    for path in expand_archives(files):
         # Some sanity checks
-        if not osp.exists(path):
+        if split_archive_path(path) is not None:
+            # A member of a zip archive. load_module() checks it.
+            pass
+        elif not osp.exists(path):
             sys.stderr.write("File name: '%s' doesn't exist\n" % path)
             continue
         elif not osp.isfile(path):
@@ -101,10 +176,16 @@ def main(format: str, method: tuple, show_source: bool, show_file_offsets, files
                 show_source=show_source,
                 methods=method,
                 save_file_offsets=show_file_offsets,
+                cache=code_cache,
             )
         except (ImportError, NotImplementedError, ValueError) as e:
             print(e)
             rc = 3
+
+    if profiler is not None:
+        profiler.stop()
+        sys.stdout.flush()
+        profiler.report(sys.stderr)
     sys.exit(rc)
 
 
@@ -29,6 +29,7 @@ from linecache import getline
 from types import CodeType
 from typing import Iterable, Iterator, Optional, Tuple
 
+import xdis.instrument
 from xdis.cross_dis import (
     format_code_info,
     get_code_object,
@@ -713,7 +714,17 @@ class Bytecode:
         else:
             get_instructions_fn = get_instructions_bytes
 
-        for instr in get_instructions_fn(code_object, self.opc):
+        decoded = get_instructions_fn(code_object, self.opc)
+        profiler = xdis.instrument.profiler
+        if profiler is not None:
+            # Decode everything up front so that decoding and formatting
+            # are timed separately.
+            with profiler.span("decode", code_object):
+                decoded = list(decoded)
+            profiler.count("instructions", len(decoded))
+            format_span = profiler.begin("format")
+
+        for instr in decoded:
             # Python 1.x into early 2.0 uses SET_LINENO
             if last_was_set_lineno:
                 instr = Instruction(
@@ -830,6 +841,8 @@ class Bytecode:
                     "# Warning: subsequent LOAD_FAST and STORE_FAST after RESERVE_FAST are inaccurate here in Python before 1.5\n"
                 )
             pass
+        if profiler is not None:
+            profiler.end(format_span, code_object)
         return instructions
 
     def get_instructions(self, x):
@@ -307,7 +307,7 @@ class Bytecode_Graal(Bytecode):
     def __iter__(self):
         co = self.codeobj
         return get_instructions_bytes_graal(
-            co.co_code,
+            co,
             self.opc,
         )
 
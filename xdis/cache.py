@@ -0,0 +1,223 @@
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+An on-disk cache of parsed bytecode files.
+
+Unmarshalling bytecode from a Python version other than the one running
+is done in pure Python and is slow for large files. When the same
+bytecode files are loaded over and over, for example disassembling the
+same third-party packages on every CI run, CodeCache keeps the result
+of :func:`xdis.load.load_module` on disk keyed by a hash of the file
+contents, so the next load skips unmarshalling altogether.
+
+Entries are pickled, and the cache directory is kept under a size limit
+by removing the least-recently used entries.
+"""
+
+import hashlib
+import os
+import os.path as osp
+import pickle
+import tempfile
+import types
+from typing import Optional
+
+from xdis.version import __version__
+from xdis.version_info import PYTHON_VERSION_TRIPLE
+
+CACHE_SUFFIX = ".xdis-cache"
+
+# 256 MiB
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    """
+    Return the directory used for the cache when none is given:
+    $XDIS_CACHE_DIR if set, otherwise "xdis" under $XDG_CACHE_HOME
+    or ~/.cache.
+    """
+    cache_dir = os.environ.get("XDIS_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    cache_home = os.environ.get("XDG_CACHE_HOME") or osp.join(
+        osp.expanduser("~"), ".cache"
+    )
+    return osp.join(cache_home, "xdis")
+
+
+class CodeCache:
+    """
+    Persistent cache of load_module() results.
+
+    ``cache_dir`` is created on first write. ``max_size`` is the number
+    of bytes the entries in ``cache_dir`` may use before the least-recently
+    used ones are removed.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self.max_size = max_size
+        # Bytes used by entries, found by scanning cache_dir on the first
+        # write and then updated as entries are added, so that writing
+        # doesn't rescan the directory each time.
+        self._size: Optional[int] = None
+
+    def key(
+        self,
+        data: bytes,
+        save_file_offsets: bool = False,
+        track_roundtrip_metadata: bool = False,
+        fast_load: bool = False,
+    ) -> str:
+        """
+        Return the cache key for a bytecode file whose contents are ``data``.
+
+        Besides the contents, the key includes the xdis version, since that
+        determines the portable code classes that get pickled, and the
+        running Python version, which determines when native code objects
+        are returned instead. The load_module() options that change the
+        result are included too.
+        """
+        h = hashlib.sha256(data)
+        h.update(
+            (
+                "\0%s\0%s\0%d\0%d\0%d"
+                % (
+                    __version__,
+                    PYTHON_VERSION_TRIPLE[:2],
+                    save_file_offsets,
+                    track_roundtrip_metadata,
+                    fast_load,
+                )
+            ).encode("ascii")
+        )
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        return osp.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        Return the load_module() tuple stored under ``key``, or None if
+        there is no usable entry.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fp:
+                result = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A damaged or stale entry; it will be rewritten.
+            self._remove(path)
+            return None
+
+        # Record the use for LRU eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: tuple) -> bool:
+        """
+        Store the load_module() tuple ``result`` under ``key``.
+
+        Native code objects can't be pickled, and are fast to load anyway,
+        so results holding one are not stored. Return True if an entry was
+        written.
+        """
+        co = result[3]
+        if co is None or isinstance(co, types.CodeType):
+            return False
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file and rename it so that concurrent
+            # readers never see a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    fp.write(data)
+                os.replace(tmp_path, self.path(key))
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError:
+            return False
+
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += len(data)
+            if self._size > self.max_size:
+                self.evict()
+        return True
+
+    def evict(self) -> None:
+        """
+        Remove least-recently used entries until the cache fits in max_size.
+        """
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(CACHE_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except OSError:
+            return
+
+        if total > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                self._remove(path)
+                total -= size
+        self._size = total
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(CACHE_SUFFIX):
+                self._remove(osp.join(self.cache_dir, name))
+        self._size = 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
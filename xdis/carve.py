@@ -0,0 +1,221 @@
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Find Python bytecode files embedded in arbitrary binary data, such as
+executables, installer bundles or memory dumps.
+
+Every magic number xdis knows ends in one of two 2-byte suffixes, b"\\r\\n"
+or b"\\x99\\x00". The data is memory-mapped and scanned for those suffixes
+with mmap.find(), which runs at memory speed. Only where the two bytes
+before a suffix complete a known magic number is a bytecode file header
+assumed, and then confirmed by unmarshalling a code object after it.
+"""
+
+import contextlib
+import io
+import mmap
+from collections import namedtuple
+from typing import Iterator, Optional
+
+from xdis.codetype.base import iscode
+from xdis.magics import (
+    GRAAL3_MAGICS,
+    INTERIM_MAGIC_INTS,
+    PYPY3_MAGICS,
+    by_magic,
+    magic2int,
+    magic_int2tuple,
+    magicint2version,
+)
+from xdis.unmarshal import load_code
+
+# What carve() reports for each bytecode file found. ``offset`` is where
+# its magic number starts, ``version`` is the Python version string for
+# the magic number, and ``size`` is the number of bytes in the header and
+# the marshaled code object.
+CarvedBytecode = namedtuple("CarvedBytecode", "offset version size magic_int")
+
+# Unmarshalling a candidate stops when it would read past this many bytes.
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Type codes a marshaled code object can start with: "c", "c" with
+# FLAG_REF, and the 1.x "C".
+CODE_TYPE_BYTES = frozenset(b"c\xe3C")
+
+
+def _known_magics() -> dict:
+    """
+    Return a dictionary from each loadable magic number byte string to
+    its magic int.
+    """
+    magics = {}
+    for magic in by_magic:
+        magic_int = magic2int(magic)
+        if magic_int in INTERIM_MAGIC_INTS or magic_int not in magicint2version:
+            continue
+        try:
+            magic_int2tuple(magic_int)
+        except Exception:
+            continue
+        magics[magic] = magic_int
+    return magics
+
+
+def header_size(magic_int: int) -> int:
+    """
+    Return the size of the bytecode file header, magic number included,
+    that precedes the marshaled code object for ``magic_int``. This
+    follows what load_module_from_file_object() reads.
+    """
+    version = magic_int2tuple(magic_int)
+    if magic_int == 3439 or version >= (3, 7):
+        # Magic, PEP 552 flags, and either a SipHash or timestamp and size.
+        return 16
+    if (3200 <= magic_int < 20121 and version >= (1, 5)) or magic_int in list(
+        PYPY3_MAGICS
+    ) + [2657]:
+        # Magic, timestamp, source size.
+        return 12
+    # Magic, timestamp.
+    return 8
+
+
+class _BoundedReader:
+    """
+    Read-only file object over ``buf[start:start + limit]`` that doesn't
+    copy the data.
+    """
+
+    def __init__(self, buf, start: int, limit: int) -> None:
+        self.buf = buf
+        self.start = start
+        self.pos = start
+        self.end = min(len(buf), start + limit)
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0 or self.pos + n > self.end:
+            n = self.end - self.pos
+        data = self.buf[self.pos : self.pos + n]
+        self.pos += n
+        return data
+
+    def tell(self) -> int:
+        return self.pos - self.start
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self.tell()
+        elif whence == 2:
+            offset += self.end - self.start
+        self.pos = self.start + max(0, min(offset, self.end - self.start))
+        return self.tell()
+
+
+def _check_candidate(
+    buf, offset: int, magic_int: int, max_size: int
+) -> Optional[int]:
+    """
+    Return the total size of the bytecode file starting at ``offset``, or
+    None if there isn't a loadable code object there.
+    """
+    if magic_int == 3531:
+        # As in load_module_from_file_object(): RustPython 3.13 reuses
+        # CPython 3.12's magic number but writes "c" without FLAG_REF.
+        if offset + 0x10 < len(buf) and buf[offset + 0x10] == ord("c"):
+            magic_int = 35310
+
+    code_start = offset + header_size(magic_int)
+    if code_start >= len(buf):
+        return None
+    if magic_int not in GRAAL3_MAGICS and buf[code_start] not in CODE_TYPE_BYTES:
+        return None
+
+    fp = _BoundedReader(buf, code_start, max_size)
+    try:
+        # Garbage often has type codes the unmarshaller complains about
+        # on stderr before failing.
+        with contextlib.redirect_stderr(io.StringIO()):
+            co = load_code(fp, magic_int)
+    except Exception:
+        return None
+    if not iscode(co):
+        return None
+    return code_start - offset + fp.tell()
+
+
+def carve_buffer(
+    buf, max_size: int = DEFAULT_MAX_SIZE, base_offset: int = 0
+) -> Iterator[CarvedBytecode]:
+    """
+    Like carve(), but scan ``buf``, which can be bytes or a mmap.
+    ``base_offset`` is added to the offsets reported.
+    """
+    magics = _known_magics()
+    suffixes = sorted({magic[2:] for magic in magics})
+
+    # Next position of each magic suffix; the scan advances whichever
+    # is lowest, so candidates come out in file order.
+    positions = [buf.find(suffix, 2) for suffix in suffixes]
+    while True:
+        live = [(pos, i) for i, pos in enumerate(positions) if pos >= 0]
+        if not live:
+            return
+        pos, i = min(live)
+        offset = pos - 2
+        resume = pos + 1
+
+        magic_int = magics.get(bytes(buf[offset : pos + 2]))
+        if magic_int is not None:
+            size = _check_candidate(buf, offset, magic_int, max_size)
+            if size is not None:
+                yield CarvedBytecode(
+                    base_offset + offset, magicint2version[magic_int], size, magic_int
+                )
+                # Don't look for magic numbers inside what we just found.
+                resume = offset + size
+                positions = [
+                    p if p >= resume else buf.find(suffix, max(resume, 2))
+                    for p, suffix in zip(positions, suffixes)
+                ]
+                continue
+        positions[i] = buf.find(suffixes[i], resume)
+
+
+def carve(path: str, max_size: int = DEFAULT_MAX_SIZE) -> Iterator[CarvedBytecode]:
+    """
+    Scan the file ``path`` for embedded Python bytecode files, yielding a
+    CarvedBytecode record for each one found, in file order.
+
+    ``max_size`` bounds how much data after a candidate header is read
+    when checking it, and so the size of bytecode files that can be found.
+    """
+    with open(path, "rb") as fp:
+        try:
+            buf = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            return
+        with buf:
+            yield from carve_buffer(buf, max_size)
+
+
+if __name__ == "__main__":
+    import sys
+
+    for path in sys.argv[1:]:
+        for found in carve(path):
+            print(f"{path}: 0x{found.offset:x} {found.version} {found.size} bytes")
@@ -33,6 +33,12 @@ from xdis.version_info import IS_GRAAL, IS_PYPY, PYTHON_VERSION_TRIPLE
 
 __docformat__ = "restructuredtext"
 
+# Native code objects of the running interpreter keep their line-number
+# table in the same field, so there is no need to probe each one.
+NATIVE_LINE_TABLE_FIELD = (
+    "co_lnotab" if PYTHON_VERSION_TRIPLE < (3, 11) else "co_linetable"
+)
+
 
 def codeType2Portable(code, version_triple=PYTHON_VERSION_TRIPLE, is_graal: bool=False, other_fields: dict={}):
     """Converts a native types.CodeType code object into a
@@ -44,12 +50,7 @@ def codeType2Portable(code, version_triple=PYTHON_VERSION_TRIPLE, is_graal: bool
         raise TypeError(
             f"parameter expected to be a types.CodeType type; is {type(code)} instead"
         )
-    line_table_field = (
-        "co_lnotab"
-        if PYTHON_VERSION_TRIPLE < (3, 11) and hasattr(code, "co_lnotab")
-        else "co_linetable"
-    )
-    line_table = getattr(code, line_table_field)
+    line_table = getattr(code, NATIVE_LINE_TABLE_FIELD)
     if version_triple >= (3, 0):
         if version_triple < (3, 8):
             return Code3(
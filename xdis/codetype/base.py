@@ -15,7 +15,9 @@
 #  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
 import inspect
-from typing import Union
+import types
+from copy import copy
+from typing import Callable, Optional, Union
 
 
 def iscode(obj):
@@ -38,7 +40,28 @@ def code_has_star_star_arg(code):
     return (code.co_flags & 8) != 0
 
 
+class CodeMetadata:
+    """
+    Information about a portable code object that is not part of
+    the code object itself and that most code objects don't need.
+
+    Keeping this out of line, and only allocating it when there is
+    something to store, keeps portable code objects small.
+    """
+
+    __slots__ = ("collection_order", "reference_objects")
+
+    def __init__(self, collection_order: dict, reference_objects: set) -> None:
+        self.collection_order = collection_order
+        self.reference_objects = reference_objects
+
+
 class CodeBase:
+    # Subclasses list their fields in __slots__ so that instances
+    # don't carry around a per-instance __dict__. There can be
+    # a great many code objects loaded at once.
+    __slots__ = ()
+
     # These mimic some of the attributes in a Python code type
     co_argcount: int
     co_code: Union[bytes, str]
@@ -72,3 +95,48 @@ class CodeBase:
             msg += f", line {self.co_firstlineno}"
 
         return msg
+
+    def _to_native_memo(
+        self, memo: Optional[dict], build: Callable[..., types.CodeType]
+    ) -> types.CodeType:
+        """
+        The part of to_native() common to all code types. ``build`` is
+        given a frozen and checked copy of this code object, and its
+        co_consts converted by native_consts(), and returns the
+        types.CodeType. ``memo`` is as in native_consts().
+        """
+        if memo is None:
+            memo = {}
+        elif id(self) in memo:
+            return memo[id(self)]
+
+        code = copy(self)
+        code.freeze()
+        try:
+            code.check()
+        except AssertionError as e:
+            raise TypeError(e)
+
+        native = build(code, code.native_consts(memo))
+        memo[id(self)] = native
+        return native
+
+    def native_consts(self, memo: Optional[dict] = None) -> tuple:
+        """
+        Return co_consts as a tuple suitable for types.CodeType(),
+        with any nested portable code objects converted to native
+        code objects.
+
+        ``memo`` maps id() of a portable code object to its native
+        conversion, so that a code object reachable more than once
+        is converted only once.
+        """
+        consts = self.co_consts
+        if not any(isinstance(const, CodeBase) for const in consts):
+            return tuple(consts)
+        if memo is None:
+            memo = {}
+        return tuple(
+            const.to_native(memo=memo) if isinstance(const, CodeBase) else const
+            for const in consts
+        )
@@ -46,6 +46,22 @@ class Code13(CodeBase):
 
     """
 
+    __slots__ = (
+        "co_argcount",
+        "co_nlocals",
+        "co_flags",
+        "co_code",
+        "co_consts",
+        "co_names",
+        "co_varnames",
+        "co_filename",
+        "co_name",
+        "version_triple",
+        "__weakref__",
+    )
+
+    fieldtypes = Code13FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -68,7 +84,6 @@ class Code13(CodeBase):
         self.co_varnames = co_varnames
         self.co_filename = co_filename
         self.co_name = co_name
-        self.fieldtypes = Code13FieldTypes
         self.version_triple = version_triple
         if type(self) is Code13:
             self.check()
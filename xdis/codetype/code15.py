@@ -41,6 +41,10 @@ class Code15(Code13):
     can be stored as a simple list of offset, line_number tuples.
     """
 
+    __slots__ = ("co_stacksize", "co_firstlineno", "co_lnotab", "frozen")
+
+    fieldtypes = Code15FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -74,7 +78,6 @@ class Code15(Code13):
         self.co_lnotab = co_lnotab
         # This messes up decompilers somehow.
         # self.decode_lineno_tab()
-        self.fieldtypes = Code15FieldTypes
         if type(self) is Code15:
             self.check()
         return
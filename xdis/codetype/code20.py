@@ -17,8 +17,9 @@
 import types
 from copy import deepcopy
 from types import CodeType
-from typing import Any, Dict, Set, Tuple, Union
+from typing import Any, Dict, Optional, Set, Tuple, Union
 
+from xdis.codetype.base import CodeMetadata
 from xdis.codetype.code15 import Code15, Code15FieldTypes
 from xdis.version_info import PYTHON_VERSION_TRIPLE, version_tuple_to_str
 
@@ -54,6 +55,10 @@ class Code2(Code15):
     can be stored as a simple list of offset, line_number tuples.
     """
 
+    __slots__ = ("co_freevars", "co_cellvars", "_metadata")
+
+    fieldtypes = Code2FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -93,54 +98,92 @@ class Code2(Code15):
         )
         self.co_freevars = co_freevars
         self.co_cellvars = co_cellvars
-        self.fieldtypes = Code2FieldTypes
-
-        # The following fields are mostly useful in marshaling a code object.
-        # Keeping marshal order exactly the same is useful in round-trip marshal
-        # testing; but it may also have other benefits.
-
-        # By saving the order in sets, frozensets, and dictionary keys,
-        # these collections can be written in the same order that appeared
-        # in unmarshalling (if that's how the code object was created).
-        self.collection_order = collection_order
-
-        # Keeping track of which objects were referenced, allows
-        self.reference_objects = reference_objects
+        self.set_metadata(collection_order, reference_objects)
 
         if type(self) is Code2:
             self.check()
         return
 
-    def to_native(self, opts={}) -> CodeType:
+    # The following fields are mostly useful in marshaling a code object.
+    # Keeping marshal order exactly the same is useful in round-trip marshal
+    # testing; but it may also have other benefits.
+    #
+    # By saving the order in sets, frozensets, and dictionary keys,
+    # these collections can be written in the same order that appeared
+    # in unmarshalling (if that's how the code object was created).
+    #
+    # Keeping track of which objects were referenced, allows
+    # references to be written back out the same way.
+    #
+    # Since most code objects have neither, these are stored in a
+    # separate CodeMetadata object which is allocated only when needed:
+    # when there is something to store, or when one of the collections
+    # is read, since the caller may then add to it in place.
+
+    def set_metadata(
+        self,
+        collection_order: Dict[Union[set, frozenset, dict], Tuple[Any]],
+        reference_objects: Set[Any],
+    ) -> None:
+        if collection_order or reference_objects:
+            self._metadata = CodeMetadata(collection_order, reference_objects)
+        else:
+            self._metadata = None
+
+    def get_metadata(self) -> CodeMetadata:
+        metadata = self._metadata
+        if metadata is None:
+            metadata = self._metadata = CodeMetadata({}, set())
+        return metadata
+
+    @property
+    def collection_order(self) -> Dict[Union[set, frozenset, dict], Tuple[Any]]:
+        return self.get_metadata().collection_order
+
+    @collection_order.setter
+    def collection_order(self, collection_order) -> None:
+        metadata = self._metadata
+        self.set_metadata(
+            collection_order, set() if metadata is None else metadata.reference_objects
+        )
+
+    @property
+    def reference_objects(self) -> Set[Any]:
+        return self.get_metadata().reference_objects
+
+    @reference_objects.setter
+    def reference_objects(self, reference_objects) -> None:
+        metadata = self._metadata
+        self.set_metadata(
+            {} if metadata is None else metadata.collection_order, reference_objects
+        )
+
+    def to_native(self, opts={}, memo: Optional[dict] = None) -> CodeType:
         if not (2, 0) <= PYTHON_VERSION_TRIPLE < (2, 8):
             raise TypeError(
                 "Python Interpreter needs to be in range 2.0..2.7; is %s"
                 % version_tuple_to_str()
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
-
-        return types.CodeType(
-            code.co_argcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_lnotab,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_lnotab,
+                code.co_freevars,
+                code.co_cellvars,
+            )
+
+        return self._to_native_memo(memo, build)
 
 
 class Code2Compat(Code2):
@@ -150,6 +193,8 @@ class Code2Compat(Code2):
     Call to_native() when done.
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         co_argcount: int=0,
@@ -181,6 +226,7 @@ class Code2Compat(Code2):
         self.co_lnotab = co_lnotab
         self.co_freevars = co_freevars
         self.co_cellvars = co_cellvars
+        self._metadata = None
 
     def __repr__(self) -> str:
         return '<code2 object %s at 0x%0x, file "%s", line %d>' % (
@@ -17,7 +17,7 @@
 import types
 from copy import deepcopy
 from types import CodeType
-from typing import Any, Dict, Set, Tuple, Union
+from typing import Any, Dict, Optional, Set, Tuple, Union
 
 from xdis.codetype.code20 import Code2, Code2FieldTypes
 from xdis.version_info import PYTHON_VERSION_TRIPLE, version_tuple_to_str
@@ -44,6 +44,10 @@ class Code3(Code2):
 
     """
 
+    __slots__ = ("co_kwonlyargcount",)
+
+    fieldtypes = Code3FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -87,7 +91,6 @@ class Code3(Code2):
             version_triple=version_triple,
         )
         self.co_kwonlyargcount = co_kwonlyargcount
-        self.fieldtypes = Code3FieldTypes
 
         if type(self) is Code3:
             self.check()
@@ -141,34 +144,30 @@ class Code3(Code2):
 
         return self
 
-    def to_native(self) -> CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> CodeType:
         if not (3, 0) <= PYTHON_VERSION_TRIPLE < (3, 8):
             raise TypeError(
                 "Python Interpreter needs to be in range 3.0..3.7; is %s"
                 % version_tuple_to_str()
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
-
-        return types.CodeType(
-            code.co_argcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_lnotab,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_lnotab,
+                code.co_freevars,
+                code.co_cellvars,
+            )
+
+        return self._to_native_memo(memo, build)
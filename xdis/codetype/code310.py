@@ -16,8 +16,7 @@
 
 import struct
 import types
-from copy import deepcopy
-from typing import Any, Dict, Set, Tuple, Union
+from typing import Any, Dict, Optional, Set, Tuple, Union
 
 from xdis.codetype.code38 import Code38
 from xdis.cross_types import UnicodeForPython3
@@ -79,6 +78,10 @@ class Code310(Code38):
 
     """
 
+    __slots__ = ("co_linetable",)
+
+    fieldtypes = Code310FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -119,14 +122,11 @@ class Code310(Code38):
         self.co_posonlyargcount = co_posonlyargcount
         self.co_stacksize = co_stacksize
         self.co_varnames = co_varnames
-        self.fieldtypes = Code310FieldTypes
-        self.collection_order = collection_order
-        self.reference_objects: Set = reference_objects
         self.version_triple = version_triple
 
         # It is helpful to save the order in sets, frozensets and dictionary keys,
         # so that on writing a bytecode file we can duplicate this order.
-        self.collection_order = collection_order
+        self.set_metadata(collection_order, reference_objects)
 
         if type(self) is Code310:
             self.check()
@@ -272,34 +272,30 @@ class Code310(Code38):
 
         return self
 
-    def to_native(self) -> types.CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> types.CodeType:
         if (3, 10) != PYTHON_VERSION_TRIPLE[:2] or IS_PYPY and PYTHON_VERSION_TRIPLE[:2] == (3, 11):
             raise TypeError(
                 f"Python Interpreter needs to be 3.10; is {version_tuple_to_str()}"
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
-
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_linetable,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_linetable,
+                code.co_freevars,
+                code.co_cellvars,
+            )
+
+        return self._to_native_memo(memo, build)
@@ -17,6 +17,7 @@
 import types
 from copy import deepcopy
 from types import CodeType
+from typing import Optional
 
 from xdis.codetype.code310 import Code310, Code310FieldTypes
 from xdis.version_info import PYTHON_VERSION_TRIPLE, version_tuple_to_str
@@ -74,6 +75,8 @@ class Code310Graal(Code310):
 
     """
 
+    fieldtypes = Code310GraalFieldTypes
+
     def __init__(
         self,
         co_argcount,
@@ -122,33 +125,28 @@ class Code310Graal(Code310):
         for field_name, value in other_fields.items():
             setattr(self, field_name, value)
 
-        self.fieldtypes = Code310GraalFieldTypes
         if type(self) is Code310Graal:
             self.check()
 
-    def to_native(self) -> CodeType:
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
+    def to_native(self, memo: Optional[dict] = None) -> CodeType:
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_linetable,
+                code.co_freevars,
+                code.co_cellvars,
+            )
 
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_linetable,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        return self._to_native_memo(memo, build)
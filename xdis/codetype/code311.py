@@ -391,6 +391,10 @@ class Code311(Code310):
     can be stored as a simple list of offset, line_number tuples.
     """
 
+    __slots__ = ("co_qualname", "co_exceptiontable")
+
+    fieldtypes = Code311FieldTypes
+
     def __init__(
         self,
         co_argcount,
@@ -438,44 +442,39 @@ class Code311(Code310):
         )
         self.co_qualname = co_qualname
         self.co_exceptiontable = co_exceptiontable
-        self.fieldtypes = Code311FieldTypes
         if type(self) is Code311:
             self.check()
 
-    def to_native(self) -> CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> CodeType:
         if not (PYTHON_VERSION_TRIPLE >= (3, 11)):
             raise TypeError(
                 "Python Interpreter needs to be in 3.11 or greater; is %s"
                 % version_tuple_to_str()
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
-
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_qualname,
-            code.co_firstlineno,
-            code.co_linetable,
-            code.co_exceptiontable,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_qualname,
+                code.co_firstlineno,
+                code.co_linetable,
+                code.co_exceptiontable,
+                code.co_freevars,
+                code.co_cellvars,
+            )
+
+        return self._to_native_memo(memo, build)
 
     def co_lines(self):
         return parse_linetable(self.co_linetable, self.co_firstlineno)
@@ -17,7 +17,7 @@
 import types
 from copy import deepcopy
 from types import CodeType
-from typing import Any, Dict, Set, Tuple
+from typing import Any, Dict, Optional, Set, Tuple
 
 from xdis.codetype.code311 import (
     Code311,
@@ -83,6 +83,8 @@ class Code311Graal(Code311):
     can be stored as a simple list of offset, line_number tuples.
     """
 
+    fieldtypes = Code311GraalFieldTypes
+
     def __init__(
         self,
         co_argcount,
@@ -137,46 +139,41 @@ class Code311Graal(Code311):
 
         self.co_qualname = co_qualname
         self.co_exceptiontable = co_exceptiontable
-        self.fieldtypes = Code311GraalFieldTypes
         if type(self) is Code311Graal:
             self.check()
 
-    def to_native(self) -> CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> CodeType:
         if not (PYTHON_VERSION_TRIPLE >= (3, 11)):
             raise TypeError(
                 "Python Interpreter needs to be in 3.11 or greater; is %s"
                 % version_tuple_to_str()
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
-
-        if code.co_exceptiontable is None:
-            code.co_exceptiontable = b""
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_qualname,
-            code.co_firstlineno,
-            code.co_linetable,
-            code.co_exceptiontable,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        def build(code, consts: tuple) -> types.CodeType:
+            if code.co_exceptiontable is None:
+                code.co_exceptiontable = b""
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_qualname,
+                code.co_firstlineno,
+                code.co_linetable,
+                code.co_exceptiontable,
+                code.co_freevars,
+                code.co_cellvars,
+            )
+
+        return self._to_native_memo(memo, build)
 
     def co_lines(self):
         return parse_linetable(self.co_linetable, self.co_firstlineno)
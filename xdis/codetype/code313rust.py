@@ -14,6 +14,8 @@
 #  along with this program; if not, write to the Free Software
 #  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
+from array import array
+from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any, Dict, Tuple, Union
 
@@ -28,6 +30,50 @@ class SourceLocation:
     column_offset: int
 
 
+class SourceLocations(Sequence):
+    """
+    The source location of each instruction of a RustPython code object,
+    stored as two columns of ints rather than as a SourceLocation object
+    per instruction. SourceLocation objects of type ``location_class``
+    are made as they are accessed.
+
+    ``column_offsets`` are zero-indexed, as stored in the bytecode file.
+    """
+
+    __slots__ = ("line_numbers", "column_offsets", "location_class")
+
+    def __init__(
+        self, line_numbers: array, column_offsets: array, location_class=SourceLocation
+    ) -> None:
+        self.line_numbers = line_numbers
+        self.column_offsets = column_offsets
+        self.location_class = location_class
+
+    def __len__(self) -> int:
+        return len(self.line_numbers)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return SourceLocations(
+                self.line_numbers[i], self.column_offsets[i], self.location_class
+            )
+        return self.location_class(
+            line_number=self.line_numbers[i],
+            column_offset=self.column_offsets[i] + 1,
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SourceLocations):
+            return (
+                self.line_numbers == other.line_numbers
+                and self.column_offsets == other.column_offsets
+            )
+        return isinstance(other, Sequence) and tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
 class Code313Rust(Code311):
     """Class for a RustPython 3.13 code object used when a Python
     interpreter is not RustPython 3.13 but working on RustPython 3.13 bytecode. It
@@ -16,7 +16,7 @@
 
 import types
 from copy import deepcopy
-from typing import Any, Dict, Set, Tuple, Union
+from typing import Any, Dict, Optional, Set, Tuple, Union
 
 from xdis.codetype.code30 import Code3, Code3FieldTypes
 from xdis.version_info import PYTHON_VERSION_TRIPLE, version_tuple_to_str
@@ -66,6 +66,10 @@ class Code38(Code3):
 
     """
 
+    __slots__ = ("co_posonlyargcount",)
+
+    fieldtypes = Code38FieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -111,39 +115,34 @@ class Code38(Code3):
             version_triple = version_triple,
         )
         self.co_posonlyargcount = co_posonlyargcount
-        self.fieldtypes = Code38FieldTypes
         if isinstance(self, Code38):
             self.check()
 
-    def to_native(self) -> types.CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> types.CodeType:
         if not (3, 8) <= PYTHON_VERSION_TRIPLE < (3, 10):
             raise TypeError(
                 "Python Interpreter needs to be in range 3.8..3.9; "
                 f"is {version_tuple_to_str()}"
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_lnotab,  # noqa
+                code.co_freevars,
+                code.co_cellvars,
+            )
 
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_lnotab,  # noqa
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        return self._to_native_memo(memo, build)
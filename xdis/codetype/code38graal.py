@@ -17,7 +17,7 @@
 import types
 from copy import deepcopy
 from types import CodeType
-from typing import Any, Dict, Set, Tuple
+from typing import Any, Dict, Optional, Set, Tuple
 
 from xdis.codetype.code38 import Code38, Code38FieldTypes
 from xdis.version_info import PYTHON_VERSION_TRIPLE, version_tuple_to_str
@@ -74,6 +74,8 @@ class Code38Graal(Code38):
     can be stored as a simple list of offset, line_number tuples.
     """
 
+    fieldtypes = Code38GraalFieldTypes
+
     def __init__(
         self,
         co_argcount: int,
@@ -122,39 +124,34 @@ class Code38Graal(Code38):
         for field_name, value in other_fields.items():
             setattr(self, field_name, value)
 
-        self.fieldtypes = Code38GraalFieldTypes
         if type(self) is Code38Graal:
             self.check()
 
-    def to_native(self) -> CodeType:
+    def to_native(self, memo: Optional[dict] = None) -> CodeType:
         if not (PYTHON_VERSION_TRIPLE >= (3, 11)):
             raise TypeError(
                 "Python Interpreter needs to be in 3.11 or greater; is %s"
                 % version_tuple_to_str()
             )
 
-        code = deepcopy(self)
-        code.freeze()
-        try:
-            code.check()
-        except AssertionError as e:
-            raise TypeError(e)
+        def build(code, consts: tuple) -> types.CodeType:
+            return types.CodeType(
+                code.co_argcount,
+                code.co_posonlyargcount,
+                code.co_kwonlyargcount,
+                code.co_nlocals,
+                code.co_stacksize,
+                code.co_flags,
+                code.co_code,
+                consts,
+                code.co_names,
+                code.co_varnames,
+                code.co_filename,
+                code.co_name,
+                code.co_firstlineno,
+                code.co_lnotab,
+                code.co_freevars,
+                code.co_cellvars,
+            )
 
-        return types.CodeType(
-            code.co_argcount,
-            code.co_posonlyargcount,
-            code.co_kwonlyargcount,
-            code.co_nlocals,
-            code.co_stacksize,
-            code.co_flags,
-            code.co_code,
-            code.co_consts,
-            code.co_names,
-            code.co_varnames,
-            code.co_filename,
-            code.co_name,
-            code.co_firstlineno,
-            code.co_lnotab,
-            code.co_freevars,
-            code.co_cellvars,
-        )
+        return self._to_native_memo(memo, build)
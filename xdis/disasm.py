@@ -24,6 +24,7 @@ CPython version-independent disassembly routines
 
 import datetime
 import dis
+import json
 import os
 import re
 import sys
@@ -32,8 +33,9 @@ from collections import deque
 from typing import Optional, Tuple
 
 import xdis
-from xdis.bytecode import Bytecode
-from xdis.bytecode_graal import Bytecode_Graal
+import xdis.instrument
+from xdis.bytecode import Bytecode, get_instructions_bytes, parse_exception_table
+from xdis.bytecode_graal import Bytecode_Graal, get_instructions_bytes_graal
 from xdis.codetype import codeType2Portable
 from xdis.codetype.base import iscode
 from xdis.cross_dis import format_code_info, format_exception_table
@@ -160,6 +162,25 @@ def disco(
 
     assert iscode(co)
 
+    # Store final output stream when there is an error.
+    real_out = out or sys.stdout
+
+    if asm_format == "jsonl":
+        disco_jsonl(
+            version_tuple,
+            co,
+            timestamp,
+            real_out,
+            magic_int,
+            source_size,
+            sip_hash,
+            alternate_opmap,
+            methods,
+            python_implementation,
+            file_offsets,
+        )
+        return
+
     show_module_header(
         version_tuple,
         co,
@@ -173,9 +194,6 @@ def disco(
         python_implementation=python_implementation,
     )
 
-    # Store final output stream when there is an error.
-    real_out = out or sys.stdout
-
     if co.co_filename and asm_format != "xasm":
         if not_filtered(co, methods):
             real_out.write(
@@ -189,7 +207,14 @@ def disco(
             )
         pass
 
-    opc = get_opcode(version_tuple, python_implementation, alternate_opmap, magic_int)
+    profiler = xdis.instrument.profiler
+    if profiler is None:
+        opc = get_opcode(version_tuple, python_implementation, alternate_opmap, magic_int)
+    else:
+        with profiler.span("opcode"):
+            opc = get_opcode(
+                version_tuple, python_implementation, alternate_opmap, magic_int
+            )
 
     if asm_format == "xasm":
         disco_loop_asm_format(opc, version_tuple, co, real_out, {}, set([]))
@@ -255,10 +280,16 @@ def disco_loop(
                     if asm_format in ("extended_bytes", "bytes"):
                         real_out.write("instruction bytecode:\n%s\n" % co.co_code)
 
+            profiler = xdis.instrument.profiler
+            if profiler is not None:
+                # Line number and exception tables are decoded here.
+                decode_span = profiler.begin("decode")
             if opc.python_implementation == PythonImplementation.Graal:
                 bytecode = Bytecode_Graal(co, opc)
             else:
                 bytecode = Bytecode(co, opc, dup_lines=dup_lines)
+            if profiler is not None:
+                profiler.end(decode_span, co)
             real_out.write(
                 bytecode.dis(
                     asm_format=asm_format,
@@ -279,6 +310,172 @@ def disco_loop(
         pass
 
 
+# Bumped when a field in the records disco_jsonl() writes changes meaning
+# or goes away. New fields may be added without changing it.
+JSONL_FORMAT_VERSION = 1
+
+
+def jsonl_repr(value) -> str:
+    """
+    repr() of ``value``, except that code objects are described by
+    their name, file and line rather than where they are in memory.
+    """
+    if iscode(value):
+        return "<code object %s, file %r, line %s>" % (
+            value.co_name,
+            value.co_filename,
+            getattr(value, "co_firstlineno", "?"),
+        )
+    return repr(value)
+
+
+def jsonl_records(
+    opc,
+    co,
+    methods=tuple(),
+    file_offsets: dict = {},
+):
+    """
+    Yield, as dictionaries, a record for each code object under ``co``
+    in the order disco_loop() shows them, each followed by records for
+    its instructions. Code objects are numbered from 0 in that order,
+    and each instruction record gives the number of its code object.
+
+    Instructions are decoded one at a time, so records can be written
+    out as they come.
+    """
+    if opc.python_implementation == PythonImplementation.Graal:
+        get_instructions = get_instructions_bytes_graal
+    else:
+        get_instructions = get_instructions_bytes
+    has_exception_table = opc.version_tuple >= (3, 11) and not opc.is_pypy
+
+    queue = deque([(co, None)])
+    code_id = 0
+    while queue:
+        co, parent = queue.popleft()
+        if not_filtered(co, methods):
+            if has_exception_table and hasattr(co, "co_exceptiontable"):
+                exception_entries = parse_exception_table(co.co_exceptiontable)
+            else:
+                exception_entries = []
+            yield {
+                "type": "code",
+                "id": code_id,
+                "parent": parent,
+                "name": co.co_name,
+                "qualname": getattr(co, "co_qualname", None),
+                "filename": co.co_filename,
+                "firstlineno": getattr(co, "co_firstlineno", None),
+                "argcount": getattr(co, "co_argcount", None),
+                "posonlyargcount": getattr(co, "co_posonlyargcount", None),
+                "kwonlyargcount": getattr(co, "co_kwonlyargcount", None),
+                "nlocals": getattr(co, "co_nlocals", None),
+                "stacksize": getattr(co, "co_stacksize", None),
+                "flags": getattr(co, "co_flags", None),
+                "file_offset": file_offsets.get(co),
+                # "end" is one past the last offset covered.
+                "exception_table": [entry._asdict() for entry in exception_entries],
+            }
+
+            # Exception table entries don't overlap and are in offset
+            # order, as are instructions.
+            entries = iter(exception_entries)
+            entry = next(entries, None)
+            line = None
+            for instr in get_instructions(co, opc):
+                offset = instr.offset
+                while entry is not None and entry.end <= offset:
+                    entry = next(entries, None)
+                if instr.starts_line is not None:
+                    line = instr.starts_line
+                yield {
+                    "type": "instruction",
+                    "code": code_id,
+                    "offset": offset,
+                    "opcode": instr.opcode,
+                    "opname": instr.opname,
+                    "arg": instr.arg,
+                    "argval": jsonl_repr(instr.argval) if instr.has_arg else None,
+                    # The argrepr of a code object gives its address.
+                    "argrepr": (
+                        None
+                        if not instr.has_arg
+                        else (
+                            jsonl_repr(instr.argval)
+                            if iscode(instr.argval)
+                            else instr.argrepr
+                        )
+                    ),
+                    "line": line,
+                    "starts_line": instr.starts_line is not None,
+                    "is_jump_target": bool(instr.is_jump_target),
+                    "jump_target": (
+                        instr.argval if instr.optype in ("jabs", "jrel") else None
+                    ),
+                    "handler": (
+                        entry.target
+                        if entry is not None and entry.start <= offset
+                        else None
+                    ),
+                }
+            parent = code_id
+            code_id += 1
+
+        for c in co.co_consts:
+            if iscode(c):
+                queue.append((c, parent))
+
+
+def disco_jsonl(
+    version_tuple,
+    co,
+    timestamp,
+    real_out,
+    magic_int,
+    source_size,
+    sip_hash,
+    alternate_opmap,
+    methods,
+    python_implementation,
+    file_offsets: dict,
+) -> None:
+    """
+    Write as JSON Lines a record for the bytecode file, and then those
+    of jsonl_records().
+    """
+    profiler = xdis.instrument.profiler
+    if profiler is None:
+        opc = get_opcode(version_tuple, python_implementation, alternate_opmap, magic_int)
+    else:
+        with profiler.span("opcode"):
+            opc = get_opcode(
+                version_tuple, python_implementation, alternate_opmap, magic_int
+            )
+
+    encode = json.JSONEncoder(ensure_ascii=False, default=repr).encode
+    write = real_out.write
+    write(
+        encode(
+            {
+                "type": "file",
+                "format_version": JSONL_FORMAT_VERSION,
+                "xdis_version": __version__,
+                "version": ".".join(str(i) for i in version_tuple),
+                "implementation": str(python_implementation),
+                "magic": magic_int,
+                "timestamp": timestamp,
+                "source_size": source_size,
+                "sip_hash": sip_hash,
+                "filename": co.co_filename,
+            }
+        )
+        + "\n"
+    )
+    for record in jsonl_records(opc, co, methods, file_offsets):
+        write(encode(record) + "\n")
+
+
 def code_uniquify(basename, co_code) -> str:
     # FIXME: better would be a hash of the co_code
     return "%s_0x%x" % (basename, id(co_code))
@@ -373,6 +570,7 @@ def disassemble_file(
     show_source=False,
     methods: Tuple[str] = tuple(),
     save_file_offsets: bool = False,
+    cache=None,
 ):
     """
     Disassemble Python byte-code file (.pyc).
@@ -381,6 +579,9 @@ def disassemble_file(
     try to find the corresponding compiled object.
 
     If that fails, we'll compile internally for the Python version currently running.
+
+    ``cache`` is an optional xdis.cache.CodeCache used to avoid
+    unmarshalling the same bytecode file again.
     """
     pyc_filename = None
     file_offsets = {}
@@ -395,7 +596,9 @@ def disassemble_file(
             source_size,
             sip_hash,
             file_offsets,
-        ) = load_module(pyc_filename, save_file_offsets=save_file_offsets)
+        ) = load_module(
+            pyc_filename, save_file_offsets=save_file_offsets, cache=cache
+        )
     except (ImportError, NotImplementedError, ValueError):
         raise
     except Exception:
@@ -415,6 +618,10 @@ def disassemble_file(
     else:
         filename = pyc_filename
 
+    profiler = xdis.instrument.profiler
+    if profiler is not None:
+        outstream = profiler.wrap_stream(outstream)
+
     if asm_format == "header":
         show_module_header(
             version_tuple,
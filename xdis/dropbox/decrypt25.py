@@ -6,10 +6,13 @@
 # Dropbox Python bytecode decryption tool for Dropbox versions of 1.1x
 # (and possibly earlier) which uses Python bytecode 2.5.
 
+import os
 import struct
+import sys
 import types
+from array import array
 from types import CodeType
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 import xdis.marsh as xmarshal
 
@@ -46,6 +49,13 @@ def tea_decipher(v, key: tuple[int, int, int, int]):
     """
     Tiny Decryption Algorithm description (TEA)
     See https://en.wikipedia.org/wiki/Tiny_Encryption_Algorithm
+
+    ``v`` is a mutable sequence of 32-bit ints, such as a list or an
+    array("I"), and is decrypted in place.
+
+    Each word depends on the one decrypted just before it, so the
+    inner loop can't be vectorized; instead MX() is written out inline
+    and the key words for a round are looked up once.
     """
     DELTA = 0x9E3779B9
     n = len(v)
@@ -54,14 +64,43 @@ def tea_decipher(v, key: tuple[int, int, int, int]):
     y = v[0]
     while sum != 0:
         e = (sum >> 2) & 3
-        for p in range(n - 1, -1, -1):
-            z = v[(n + p - 1) % n]
-            v[p] = (v[p] - MX(z, y, sum, key, p, e)) & 0xFFFFFFFF
-            y = v[p]
+        round_key = [key[p ^ e] for p in range(4)]
+        for p in range(n - 1, 0, -1):
+            z = v[p - 1]
+            y = v[p] = (
+                v[p]
+                - (
+                    (((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4)))
+                    ^ ((sum ^ y) + (round_key[p & 3] ^ z))
+                )
+            ) & 0xFFFFFFFF
+        z = v[n - 1]
+        y = v[0] = (
+            v[0]
+            - (
+                (((z >> 5) ^ (y << 2)) + ((y >> 3) ^ (z << 4)))
+                ^ ((sum ^ y) + (round_key[0] ^ z))
+            )
+        ) & 0xFFFFFFFF
         sum -= DELTA
     return v
 
 
+def tea_decipher_bytes(data: bytes, key: tuple[int, int, int, int]) -> bytes:
+    """
+    Decrypt ``data``, whose length is a multiple of 4, as little-endian
+    32-bit words.
+    """
+    words = array("I", data)
+    if sys.byteorder == "big":
+        words.byteswap()
+    # Indexing a list is faster than indexing an array.
+    words = array("I", tea_decipher(words.tolist(), key))
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words.tobytes()
+
+
 def load_code(self) -> Code2Compat | CodeType:
     """
     Returns a Python code object like xdis.unmarshal.load_code(),
@@ -76,13 +115,10 @@ def load_code(self) -> Code2Compat | CodeType:
     b = self.load_int()
     key = get_keys(a, b)
     padsize = (b + 15) & ~0xF
-    intsize = padsize / 4
     data = self.bufstr[self.bufpos : self.bufpos + padsize]
     # print("%d: %d (%d=%d)" % (self.bufpos, b, padsize, len(data)))
-    data = list(struct.unpack("<%dL" % intsize, data))
-    tea_decipher(data, key)
     self.bufpos += padsize
-    obj = xmarshal._FastUnmarshaller(struct.pack("<%dL" % intsize, *data))
+    obj = _DropboxUnmarshaller(tea_decipher_bytes(data, key))
     code = obj.load_code()
     co_code = patch(code.co_code)
     if PYTHON3:
@@ -277,15 +313,30 @@ except ImportError:
     builtinify = lambda f: f
 
 
+class _DropboxUnmarshaller(xmarshal._FastUnmarshaller):
+    """
+    xdis.marsh's unmarshaller, but with code objects read by our
+    decrypting load_code(). The dispatch table of xdis.marsh is shared,
+    so rather than change it, code objects are picked off here.
+    """
+
+    def load(self):
+        if self.bufstr[self.bufpos : self.bufpos + 1] == TYPE_CODE_BYTE:
+            self.bufpos += 1
+            return load_code(self)
+        return super().load()
+
+
+TYPE_CODE_BYTE = xmarshal.TYPE_CODE.encode("ascii")
+
+
 @builtinify
 def loads(s):
     """
     xdis.marshal.load() but with its dispatch load_code() function replaced
     with our decoding version.
     """
-    um = xmarshal._FastUnmarshaller(s)
-    um.dispatch[xmarshal.TYPE_CODE] = load_code
-    return um.load()
+    return _DropboxUnmarshaller(s).load()
 
 
 def fix_dropbox_pyc(fp):
@@ -297,31 +348,60 @@ def fix_dropbox_pyc(fp):
     return (2, 5, "0dropbox"), timestamp, 62131, co, False, source_size, None, {}
 
 
-def fix_dir(path) -> None:
-    import os
+def fix_file(name: str) -> Optional[Exception]:
+    """
+    Decrypt the Dropbox bytecode file ``name`` in place, making it an
+    ordinary Python 2.5 bytecode file. Return the exception that stopped
+    that, or None.
+    """
+    with open(name, "rb") as fp:
+        data = fp.read()
+    try:
+        c = loads(data[8:])
+        fixed = xmarshal.dumps(c, python_version=(2, 5))
+    except Exception as e:
+        return e
+    # fix the version indicator and save
+    with open(name, "wb") as fp:
+        fp.write(b"\xb3\xf2\r\n" + data[4:8] + fixed)
+    return None
+
+
+def fix_dir(path: str, workers: Optional[int] = None) -> List[Tuple[str, Exception]]:
+    """
+    Decrypt all the bytecode files under directory ``path`` in place.
 
-    for root, _, files in os.walk(path):
-        for name in files:
-            if not name.endswith("pyc"):
-                continue
-            name = os.path.join(root, name)
-            print("fixing", name)
-            data = open(name).read()
-            try:
-                c = xmarshal.loads(data[8:])
-            except Exception as e:
-                print("error", e, repr(e))
-                # print repr(data[8:])
-                continue
-            # fix the version indicator and save
-            open(name, "w").write("\xb3\xf2\r\n" + data[4:8] + xmarshal.dumps(c))
+    Files are spread over a pool of ``workers`` processes, as in
+    xdis.load.load_modules(); with 0 or 1, they are done one at a time
+    in this process. Return the files that couldn't be decrypted, with
+    the exception for each.
+    """
+    names = [
+        os.path.join(root, name)
+        for root, _, files in os.walk(path)
+        for name in sorted(files)
+        if name.endswith("pyc")
+    ]
+    if workers is not None and workers <= 1:
+        results = map(fix_file, names)
+    else:
+        from xdis.load import _load_executor
 
+        with _load_executor(workers) as executor:
+            results = list(executor.map(fix_file, names, chunksize=8))
+
+    errors = []
+    for name, error in zip(names, results):
+        if error is None:
+            print("fixed", name)
+        else:
+            print("error", name, repr(error))
+            errors.append((name, error))
+    return errors
 
-if __name__ == "__main__":
-    import os
-    import sys
 
-    if sys.argv != 2:
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
         print("Usage: %s python-file" % os.path.basename(sys.argv[0]))
         sys.exit(1)
 
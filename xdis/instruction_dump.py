@@ -0,0 +1,561 @@
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+A compact binary file of the instructions of many bytecode files.
+
+Decoding bytecode files is the expensive part of analyzing them. An
+instruction dump holds what get_instructions_bytes() gives for every
+code object of every file added to it, so that analyses can be run
+over it any number of times without decoding again.
+
+Instructions are stored by column: one packed array each for offsets,
+opcodes, arguments, line numbers, and the opnames and argval reprs,
+which are indexes into a table of distinct strings. The instructions of
+a code object are consecutive in each column. A reader memory-maps the
+file, so the columns are only read as they are used.
+
+Write a dump with::
+
+    with InstructionDumpWriter("corpus.xid") as writer:
+        for path in paths:
+            writer.add_file(path)
+
+and read it with::
+
+    with InstructionDump("corpus.xid") as dump:
+        opcodes = collections.Counter(dump.column("opname"))
+        for code in dump.code_objects():
+            for instr in code.instructions():
+                ...
+
+All values are little-endian. The file starts with a header of HEADER's
+fields. Then come, each starting at a multiple of 8 bytes from the
+start of the file:
+
+  string offsets   n_strings + 1 uint64s; string i is the UTF-8 bytes
+                   from offset i to offset i + 1 in the string data
+  string data
+  modules          n_modules MODULE records
+  code objects     n_code_objects CODE records, in the order of
+                   disassembly, each after the code object it is in
+  columns          n_instructions values each, in the order of COLUMNS
+
+A missing argument, line or argval is stored as the column type's
+largest value, NONE_U32, or -1 for lines.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque, namedtuple
+from typing import Iterator, List, Optional, Tuple
+
+from xdis.bytecode import get_instructions_bytes
+from xdis.bytecode_graal import get_instructions_bytes_graal
+from xdis.codetype.base import iscode
+from xdis.disasm import get_opcode, jsonl_repr
+from xdis.load import load_module
+from xdis.version_info import PythonImplementation
+
+MAGIC = b"xdisinsn"
+
+# Bumped when the layout changes.
+FORMAT_VERSION = 1
+
+# magic, format version, then counts and section offsets.
+HEADER = struct.Struct("<8sI4xQQQQQQQQQ")
+HEADER_FIELDS = (
+    "magic",
+    "format_version",
+    "n_strings",
+    "n_modules",
+    "n_code_objects",
+    "n_instructions",
+    "strings_offset",
+    "string_data_offset",
+    "modules_offset",
+    "code_objects_offset",
+    "columns_offset",
+)
+
+# Per bytecode file: the string ids of its path, its Python version and
+# implementation; its magic number; and its first code object and number
+# of code objects.
+MODULE = struct.Struct("<IIIiII")
+
+# Per code object: its module; the code object it is in, or -1; the
+# string ids of its name and file name; its first line, or -1; its
+# flags; and its first instruction and number of instructions.
+CODE = struct.Struct("<IiIIiIQI")
+
+NONE_U32 = 0xFFFFFFFF
+
+# Column name and array type code.
+COLUMNS = (
+    ("offset", "I"),
+    ("opcode", "H"),
+    ("arg", "I"),
+    ("line", "i"),
+    ("opname", "I"),
+    ("argval", "I"),
+)
+
+for _, typecode in COLUMNS:
+    assert array(typecode).itemsize == {"H": 2, "I": 4, "i": 4}[typecode]
+
+BIG_ENDIAN = sys.byteorder == "big"
+
+DumpedModule = namedtuple(
+    "DumpedModule",
+    "path version implementation magic_int first_code n_code_objects",
+)
+
+DumpedInstruction = namedtuple(
+    "DumpedInstruction", "offset opcode opname arg argval line"
+)
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class InstructionDumpWriter:
+    """
+    Writes an instruction dump to ``path``.
+
+    Columns are kept in memory until they hold ``buffer_size``
+    instructions, and then go to temporary files until close(), so
+    memory use doesn't grow with the number of instructions. The table
+    of strings is kept in memory.
+
+    A bytecode file that can't be decoded raises an exception and leaves
+    the dump as it was.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16) -> None:
+        self.path = path
+        self.buffer_size = buffer_size
+        self.string_ids = {}
+        self.strings: List[str] = []
+        self.modules = bytearray()
+        self.code_objects = bytearray()
+        self.n_modules = 0
+        self.n_code_objects = 0
+        self.n_instructions = 0
+        self.columns = [array(typecode) for _, typecode in COLUMNS]
+        self.spill_files = [tempfile.TemporaryFile() for _ in COLUMNS]
+
+    def __enter__(self) -> "InstructionDumpWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def string_id(self, s) -> int:
+        if s is None:
+            return NONE_U32
+        s = str(s)
+        string_id = self.string_ids.get(s)
+        if string_id is None:
+            string_id = self.string_ids[s] = len(self.strings)
+            self.strings.append(s)
+        return string_id
+
+    def add_file(self, path: str) -> None:
+        """Add the code objects of bytecode file ``path``."""
+        version_tuple, _, magic_int, co, python_implementation = load_module(path)[:5]
+        self.add_code(co, version_tuple, python_implementation, magic_int, path)
+
+    def add_code(
+        self,
+        co,
+        version_tuple: tuple,
+        python_implementation: PythonImplementation,
+        magic_int: int,
+        path: Optional[str] = None,
+    ) -> None:
+        """
+        Add module code object ``co`` and the code objects in it, of
+        bytecode for ``version_tuple``.
+        """
+        opc = get_opcode(version_tuple, python_implementation, magic_int=magic_int)
+        if python_implementation == PythonImplementation.Graal:
+            get_instructions = get_instructions_bytes_graal
+        else:
+            get_instructions = get_instructions_bytes
+
+        # Nothing of a module that can't be decoded is kept, so columns
+        # only go to the temporary files between modules.
+        saved = (
+            self.n_code_objects,
+            self.n_instructions,
+            len(self.code_objects),
+            len(self.columns[0]),
+        )
+        try:
+            self._add_code_objects(co, opc, get_instructions)
+        except BaseException:
+            self.n_code_objects, self.n_instructions, n_code_bytes, n = saved
+            del self.code_objects[n_code_bytes:]
+            for column in self.columns:
+                del column[n:]
+            raise
+
+        first_code = saved[0]
+        self.modules += MODULE.pack(
+            self.string_id(path),
+            self.string_id(".".join(str(i) for i in version_tuple)),
+            self.string_id(python_implementation),
+            magic_int,
+            first_code,
+            self.n_code_objects - first_code,
+        )
+        self.n_modules += 1
+        if len(self.columns[0]) >= self.buffer_size:
+            self._spill()
+
+    def _add_code_objects(self, co, opc, get_instructions) -> None:
+        module_id = self.n_modules
+        string_id = self.string_id
+        offsets, opcodes, args, lines, opnames, argvals = self.columns
+
+        queue = deque([(co, -1)])
+        while queue:
+            co, parent = queue.popleft()
+            code_id = self.n_code_objects
+            first_instruction = self.n_instructions
+            line = -1
+            n = 0
+            for instr in get_instructions(co, opc):
+                if instr.starts_line is not None:
+                    line = instr.starts_line
+                offsets.append(instr.offset)
+                opcodes.append(instr.opcode)
+                args.append(NONE_U32 if instr.arg is None else instr.arg)
+                lines.append(line)
+                opnames.append(string_id(instr.opname))
+                argvals.append(
+                    string_id(jsonl_repr(instr.argval)) if instr.has_arg else NONE_U32
+                )
+                n += 1
+            firstlineno = getattr(co, "co_firstlineno", None)
+            self.code_objects += CODE.pack(
+                module_id,
+                parent,
+                string_id(co.co_name),
+                string_id(co.co_filename),
+                -1 if firstlineno is None else firstlineno,
+                getattr(co, "co_flags", 0),
+                first_instruction,
+                n,
+            )
+            self.n_code_objects += 1
+            self.n_instructions += n
+            for c in co.co_consts:
+                if iscode(c):
+                    queue.append((c, code_id))
+
+    def _spill(self) -> None:
+        for column, fp in zip(self.columns, self.spill_files):
+            if BIG_ENDIAN:
+                column.byteswap()
+            column.tofile(fp)
+            del column[:]
+
+    def _discard(self) -> None:
+        for fp in self.spill_files:
+            fp.close()
+        self.spill_files = []
+
+    def close(self) -> None:
+        """Write the dump."""
+        if not self.spill_files:
+            return
+        self._spill()
+
+        encoded = [s.encode("utf-8", "surrogatepass") for s in self.strings]
+        string_offsets = array("Q", [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            string_offsets.append(total)
+        if BIG_ENDIAN:
+            string_offsets.byteswap()
+
+        with open(self.path, "wb") as out:
+
+            def pad() -> int:
+                position = out.tell()
+                out.write(b"\0" * (_align(position) - position))
+                return _align(position)
+
+            out.write(b"\0" * HEADER.size)
+            strings_offset = pad()
+            string_offsets.tofile(out)
+            string_data_offset = pad()
+            for data in encoded:
+                out.write(data)
+            modules_offset = pad()
+            out.write(self.modules)
+            code_objects_offset = pad()
+            out.write(self.code_objects)
+            columns_offset = pad()
+            for fp in self.spill_files:
+                fp.seek(0)
+                while True:
+                    chunk = fp.read(1 << 20)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                pad()
+            out.seek(0)
+            out.write(
+                HEADER.pack(
+                    MAGIC,
+                    FORMAT_VERSION,
+                    len(self.strings),
+                    self.n_modules,
+                    self.n_code_objects,
+                    self.n_instructions,
+                    strings_offset,
+                    string_data_offset,
+                    modules_offset,
+                    code_objects_offset,
+                    columns_offset,
+                )
+            )
+        self._discard()
+
+
+class DumpedCode:
+    """A code object in an InstructionDump."""
+
+    __slots__ = (
+        "dump",
+        "index",
+        "module",
+        "parent",
+        "name",
+        "filename",
+        "firstlineno",
+        "flags",
+        "first_instruction",
+        "n_instructions",
+    )
+
+    def __init__(self, dump: "InstructionDump", index: int) -> None:
+        self.dump = dump
+        self.index = index
+        (
+            self.module,
+            self.parent,
+            name,
+            filename,
+            firstlineno,
+            self.flags,
+            self.first_instruction,
+            self.n_instructions,
+        ) = CODE.unpack_from(
+            dump.buffer, dump.header["code_objects_offset"] + index * CODE.size
+        )
+        self.name = dump.string(name)
+        self.filename = dump.string(filename)
+        self.firstlineno = None if firstlineno < 0 else firstlineno
+
+    def __repr__(self) -> str:
+        return "<DumpedCode %s, file %r, line %s>" % (
+            self.name,
+            self.filename,
+            self.firstlineno,
+        )
+
+    def column(self, name: str) -> memoryview:
+        """
+        Return the values of column ``name`` for this code object's
+        instructions.
+        """
+        start = self.first_instruction
+        return self.dump.column(name)[start : start + self.n_instructions]
+
+    def instructions(self) -> Iterator[DumpedInstruction]:
+        dump = self.dump
+        string = dump.string
+        offsets, opcodes, args, lines, opnames, argvals = (
+            dump.column(name) for name, _ in COLUMNS
+        )
+        for i in range(
+            self.first_instruction, self.first_instruction + self.n_instructions
+        ):
+            arg = args[i]
+            argval = argvals[i]
+            line = lines[i]
+            yield DumpedInstruction(
+                offsets[i],
+                opcodes[i],
+                string(opnames[i]),
+                None if arg == NONE_U32 else arg,
+                None if argval == NONE_U32 else string(argval),
+                None if line < 0 else line,
+            )
+
+
+class InstructionDump:
+    """
+    An instruction dump written by InstructionDumpWriter, memory-mapped
+    from ``path``.
+
+    Columns are memoryviews of the mapped file. Slices of them must be
+    released, or no longer referenced, before close().
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fp:
+            self.buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = dict(zip(HEADER_FIELDS, HEADER.unpack_from(self.buffer, 0)))
+        if self.header["magic"] != MAGIC:
+            self.buffer.close()
+            raise ValueError("%s is not an xdis instruction dump" % path)
+        if self.header["format_version"] != FORMAT_VERSION:
+            self.buffer.close()
+            raise ValueError(
+                "%s is an xdis instruction dump of format version %d; "
+                "version %d is supported"
+                % (path, self.header["format_version"], FORMAT_VERSION)
+            )
+        self.n_modules = self.header["n_modules"]
+        self.n_code_objects = self.header["n_code_objects"]
+        self.n_instructions = self.header["n_instructions"]
+        self._strings: List[Optional[str]] = [None] * self.header["n_strings"]
+        self._views: List[memoryview] = []
+        self._string_offsets = self._array(
+            self.header["strings_offset"], "Q", self.header["n_strings"] + 1
+        )
+        self._columns = {}
+        offset = self.header["columns_offset"]
+        for name, typecode in COLUMNS:
+            column = self._array(offset, typecode, self.n_instructions)
+            self._columns[name] = column
+            offset = _align(offset + self.n_instructions * column.itemsize)
+
+    def __enter__(self) -> "InstructionDump":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _array(self, offset: int, typecode: str, n: int):
+        """
+        Return the ``n`` values of type ``typecode`` at ``offset`` in the
+        file, as a memoryview if the values are in this machine's byte
+        order.
+        """
+        size = array(typecode).itemsize * n
+        if BIG_ENDIAN:
+            values = array(typecode, self.buffer[offset : offset + size])
+            values.byteswap()
+            return values
+        view = memoryview(self.buffer)[offset : offset + size]
+        self._views.append(view)
+        values = view.cast(typecode)
+        self._views.append(values)
+        return values
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._columns = {}
+        self.buffer.close()
+
+    def string(self, string_id: int) -> Optional[str]:
+        """Return the string with id ``string_id``."""
+        if string_id == NONE_U32:
+            return None
+        s = self._strings[string_id]
+        if s is None:
+            offsets = self._string_offsets
+            start = self.header["string_data_offset"] + offsets[string_id]
+            end = self.header["string_data_offset"] + offsets[string_id + 1]
+            s = self._strings[string_id] = self.buffer[start:end].decode(
+                "utf-8", "surrogatepass"
+            )
+        return s
+
+    def column(self, name: str):
+        """
+        Return column ``name``, one of those in COLUMNS, for all
+        instructions. Values of the "opname" and "argval" columns are
+        string ids; see string().
+        """
+        return self._columns[name]
+
+    def module(self, index: int) -> DumpedModule:
+        path, version, implementation, magic_int, first_code, n = MODULE.unpack_from(
+            self.buffer, self.header["modules_offset"] + index * MODULE.size
+        )
+        return DumpedModule(
+            self.string(path),
+            self.string(version),
+            self.string(implementation),
+            magic_int,
+            first_code,
+            n,
+        )
+
+    def modules(self) -> Iterator[DumpedModule]:
+        for index in range(self.n_modules):
+            yield self.module(index)
+
+    def code_object(self, index: int) -> DumpedCode:
+        return DumpedCode(self, index)
+
+    def code_objects(self) -> Iterator[DumpedCode]:
+        for index in range(self.n_code_objects):
+            yield DumpedCode(self, index)
+
+
+def dump_files(out_path: str, paths: List[str]) -> Tuple[int, List[str]]:
+    """
+    Write an instruction dump of the bytecode files ``paths`` to
+    ``out_path``. Return the number of files added, and the files that
+    couldn't be read.
+    """
+    failed = []
+    with InstructionDumpWriter(out_path) as writer:
+        for path in paths:
+            try:
+                writer.add_file(path)
+            except Exception:
+                failed.append(path)
+    return len(paths) - len(failed), failed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.stderr.write("usage: %s DUMP-FILE BYTECODE-FILE...\n" % sys.argv[0])
+        sys.exit(2)
+    n, failed = dump_files(sys.argv[1], sys.argv[2:])
+    for path in failed:
+        sys.stderr.write("%s: can't be read\n" % path)
+    print("%s: %d files, %d bytes" % (sys.argv[1], n, os.path.getsize(sys.argv[1])))
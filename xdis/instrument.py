@@ -0,0 +1,370 @@
+# Copyright (c) 2025 by Rocky Bernstein
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+Timing of the phases of loading and disassembling bytecode.
+
+While a Profiler is active, xdis records a span for each of these
+phases as it goes:
+
+  header     reading the bytecode file header
+  unmarshal  unmarshalling, once per code object
+  opcode     looking up the opcode table for the bytecode version
+  decode     decoding the instructions of a code object
+  format     formatting decoded instructions as text
+  output     writing disassembly to the output stream
+
+Spans nest: unmarshalling a module includes unmarshalling the functions
+in it. Each span's *self* time leaves out the time of the spans inside
+it, so adding up self times over phases doesn't count anything twice.
+
+Instrumented code checks the module-level ``profiler`` and does nothing
+more when it is None, which it is unless a Profiler is active. So there
+is no cost when profiling isn't used.
+
+Use a Profiler as a context manager::
+
+    from xdis.instrument import Profiler
+
+    with Profiler(trace_allocations=True) as profiler:
+        disassemble_file("foo.pyc", out)
+    profiler.report(sys.stderr)
+
+To send spans elsewhere, such as to an APM system, pass ``callback``,
+which is called with a Span as each span ends.
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from typing import Callable, Dict, List, Optional
+
+PHASES = ("header", "unmarshal", "opcode", "decode", "format", "output")
+
+# What a callback gets at the end of each span. ``code`` is the name of
+# the code object the span was for, or None. ``allocated`` is the net
+# change in traced memory, in bytes, or None when not tracing
+# allocations. Times are in seconds.
+Span = namedtuple("Span", "phase code elapsed self_time allocated")
+
+# The active Profiler, or None. Instrumented code reads this each time
+# it might start a span.
+profiler: Optional["Profiler"] = None
+
+
+def code_name(code) -> Optional[str]:
+    """
+    Return how code object ``code`` is named in reports: its name and
+    first line number.
+    """
+    if code is None:
+        return None
+    name = getattr(code, "co_name", None)
+    if name is None:
+        return None
+    firstlineno = getattr(code, "co_firstlineno", None)
+    if firstlineno is None or firstlineno < 0:
+        return str(name)
+    return "%s:%d" % (name, firstlineno)
+
+
+class PhaseStats:
+    """Accumulated spans for one phase, or one phase of one code object."""
+
+    __slots__ = ("count", "total", "self_time", "max", "allocated")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.self_time = 0.0
+        self.max = 0.0
+        self.allocated = 0
+
+    def add(self, elapsed: float, self_time: float, allocated: Optional[int]) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.self_time += self_time
+        if elapsed > self.max:
+            self.max = elapsed
+        if allocated is not None:
+            self.allocated += allocated
+
+
+class _Frame:
+    """A span that has begun but not ended."""
+
+    __slots__ = ("phase", "start", "child_time", "alloc_start", "child_alloc")
+
+    def __init__(self, phase: str, start: float, alloc_start: Optional[int]) -> None:
+        self.phase = phase
+        self.start = start
+        self.child_time = 0.0
+        self.alloc_start = alloc_start
+        self.child_alloc = 0
+
+
+class _SpanContext:
+    __slots__ = ("profiler", "phase", "code", "depth")
+
+    def __init__(self, profiler: "Profiler", phase: str, code) -> None:
+        self.profiler = profiler
+        self.phase = phase
+        self.code = code
+
+    def __enter__(self) -> "_SpanContext":
+        self.depth = self.profiler.begin(self.phase)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.end(self.depth, self.code)
+
+
+class TimedStream:
+    """
+    File object wrapper that records each write() as an "output" span.
+    """
+
+    def __init__(self, stream, profiler: "Profiler") -> None:
+        self.stream = stream
+        self.profiler = profiler
+
+    def write(self, s) -> int:
+        profiler = self.profiler
+        depth = profiler.begin("output")
+        try:
+            return self.stream.write(s)
+        finally:
+            profiler.end(depth)
+            profiler.count("bytes written", len(s))
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class Profiler:
+    """
+    Collects timings, and optionally allocations, of the phases xdis
+    goes through while it is active.
+
+    If ``trace_allocations`` is True, tracemalloc is used to record the
+    net memory allocated in each span. This slows everything down, so
+    times are then only good for comparing with each other.
+
+    ``callback``, if given, is called with a Span at the end of each span.
+    """
+
+    def __init__(
+        self,
+        trace_allocations: bool = False,
+        callback: Optional[Callable[[Span], None]] = None,
+    ) -> None:
+        self.trace_allocations = trace_allocations
+        self.callbacks: List[Callable[[Span], None]] = []
+        if callback is not None:
+            self.callbacks.append(callback)
+        self.phases: Dict[str, PhaseStats] = {}
+        self.code_objects: Dict[str, Dict[str, PhaseStats]] = {}
+        self.counters: Counter = Counter()
+        self.peak_memory: Optional[int] = None
+        self._stack: List[_Frame] = []
+        self._previous: Optional["Profiler"] = None
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Make this the active profiler."""
+        global profiler
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.trace_allocations and hasattr(tracemalloc, "reset_peak"):
+            # Python 3.9 and later.
+            tracemalloc.reset_peak()
+        self._previous = profiler
+        profiler = self
+
+    def stop(self) -> None:
+        """Stop recording, making active whichever profiler was before."""
+        global profiler
+        profiler = self._previous
+        self._previous = None
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def add_callback(self, callback: Callable[[Span], None]) -> None:
+        self.callbacks.append(callback)
+
+    def begin(self, phase: str) -> int:
+        """
+        Start a span for ``phase``, and return the token to pass to
+        end(). Spans begun after this and not ended are ended with it.
+        """
+        alloc_start = (
+            tracemalloc.get_traced_memory()[0] if self.trace_allocations else None
+        )
+        self._stack.append(_Frame(phase, time.perf_counter(), alloc_start))
+        return len(self._stack) - 1
+
+    def end(self, token: int, code=None) -> None:
+        """
+        End the span that begin() returned ``token`` for. ``code`` is
+        the code object the span was for, if any.
+        """
+        now = time.perf_counter()
+        stack = self._stack
+        if token >= len(stack):
+            return
+        frame = stack[token]
+        # Drop spans that didn't end because of an exception.
+        del stack[token:]
+
+        elapsed = now - frame.start
+        self_time = elapsed - frame.child_time
+        allocated = self_allocated = None
+        if frame.alloc_start is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - frame.alloc_start
+            self_allocated = allocated - frame.child_alloc
+        if stack:
+            parent = stack[-1]
+            parent.child_time += elapsed
+            if allocated is not None:
+                parent.child_alloc += allocated
+
+        phase = frame.phase
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.add(elapsed, self_time, self_allocated)
+
+        name = code_name(code)
+        if name is not None:
+            per_code = self.code_objects.setdefault(name, {})
+            stats = per_code.get(phase)
+            if stats is None:
+                stats = per_code[phase] = PhaseStats()
+            stats.add(elapsed, self_time, self_allocated)
+
+        if self.callbacks:
+            span = Span(phase, name, elapsed, self_time, self_allocated)
+            for callback in self.callbacks:
+                callback(span)
+
+    def span(self, phase: str, code=None) -> _SpanContext:
+        """
+        Return a context manager that records a span for ``phase`` around
+        its body. ``code`` is the code object the span is for, if any.
+        """
+        return _SpanContext(self, phase, code)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add ``n`` to the counter ``name``."""
+        self.counters[name] += n
+
+    def wrap_stream(self, stream) -> TimedStream:
+        """Return ``stream`` with writes to it recorded as output."""
+        return TimedStream(stream, self)
+
+    def report(self, out=sys.stderr, max_code_objects: int = 20) -> None:
+        """
+        Write a summary of the phases, the code objects that took the
+        most time, and the counters to ``out``.
+        """
+        show_alloc = self.trace_allocations
+        phases = [phase for phase in PHASES if phase in self.phases] + sorted(
+            set(self.phases) - set(PHASES)
+        )
+
+        header = "%-12s %8s %12s %12s %12s" % (
+            "phase",
+            "spans",
+            "total ms",
+            "self ms",
+            "max ms",
+        )
+        if show_alloc:
+            header += " %12s" % "alloc KiB"
+        out.write(header + "\n")
+        total_self = 0.0
+        for phase in phases:
+            stats = self.phases[phase]
+            total_self += stats.self_time
+            line = "%-12s %8d %12.3f %12.3f %12.3f" % (
+                phase,
+                stats.count,
+                stats.total * 1000,
+                stats.self_time * 1000,
+                stats.max * 1000,
+            )
+            if show_alloc:
+                line += " %12.1f" % (stats.allocated / 1024)
+            out.write(line + "\n")
+        out.write("%-12s %8s %12s %12.3f\n" % ("all", "", "", total_self * 1000))
+        if self.peak_memory is not None:
+            out.write("peak traced memory: %.1f KiB\n" % (self.peak_memory / 1024))
+
+        if self.code_objects:
+
+            def code_time(item) -> float:
+                return sum(stats.self_time for stats in item[1].values())
+
+            code_phases = [
+                phase
+                for phase in phases
+                if any(phase in per_code for per_code in self.code_objects.values())
+            ]
+            ranked = sorted(self.code_objects.items(), key=code_time, reverse=True)
+            out.write(
+                "\nslowest code objects, self ms%s:\n"
+                % (" (alloc KiB)" if show_alloc else "")
+            )
+            out.write(
+                "%-40s" % "code object"
+                + "".join(" %14s" % phase for phase in code_phases)
+                + "\n"
+            )
+            for name, per_code in ranked[:max_code_objects]:
+                line = "%-40s" % name[:40]
+                for phase in code_phases:
+                    stats = per_code.get(phase)
+                    if stats is None:
+                        line += " %14s" % "-"
+                    elif show_alloc:
+                        line += " %14s" % (
+                            "%.2f (%.0f)"
+                            % (stats.self_time * 1000, stats.allocated / 1024)
+                        )
+                    else:
+                        line += " %14.3f" % (stats.self_time * 1000)
+                out.write(line + "\n")
+            if len(ranked) > max_code_objects:
+                out.write(
+                    "... and %d more code objects\n" % (len(ranked) - max_code_objects)
+                )
+
+        if self.counters:
+            out.write("\n")
+            for name, n in sorted(self.counters.items()):
+                out.write("%-20s %d\n" % (name, n))
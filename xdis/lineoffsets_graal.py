@@ -20,7 +20,10 @@ The original assumes Truffle's Source/SourceSection APIs.
 See https://github.com/oracle/graalpython/graalpython/com.oracle.graal.python/src/com/oracle/graal/python/compiler/SourceMap.java
 """
 
-from typing import Dict, List, Tuple
+from array import array
+from bisect import bisect_right
+from typing import Dict, Tuple
+from weakref import WeakKeyDictionary
 
 # Signed byte constants (as in Java code)
 EXTENDED_NUM = -128
@@ -37,6 +40,35 @@ def _to_signed(byte_value: int) -> int:
     return byte_value if byte_value < 128 else byte_value - 256
 
 
+# SourceMaps already decoded, by code object; see get_source_map().
+_source_maps = WeakKeyDictionary()
+
+
+class _ByteMap:
+    """
+    Read-only sequence with one item per byte of bytecode, like the
+    per-byte lists the Java SourceMap has, backed by a SourceMap's
+    per-instruction ``values``.
+    """
+
+    def __init__(self, source_map: "SourceMap", values: array) -> None:
+        self.source_map = source_map
+        self.values = values
+
+    def __len__(self) -> int:
+        return self.source_map.code_len
+
+    def __getitem__(self, offset: int) -> int:
+        if offset < 0:
+            offset += self.source_map.code_len
+            if offset < 0:
+                raise IndexError("bytecode offset out of range")
+        elif offset >= self.source_map.code_len:
+            raise IndexError("bytecode offset out of range")
+        i = self.source_map.instruction_index(offset)
+        return 0 if i < 0 else self.values[i]
+
+
 class SourceMap:
     """
     Encapsulates encoding/decoding of source line/column information for GraalPython bytecode.
@@ -50,6 +82,17 @@ class SourceMap:
     - start_line, start_column: initial line/column used to start decoding
     - op_length_fn: optional callable taking an opcode byte (0..255) and returning
       the instruction length in bytes. If None, instructions are assumed length 1.
+
+    Rather than a list entry for each byte of bytecode, there is an
+    array entry for each instruction: ``offsets`` holds the offset where
+    each instruction starts, and ``start_lines``, ``end_lines``,
+    ``start_columns`` and ``end_columns`` its source span. Bytes that
+    the source table doesn't reach get 0, as in the Java code.
+    startLineMap, endLineMap, startColumnMap and endColumnMap give the
+    per-byte view.
+
+    Use get_source_map() to get the map for a code object, so that it is
+    decoded only once.
     """
 
     def __init__(
@@ -57,8 +100,6 @@ class SourceMap:
         code_object,
         opc,
     ):
-        # use Python lists (mutable) to store maps; they match length of code
-
         bytecode: bytes = code_object.co_code
         start_column: int  = code_object.startColumn
         start_line: int  = code_object.startLine
@@ -68,10 +109,12 @@ class SourceMap:
 
 
         n = len(bytecode)
-        self.startLineMap: List[int] = [0] * n
-        self.endLineMap: List[int] = [0] * n
-        self.startColumnMap: List[int] = [0] * n
-        self.endColumnMap: List[int] = [0] * n
+        self.code_len = n
+        self.offsets = array("i")
+        self.start_lines = array("i")
+        self.end_lines = array("i")
+        self.start_columns = array("i")
+        self.end_columns = array("i")
         self.source_table: bytes = code_object.srcOffsetTable
         self.source_table_len: int = len(self.source_table)
 
@@ -99,14 +142,55 @@ class SourceMap:
                 # FIXME: We made a mistake somewhere.
                 break
 
-            # fill maps for the bytes covered by this opcode
-            for i in range(offset, min(offset + op_len, n)):
-                self.startLineMap[i] = start_line
-                self.startColumnMap[i] = start_column
-                self.endLineMap[i] = end_line
-                self.endColumnMap[i] = end_column
+            self.offsets.append(offset)
+            self.start_lines.append(start_line)
+            self.start_columns.append(start_column)
+            self.end_lines.append(end_line)
+            self.end_columns.append(end_column)
             offset += op_len
 
+        # Bytes from here on aren't covered by the source table.
+        self.covered_end = min(offset, n) if self.offsets else 0
+
+        self.startLineMap = _ByteMap(self, self.start_lines)
+        self.endLineMap = _ByteMap(self, self.end_lines)
+        self.startColumnMap = _ByteMap(self, self.start_columns)
+        self.endColumnMap = _ByteMap(self, self.end_columns)
+
+    def instruction_index(self, offset: int) -> int:
+        """
+        Return the index in the per-instruction arrays of the instruction
+        covering bytecode ``offset``, or -1 if the source table doesn't
+        cover it.
+        """
+        if not 0 <= offset < self.covered_end:
+            return -1
+        return bisect_right(self.offsets, offset) - 1
+
+    def get_line(self, offset: int) -> int:
+        """
+        Return the starting line of the instruction covering bytecode
+        ``offset``, or 0 if that isn't known.
+        """
+        i = self.instruction_index(offset)
+        return 0 if i < 0 else self.start_lines[i]
+
+    def get_span(self, offset: int) -> Tuple[int, int, int, int]:
+        """
+        Return the start line, start column, end line and end column of
+        the instruction covering bytecode ``offset``; all are 0 if that
+        isn't known.
+        """
+        i = self.instruction_index(offset)
+        if i < 0:
+            return 0, 0, 0, 0
+        return (
+            self.start_lines[i],
+            self.start_columns[i],
+            self.end_lines[i],
+            self.end_columns[i],
+        )
+
     def _next_line_and_column(self) -> Tuple[int, int]:
         """
         Get the (line, column) pair delta from self.source_table.
@@ -162,22 +246,58 @@ class SourceMap:
                 # non-negative single-byte value
                 return extensions * MULTIPLIER_POSITIVE + val
 
-def find_linestarts_graal(code_object, opc, dup_lines: bool) -> dict:
+
+def get_source_map(code_object, opc) -> SourceMap:
+    """
+    Return the SourceMap for ``code_object``, decoding it the first time
+    and reusing it after that, for as long as the code object is alive.
+    """
+    try:
+        cached = _source_maps.get(code_object)
+    except TypeError:
+        # Not weakly referenceable.
+        return SourceMap(code_object, opc)
+    # The cached map is stale if the code object has been changed since.
+    if (
+        cached is not None
+        and cached[0] is code_object.co_code
+        and cached[1] is code_object.srcOffsetTable
+        and cached[2] is opc
+    ):
+        return cached[3]
+
     source_map = SourceMap(code_object, opc)
+    _source_maps[code_object] = (
+        code_object.co_code,
+        code_object.srcOffsetTable,
+        opc,
+        source_map,
+    )
+    return source_map
+
+
+def find_linestarts_graal(code_object, opc, dup_lines: bool) -> dict:
+    source_map = get_source_map(code_object, opc)
+    start_lines = source_map.start_lines
+    covered = len(start_lines)
     bytecode: bytes = code_object.co_code
     i = 0
+    # Index of the current instruction in source_map's arrays. The
+    # map was built by stepping through the same instructions.
+    k = -1
     n = len(bytecode)
     last_lineno = -1
     offset2line: Dict[int, int] = {}
     lines_seen = set()
-    last_linemap_offset = len(source_map.startLineMap) - 1
+    last_linemap_offset = n - 1
     while i < n:
         opcode = bytecode[i]
         offset = i
         i += opc.arg_counts[opcode] + 1
+        k += 1
         if offset >= last_linemap_offset:
             break
-        line_number = source_map.startLineMap[offset]
+        line_number = start_lines[k] if k < covered else 0
         if line_number != last_lineno:
             if not dup_lines:
                 if line_number in lines_seen:
@@ -13,19 +13,25 @@
 #  along with this program; if not, write to the Free Software
 #  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
 
+import io
 import marshal
 import os.path as osp
 import py_compile
 import sys
 import tempfile
 import types
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from os import close
 from struct import pack, unpack
 from types import CodeType
+from typing import Iterable, Iterator, Optional, Tuple, Union
 
+import xdis.instrument
 import xdis.marsh
 import xdis.unmarshal
+from xdis.codetype.base import iscode
 from xdis.dropbox.decrypt25 import fix_dropbox_pyc
 from xdis.magics import (
     GRAAL3_MAGICS,
@@ -43,6 +49,9 @@ from xdis.magics import (
 )
 from xdis.version_info import PYTHON3, PYTHON_VERSION_TRIPLE, PythonImplementation
 
+# Separates an archive's file name from the name of a member in it.
+ARCHIVE_MEMBER_SEP = "!/"
+
 
 def is_python_source(path) -> bool:
     try:
@@ -142,12 +151,64 @@ def load_file(filename: str, out=sys.stdout) -> CodeType:
     return co
 
 
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    If ``path`` names a member of an archive, like
+    "dist.whl!/pkg/mod.pyc", return the archive file name and member
+    name, e.g. ("dist.whl", "pkg/mod.pyc"). Otherwise return None.
+    """
+    start = 0
+    while True:
+        i = path.find(ARCHIVE_MEMBER_SEP, start)
+        if i < 0:
+            return None
+        archive = path[:i]
+        if osp.isfile(archive):
+            return archive, path[i + len(ARCHIVE_MEMBER_SEP) :]
+        start = i + 1
+
+
+def read_archive_member(archive: str, member: str) -> bytes:
+    """
+    Return the contents of ``member`` in zip archive ``archive``.
+    Problems are reported as ImportError, as load_module() does for
+    ordinary files.
+    """
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            return zf.read(member)
+    except KeyError:
+        raise ImportError(f"Archive '{archive}' has no member '{member}'")
+    except zipfile.BadZipFile as e:
+        raise ImportError(f"Archive '{archive}' can't be read: {e}")
+
+
+def check_bytecode_file(filename: str) -> None:
+    """
+    Raise ImportError if ``filename`` can't be a bytecode file: it
+    doesn't exist, isn't a file, or is too small.
+    """
+    if not osp.exists(filename):
+        raise ImportError(f"File name: '{filename}' doesn't exist")
+    elif not osp.isfile(filename):
+        raise ImportError(f"File name: '{filename}' isn't a file")
+    elif osp.getsize(filename) < 50:
+        raise ImportError(
+            "File name: '%s (%d bytes)' is too short to be a valid pyc file"
+            % (filename, osp.getsize(filename))
+        )
+
+
 def load_module(
     filename: str,
     code_objects=None,
     fast_load: bool = False,
     get_code: bool = True,
     save_file_offsets: bool = False,
+    cache=None,
+    limits=None,
+    track_roundtrip_metadata: bool = False,
+    intern_pool=None,
 ):
     """load a module without importing it.
     Parameters:
@@ -157,7 +218,10 @@ def load_module(
        code_objects: list of additional code_object from this
                      file. This might be a types.CodeType or one of
                      the portable xdis code types, e.g. Code38, Code3,
-                     Code2, etc. This can be empty.
+                     Code2, etc. This can be empty. If not given, a new
+                     dictionary is used for each call. When one registry
+                     is passed to many calls, an
+                     xdis.unmarshal.CodeObjectRegistry bounds its size.
 
        fast_load:    If True, then use Python's builtin loader. This can be done only if
                      the bytecode version matches the current bytecode interpreter.
@@ -168,6 +232,37 @@ def load_module(
                      version, etc. For that, set `get_code` to
                      `False`.
 
+       filename can also name a member of a zip archive such as a
+       wheel, egg or zipapp, separated from the archive's file name by
+       "!/", e.g. "dist.whl!/pkg/__pycache__/mod.cpython-311.pyc".
+       The member is read without extracting it.
+
+       limits:       An xdis.unmarshal.UnmarshalLimits bounding the work
+                     that unmarshalling may do, for untrusted input. If
+                     the bytecode goes past one of them,
+                     xdis.unmarshal.UnmarshalLimitError is raised.
+                     Without limits, input that is cut short raises
+                     ImportError like any other ill-formed file.
+                     Builtin marshal.loads() isn't used when limits are given.
+
+       track_roundtrip_metadata: If True, record in the code objects
+                     what xdis.marsh needs to write them back out byte for
+                     byte: the order of frozenset elements and which
+                     objects were marshaled as references. Leave this
+                     False when the code is only read, e.g. disassembled;
+                     loading is then faster and uses less memory.
+
+       intern_pool:  An xdis.unmarshal.StringInternPool. When loading many
+                     files, pass the same pool to each call so that names,
+                     file names and other strings they have in common are
+                     stored once. Results taken from ``cache`` don't use it.
+
+       cache:        An xdis.cache.CodeCache. If given, the result of
+                     loading is looked up there by the file's contents
+                     first, and stored there after loading. Code objects
+                     that Python's builtin loader handles are not cached,
+                     and the cache isn't used when ``limits`` are given.
+
     Return values are as follows:
         version_tuple: a tuple version number for the given magic_int,
                        e.g. (2, 7) or (3, 4)
@@ -184,26 +279,68 @@ def load_module(
                      none, then the timestamp and source_size will be invalid.
     """
 
-    # Some sanity checks
-    if not osp.exists(filename):
-        raise ImportError(f"File name: '{filename}' doesn't exist")
-    elif not osp.isfile(filename):
-        raise ImportError(f"File name: '{filename}' isn't a file")
-    elif osp.getsize(filename) < 50:
-        raise ImportError(
-            "File name: '%s (%d bytes)' is too short to be a valid pyc file"
-            % (filename, osp.getsize(filename))
-        )
+    # Untrusted input loaded with limits is always unmarshalled, so
+    # that the limits are checked.
+    use_cache = cache is not None and get_code and limits is None
+
+    archive_member = split_archive_path(filename)
+    if archive_member is None:
+        check_bytecode_file(filename)
+        if not use_cache:
+            with open(filename, "rb") as fp:
+                return load_module_from_file_object(
+                    fp,
+                    filename=filename,
+                    code_objects=code_objects,
+                    fast_load=fast_load,
+                    get_code=get_code,
+                    save_file_offsets=save_file_offsets,
+                    limits=limits,
+                    track_roundtrip_metadata=track_roundtrip_metadata,
+                    intern_pool=intern_pool,
+                )
+        with open(filename, "rb") as fp:
+            data = fp.read()
+    else:
+        data = read_archive_member(*archive_member)
+        if len(data) < 50:
+            raise ImportError(
+                "File name: '%s (%d bytes)' is too short to be a valid pyc file"
+                % (filename, len(data))
+            )
 
-    with open(filename, "rb") as fp:
-        return load_module_from_file_object(
-            fp,
-            filename=filename,
-            code_objects=code_objects,
-            fast_load=fast_load,
-            get_code=get_code,
-            save_file_offsets=save_file_offsets,
-        )
+    if use_cache:
+        key = cache.key(data, save_file_offsets, track_roundtrip_metadata, fast_load)
+        result = cache.get(key)
+        if result is not None:
+            if code_objects is not None:
+                register_code_objects(result[3], code_objects)
+            return result
+    result = load_module_from_file_object(
+        io.BytesIO(data),
+        filename=filename,
+        code_objects=code_objects,
+        fast_load=fast_load,
+        get_code=get_code,
+        save_file_offsets=save_file_offsets,
+        limits=limits,
+        track_roundtrip_metadata=track_roundtrip_metadata,
+        intern_pool=intern_pool,
+    )
+    if use_cache:
+        cache.put(key, result)
+    return result
+
+
+def register_code_objects(co, code_objects) -> None:
+    """
+    Add ``co`` and the code objects nested in it to ``code_objects``,
+    as unmarshalling them would have.
+    """
+    code_objects[str(co)] = co
+    for const in co.co_consts:
+        if iscode(const):
+            register_code_objects(const, code_objects)
 
 
 def load_module_from_file_object(
@@ -213,10 +350,15 @@ def load_module_from_file_object(
     fast_load=False,
     get_code=True,
     save_file_offsets=False,
+    limits=None,
+    track_roundtrip_metadata=True,
+    intern_pool=None,
 ):
     """load a module from a file object without importing it.
 
-    See :func:load_module for a list of return values.
+    See :func:load_module for a list of return values. Unlike
+    load_module(), roundtrip metadata is recorded by default, since this
+    is what code that rewrites bytecode files calls.
     """
 
     if code_objects is None:
@@ -224,6 +366,9 @@ def load_module_from_file_object(
 
     timestamp = 0
     file_offsets = {}
+    profiler = xdis.instrument.profiler
+    if profiler is not None:
+        header_span = profiler.begin("header")
     try:
         magic = fp.read(4)
         magic_int = magic2int(magic)
@@ -268,6 +413,8 @@ def load_module_from_file_object(
                 "supported." % (filename, versions[magic], magic2int(magic))
             )
         elif magic_int == 62135:
+            if profiler is not None:
+                profiler.end(header_span)
             fp.seek(0)
             return fix_dropbox_pyc(fp)
         elif magic_int == 62215:
@@ -317,6 +464,9 @@ def load_module_from_file_object(
                 ):
                     source_size = unpack("<I", fp.read(4))[0]  # size mod 2**32
 
+            if profiler is not None:
+                profiler.end(header_span)
+
             if get_code:
                 # Graal uses the same magic int for separate major/minor releases!
                 # So we can't get the major minor number using just a magic check.
@@ -333,12 +483,17 @@ def load_module_from_file_object(
                     is_graal = False
                 if save_file_offsets and not is_graal:
                     co, file_offsets = xdis.unmarshal.load_code_and_get_file_offsets(
-                        fp, magic_int, code_objects
+                        fp, magic_int, code_objects=code_objects, limits=limits
                     )
 
-                elif my_magic_int == magic_int and not is_graal:
+                elif my_magic_int == magic_int and not is_graal and limits is None:
                     bytecode = fp.read()
-                    co = marshal.loads(bytecode)
+                    if profiler is None:
+                        co = marshal.loads(bytecode)
+                    else:
+                        # Native unmarshalling is one span for the module.
+                        with profiler.span("unmarshal"):
+                            co = marshal.loads(bytecode)
                     # Python 3.10 returns a tuple here?
                     if isinstance(co, tuple):
                         co = co[0]
@@ -346,12 +501,26 @@ def load_module_from_file_object(
                 elif fast_load:
                     co = xdis.marsh.load(fp, magicint2version[magic_int])
                 else:
-                    co = xdis.unmarshal.load_code(fp, magic_int, code_objects)
+                    co = xdis.unmarshal.load_code(
+                        fp,
+                        magic_int,
+                        code_objects=code_objects,
+                        limits=limits,
+                        track_roundtrip_metadata=track_roundtrip_metadata,
+                        intern_pool=intern_pool,
+                    )
                 pass
             else:
                 co = None
         except NotImplementedError:
             raise
+        except xdis.unmarshal.UnmarshalLimitError:
+            # Without limits, running off the end of the input is just an
+            # ill-formed file.
+            if limits is not None:
+                raise
+            kind, msg = sys.exc_info()[0:2]
+            raise ImportError(f"Ill-formed bytecode file {filename}\n{kind}; {msg}")
         except Exception:
             kind, msg = sys.exc_info()[0:2]
             import traceback
@@ -390,6 +559,199 @@ def load_module_from_file_object(
     )
 
 
+def _init_load_worker() -> None:
+    """
+    Pool initializer: import the opcode tables once per worker rather
+    than on the first file each worker happens to get.
+    """
+    import xdis.op_imports  # noqa
+
+
+def _picklable_result(result: tuple):
+    co = result[3]
+    if isinstance(co, types.CodeType):
+        return "marshal", result[:3] + (marshal.dumps(co),) + result[4:]
+    return "ok", result
+
+
+def _load_module_task(filename: str, kwargs: dict):
+    """
+    Run load_module() in a pool worker.
+
+    Returns a (status, value) pair instead of raising so that one bad
+    file doesn't abort a batch. Native code objects can't be pickled
+    back to the parent, so they are sent marshaled.
+    """
+    try:
+        result = load_module(filename, **kwargs)
+    except Exception as e:
+        return "error", e
+    return _picklable_result(result)
+
+
+def _load_module_data_task(data: bytes, filename: str, kwargs: dict):
+    """
+    Like _load_module_task(), but for a file whose contents ``data``
+    have already been read.
+    """
+    try:
+        result = load_module_from_file_object(
+            io.BytesIO(data), filename=filename, **kwargs
+        )
+    except Exception as e:
+        return "error", e
+    return _picklable_result(result)
+
+
+def _load_module_result(task_result) -> Union[tuple, Exception]:
+    status, value = task_result
+    if status == "marshal":
+        return value[:3] + (marshal.loads(value[3]),) + value[4:]
+    return value
+
+
+def _is_free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _load_executor(workers: Optional[int]):
+    if _is_free_threaded():
+        return ThreadPoolExecutor(max_workers=workers, initializer=_init_load_worker)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_load_worker)
+
+
+def load_modules(
+    filenames: Iterable[str],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    fast_load: bool = False,
+    get_code: bool = True,
+    save_file_offsets: bool = False,
+    limits=None,
+    cache=None,
+    track_roundtrip_metadata: bool = False,
+    intern_pool=None,
+) -> Iterator[Union[tuple, Exception]]:
+    """Load many modules, spreading the work over a pool of workers.
+
+    Unmarshalling bytecode for a different Python version is CPU-bound
+    Python code, so by default a process pool is used. On a free-threaded
+    Python build, a thread pool is used instead.
+
+    Parameters:
+       filenames:   the bytecode files to load.
+
+       workers:     the number of workers; None lets the pool pick
+                    based on the number of CPUs. With 0 or 1,
+                    files are loaded one at a time in this process.
+
+       chunksize:   the number of files handed to a worker process at a
+                    time. Larger values cut down on interprocess overhead
+                    when there are many small files.
+
+       fast_load, get_code, save_file_offsets, cache, limits,
+       track_roundtrip_metadata: are passed on to :func:load_module.
+
+       intern_pool: is passed on to :func:load_module too, but can only be
+                    used when files are loaded in this process, that is,
+                    with ``workers`` 0 or 1.
+
+    The return value is an iterator giving, in the order of
+    ``filenames``, the tuple that :func:load_module would return for
+    that file. If loading a file fails, the exception it raised is
+    given in place of its tuple, and the remaining files are still loaded.
+    """
+    kwargs = {
+        "fast_load": fast_load,
+        "get_code": get_code,
+        "save_file_offsets": save_file_offsets,
+        "cache": cache,
+        "limits": limits,
+        "track_roundtrip_metadata": track_roundtrip_metadata,
+    }
+
+    if workers is not None and workers <= 1:
+        for filename in filenames:
+            try:
+                yield load_module(filename, intern_pool=intern_pool, **kwargs)
+            except Exception as e:
+                yield e
+        return
+
+    if intern_pool is not None:
+        raise ValueError("intern_pool can't be shared with worker processes")
+
+    filenames = list(filenames)
+    with _load_executor(workers) as executor:
+        for task_result in executor.map(
+            _load_module_task,
+            filenames,
+            [kwargs] * len(filenames),
+            chunksize=chunksize,
+        ):
+            yield _load_module_result(task_result)
+
+
+def load_archive_modules(
+    archive: str,
+    workers: Optional[int] = 0,
+    chunksize: int = 1,
+    fast_load: bool = False,
+    get_code: bool = True,
+    save_file_offsets: bool = False,
+    limits=None,
+    track_roundtrip_metadata: bool = False,
+) -> Iterator[Tuple[str, Union[tuple, Exception]]]:
+    """Load the bytecode files in zip archive ``archive``, such as a
+    wheel, egg or zipapp, without extracting them.
+
+    For each .pyc or .pyo member, in archive order, a pair is given:
+    the member's name in "archive!/member" form, which load_module()
+    also accepts, and what :func:load_modules would give for it.
+
+    Members are read here. With ``workers`` other than 0 or 1, they are
+    unmarshalled on a pool of workers as in :func:load_modules, and
+    ``chunksize`` is the number of members handed to a worker at a time.
+    """
+    kwargs = {
+        "fast_load": fast_load,
+        "get_code": get_code,
+        "save_file_offsets": save_file_offsets,
+        "limits": limits,
+        "track_roundtrip_metadata": track_roundtrip_metadata,
+    }
+    with zipfile.ZipFile(archive) as zf:
+        members = [
+            info.filename
+            for info in zf.infolist()
+            if not info.is_dir() and is_bytecode_extension(info.filename)
+        ]
+        filenames = [archive + ARCHIVE_MEMBER_SEP + member for member in members]
+
+        if workers is not None and workers <= 1:
+            for filename, member in zip(filenames, members):
+                task_result = _load_module_data_task(
+                    zf.read(member), filename, kwargs
+                )
+                yield filename, _load_module_result(task_result)
+            return
+
+        datas = (zf.read(member) for member in members)
+        with _load_executor(workers) as executor:
+            for filename, task_result in zip(
+                filenames,
+                executor.map(
+                    _load_module_data_task,
+                    datas,
+                    filenames,
+                    [kwargs] * len(filenames),
+                    chunksize=chunksize,
+                ),
+            ):
+                yield filename, _load_module_result(task_result)
+
+
 def write_bytecode_file(
     bytecode_path,
     code_obj,
@@ -397,9 +759,13 @@ def write_bytecode_file(
     compilation_ts=None,
     filesize: int = 0,
     allow_native: bool = True,
+    optimize_refs: bool = False,
 ) -> None:
     """Write bytecode file _bytecode_path_, with code for having Python
     magic_int (i.e. bytecode associated with some version of Python)
+
+    ``optimize_refs`` is passed on to xdis.marsh.dump() when code_obj
+    isn't a native code object.
     """
     fp = open(bytecode_path, "wb")
     version_tuple = py_str2tuple(magicint2version[magic_int])
@@ -426,19 +792,11 @@ def write_bytecode_file(
     if allow_native and isinstance(code_obj, types.CodeType):
         fp.write(marshal.dumps(code_obj))
     else:
-        code_sequence = xdis.marsh.dumps(code_obj, python_version=version_tuple)
-        if isinstance(code_sequence, str):
-            # Python 1.x uses code strings, not bytes. To get this into bytes needed by
-            # fp.write, encode the string using 'latin-1' and 'unicode_escape' to convert escape sequences
-            # into the raw byte values. 'latin-1' is a single-byte encoding that works well for this.
-            code_bytes = (
-                code_sequence.encode("latin-1")
-                .decode("unicode_escape")
-                .encode("latin-1")
-            )
-        else:
-            code_bytes = code_sequence
-        fp.write(code_bytes)
+        # Stream the marshaled code straight to the file rather than
+        # building the entire serialized module in memory first.
+        xdis.marsh.dump(
+            code_obj, fp, python_version=version_tuple, optimize_refs=optimize_refs
+        )
     fp.close()
 
 
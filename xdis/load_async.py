@@ -0,0 +1,156 @@
+# Copyright (c) 2025 by Rocky Bernstein
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+
+"""
+asyncio versions of load_module().
+
+These are for bytecode files on storage where reading is slow compared
+to unmarshalling, such as a network file system. Reading a file is done
+in the event loop's default thread pool so that many reads can be
+outstanding at once; unmarshalling is done in ``executor``, which bounds
+the CPU work. If ``executor`` is None, the default thread pool is used
+for that too. Since results are passed back in a form that can be
+pickled, ``executor`` can be a concurrent.futures.ProcessPoolExecutor.
+
+This module isn't imported by ``import xdis`` so that programs that don't
+use it don't pay for importing asyncio.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterable, Optional, Union
+
+from xdis.load import _load_module_data_task, _load_module_result
+
+
+def _read_bytecode_file(filename: str, opener: Callable) -> bytes:
+    """
+    Read ``filename`` with ``opener``, raising ImportError the way
+    check_bytecode_file() does. The checks are made on what ``opener``
+    gives back rather than on the local file system, since ``opener``
+    might read from somewhere else.
+    """
+    try:
+        fp = opener(filename, "rb")
+    except FileNotFoundError:
+        raise ImportError(f"File name: '{filename}' doesn't exist")
+    except IsADirectoryError:
+        raise ImportError(f"File name: '{filename}' isn't a file")
+    with fp:
+        data = fp.read()
+    if len(data) < 50:
+        raise ImportError(
+            "File name: '%s (%d bytes)' is too short to be a valid pyc file"
+            % (filename, len(data))
+        )
+    return data
+
+
+async def load_module_async(
+    filename: str,
+    executor: Optional[Executor] = None,
+    fast_load: bool = False,
+    get_code: bool = True,
+    save_file_offsets: bool = False,
+    limits=None,
+    opener: Callable = open,
+    track_roundtrip_metadata: bool = False,
+) -> tuple:
+    """
+    Coroutine version of :func:xdis.load.load_module.
+
+    ``opener`` is called like the builtin open() to read ``filename``.
+    The other parameters and the return value are the same as for
+    load_module().
+    """
+    loop = asyncio.get_running_loop()
+    # Reads go to the loop's default thread pool, so they can overlap with
+    # unmarshalling going on in ``executor``.
+    data = await loop.run_in_executor(None, _read_bytecode_file, filename, opener)
+    kwargs = {
+        "fast_load": fast_load,
+        "get_code": get_code,
+        "save_file_offsets": save_file_offsets,
+        "limits": limits,
+        "track_roundtrip_metadata": track_roundtrip_metadata,
+    }
+    result = _load_module_result(
+        await loop.run_in_executor(
+            executor, _load_module_data_task, data, filename, kwargs
+        )
+    )
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+async def load_many(
+    filenames: Iterable[str],
+    concurrency: int = 64,
+    executor: Optional[Executor] = None,
+    fast_load: bool = False,
+    get_code: bool = True,
+    save_file_offsets: bool = False,
+    limits=None,
+    opener: Callable = open,
+    track_roundtrip_metadata: bool = False,
+) -> AsyncIterator[Union[tuple, Exception]]:
+    """
+    Asynchronously load many modules, with at most ``concurrency`` of
+    them being read or unmarshalled at a time.
+
+    Like :func:xdis.load.load_modules, results are given in the order of
+    ``filenames``, and if loading a file fails, the exception it raised is
+    given in place of its load_module() tuple.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1; got {concurrency}")
+
+    def start(filename: str) -> asyncio.Task:
+        return asyncio.ensure_future(
+            load_module_async(
+                filename,
+                executor=executor,
+                fast_load=fast_load,
+                get_code=get_code,
+                save_file_offsets=save_file_offsets,
+                limits=limits,
+                opener=opener,
+                track_roundtrip_metadata=track_roundtrip_metadata,
+            )
+        )
+
+    pending = deque()
+    filenames = iter(filenames)
+    try:
+        for filename in filenames:
+            pending.append(start(filename))
+            if len(pending) >= concurrency:
+                break
+
+        while pending:
+            task = pending.popleft()
+            try:
+                result = await task
+            except Exception as e:
+                result = e
+            filename = next(filenames, None)
+            if filename is not None:
+                pending.append(start(filename))
+            yield result
+    finally:
+        for task in pending:
+            task.cancel()
@@ -24,6 +24,7 @@ there). Details of the format may change between Python versions.
 
 """
 
+import io
 import struct
 import types
 from sys import intern
@@ -34,6 +35,7 @@ from xdis.codetype import Code2, Code3, Code15
 from xdis.unmarshal import (
     FLAG_REF,
     TYPE_ASCII,
+    TYPE_ASCII_INTERNED,
     TYPE_BINARY_COMPLEX,
     TYPE_BINARY_FLOAT,
     TYPE_CODE,
@@ -77,6 +79,69 @@ except ImportError:
         return f
 
 
+def _value_key(x) -> tuple:
+    """
+    Return a hashable key such that two objects marshal identically
+    exactly when their keys are equal.
+
+    Plain ``==`` is not good enough: 1 == 1.0 == True, and
+    0.0 == -0.0.  Mutable containers and code objects are compared by
+    identity.
+    """
+    if isinstance(x, (str, bytes, bool, int)):
+        return (type(x), x)
+    elif isinstance(x, float):
+        return (float, struct.pack("<d", x))
+    elif isinstance(x, complex):
+        return (complex, struct.pack("<dd", x.real, x.imag))
+    elif isinstance(x, tuple):
+        return (tuple, tuple(_value_key(item) for item in x))
+    elif isinstance(x, frozenset):
+        return (frozenset, frozenset(_value_key(item) for item in x))
+    elif x is None or x is Ellipsis or x is StopIteration:
+        return (x,)
+    return (type(x), id(x))
+
+
+def _ref_key(x) -> Optional[tuple]:
+    """
+    Like _value_key(), but None for objects that marshal never writes
+    as a reference, the way marshal.c's w_object() handles singletons
+    before calling w_ref().
+    """
+    if x is None or x is Ellipsis or x is StopIteration or isinstance(x, bool):
+        return None
+    return _value_key(x)
+
+
+# Kinds of variables in co_localspluskinds, from Include/internal/pycore_code.h.
+CO_FAST_LOCAL = 0x20
+CO_FAST_CELL = 0x40
+CO_FAST_FREE = 0x80
+
+
+def localsplus(code) -> tuple:
+    """
+    Return the co_localsplusnames tuple and co_localspluskinds bytes
+    that Python 3.11 and later marshal in place of co_varnames,
+    co_cellvars and co_freevars. This is the inverse of what the
+    unmarshaller does to split them out.
+    """
+    cellvars = set(code.co_cellvars)
+    names = list(code.co_varnames)
+    kinds = [
+        CO_FAST_LOCAL | CO_FAST_CELL if name in cellvars else CO_FAST_LOCAL
+        for name in names
+    ]
+    for name in code.co_cellvars:
+        if name not in code.co_varnames:
+            names.append(name)
+            kinds.append(CO_FAST_CELL)
+    names += code.co_freevars
+    kinds += [CO_FAST_FREE] * len(code.co_freevars)
+    return tuple(names), bytes(kinds)
+
+
 class _Marshaller:
     """Python marshalling routine that runs in Python 2 and Python 3.
     We also extend to allow for xdis Code15, Code2, and Code3 types and instances.
@@ -91,6 +156,7 @@ class _Marshaller:
         is_pypy: Optional[bool] = None,
         collection_order={},
         reference_objects=set(),
+        optimize_refs: bool = False,
     ) -> None:
         self._write = writefunc
         self.collection_order = collection_order
@@ -100,7 +166,98 @@ class _Marshaller:
         self.python_version = python_version
         self.reference_objects = reference_objects
 
+        # When optimize_refs is set, instead of relying on the
+        # reference information saved from unmarshalling, we decide
+        # which objects to share by counting how often each one
+        # occurs. This is only possible in marshal version 3 and
+        # later, Python 3.4+.
+        self.optimize_refs = optimize_refs and python_version >= (3, 4)
+        self.ref_counts: Dict[tuple, int] = {}
+        self.refs: Dict[tuple, int] = {}
+        self.pending_flag_ref = 0
+        if self.optimize_refs:
+            self._write_unflagged = writefunc
+            self._write = self.write_flagged
+
+    def count_refs(self, x) -> None:
+        """
+        Pre-pass for optimize_refs: count the number of times each
+        object would be written out in marshaling ``x``. Objects seen
+        more than once get FLAG_REF set when first written, and are
+        written as TYPE_REF after that.
+
+        The contents of an object are counted only the first time it
+        is seen, since later occurrences are written as references.
+        """
+        stack = [x]
+        while stack:
+            obj = stack.pop()
+            key = _ref_key(obj)
+            if key is None:
+                continue
+            count = self.ref_counts.get(key, 0)
+            self.ref_counts[key] = count + 1
+            if count:
+                continue
+            if hasattr(obj, "co_code"):
+                stack.extend(
+                    (
+                        obj.co_code,
+                        obj.co_consts,
+                        obj.co_names,
+                        obj.co_varnames,
+                        obj.co_freevars,
+                        obj.co_cellvars,
+                        obj.co_filename,
+                        obj.co_name,
+                    )
+                )
+            elif isinstance(obj, dict):
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            elif isinstance(obj, (tuple, list, set, frozenset)):
+                stack.extend(obj)
+
+    def w_ref(self, x) -> bool:
+        """
+        Write ``x`` as a TYPE_REF if it has been written before and
+        return True. Otherwise, if ``x`` occurs more than once, arrange
+        for FLAG_REF to be set in the type code written next and
+        return False. The name follows marshal.c.
+        """
+        key = _ref_key(x)
+        if key is None:
+            return False
+        ref = self.refs.get(key)
+        if ref is not None:
+            self.dump_ref(ref)
+            return True
+        if self.ref_counts.get(key, 0) > 1:
+            self.refs[key] = len(self.refs)
+            self.pending_flag_ref = FLAG_REF
+        return False
+
+    def write_flagged(self, s) -> None:
+        """
+        Write function used in optimize_refs mode. The first byte
+        after w_ref() has decided an object is shared is the object's
+        type code, so FLAG_REF gets or'd into that.
+        """
+        if self.pending_flag_ref:
+            self.pending_flag_ref = 0
+            if isinstance(s, str):
+                s = chr(ord(s[0]) | FLAG_REF) + s[1:]
+            else:
+                s = bytes((s[0] | FLAG_REF,)) + bytes(s[1:])
+        self._write_unflagged(s)
+
     def dump(self, x, flag_ref: int = 0) -> None:
+        if self.optimize_refs:
+            if self.w_ref(x):
+                return
+            # References are decided above, not by the
+            # individual dump routines.
+            flag_ref = 0
         if (
             isinstance(x, types.CodeType)
             and PYTHON_VERSION_TRIPLE[:2] != self.python_version[:2]
@@ -138,7 +295,7 @@ class _Marshaller:
 
     dispatch[TYPE_ASCII] = dump_ascii
 
-    def dump_binary_complex(self, x) -> None:
+    def dump_binary_complex(self, x, flag_ref: int = 0) -> None:
         write = self._write
         write(TYPE_BINARY_COMPLEX)
         write(struct.pack("<d", x.real))
@@ -146,12 +303,12 @@ class _Marshaller:
 
     dispatch[TYPE_BINARY_COMPLEX] = dump_binary_complex
 
-    def dump_binary_float(self, x) -> None:
+    def dump_binary_float(self, x, flag_ref: int = 0) -> None:
         write = self._write
         write(TYPE_BINARY_FLOAT)
         write(struct.pack("<d", x))
 
-    def dump_bool(self, x) -> None:
+    def dump_bool(self, x, flag_ref: int = 0) -> None:
         if x:
             self._write(TYPE_TRUE)
         else:
@@ -196,7 +353,7 @@ class _Marshaller:
 
     dispatch[Code15] = dump_code15
 
-    def dump_code2(self, x, _) -> None:
+    def dump_code2(self, x, _=0) -> None:
         # Careful here: many Python 2 code objects are strings,
         # but Python 3 marshaling, by default, will dump strings as
         # unicode. Force marsaling this type as string.
@@ -257,7 +414,7 @@ class _Marshaller:
             self._write(TYPE_CODE)
 
         self.w_long(code.co_argcount)
-        if hasattr(code, "co_posonlyargcount"):
+        if self.python_version >= (3, 8):
             self.w_long(code.co_posonlyargcount)
         self.w_long(code.co_kwonlyargcount)
         if self.python_version < (3, 11):
@@ -267,16 +424,25 @@ class _Marshaller:
         self.dump(code.co_code)
         self.dump(code.co_consts, flag_ref)
         self.dump_names(code.co_names, flag_ref)
-        self.dump_names(code.co_varnames, flag_ref)
-        self.dump_names(code.co_freevars, flag_ref)
-        self.dump_names(code.co_cellvars, flag_ref)
+        if self.python_version >= (3, 11):
+            localsplusnames, localspluskinds = localsplus(code)
+            self.dump_names(localsplusnames, flag_ref)
+            self.dump_linetable(localspluskinds)
+        else:
+            self.dump_names(code.co_varnames, flag_ref)
+            self.dump_names(code.co_freevars, flag_ref)
+            self.dump_names(code.co_cellvars, flag_ref)
         self.dump_filename(code.co_filename, flag_ref)
         self.dump_name(code.co_name, flag_ref)
+        if self.python_version >= (3, 11):
+            self.dump_name(code.co_qualname, flag_ref)
         self.w_long(code.co_firstlineno)
 
         # 3.10 and greater uses co_linetable.
         linetable = code.co_linetable if hasattr(code, "co_linetable") else code.co_lnotab
         self.dump_linetable(linetable)
+        if self.python_version >= (3, 11):
+            self.dump_linetable(code.co_exceptiontable)
 
     dispatch[Code3] = dump_code3
 
@@ -314,7 +480,7 @@ class _Marshaller:
     except NameError:
         pass
 
-    def dump_dict(self, x) -> None:
+    def dump_dict(self, x, flag_ref: int = 0) -> None:
         self._write(TYPE_DICT)
         for key, value in x.items():
             self.dump(key)
@@ -323,7 +489,7 @@ class _Marshaller:
 
     dispatch[dict] = dump_dict
 
-    def dump_ellipsis(self, _) -> None:
+    def dump_ellipsis(self, _, flag_ref: int = 0) -> None:
         self._write(TYPE_ELLIPSIS)
 
     try:
@@ -331,7 +497,7 @@ class _Marshaller:
     except NameError:
         pass
 
-    def dump_float(self, x) -> None:
+    def dump_float(self, x, flag_ref: int = 0) -> None:
         write = self._write
         write(TYPE_FLOAT)
         s = repr(x)
@@ -342,7 +508,9 @@ class _Marshaller:
     dispatch[TYPE_BINARY_FLOAT] = dump_float
 
     def dump_filename(self, path, flag_ref: int = 0) -> None:
-        if flag_ref:
+        if self.optimize_refs:
+            self.dump(path)
+        elif flag_ref:
             # After Python 3.4 which adds the ref flag and ASCII marshal types..
             if len(path) < 256:
                 self.dump_short_ascii(path)
@@ -364,8 +532,9 @@ class _Marshaller:
         pass
 
     def dump_linetable(self, s) -> None:
-        type_code = TYPE_STRING if self.python_version < (3, 5) else TYPE_UNICODE
-        self._write(type_code)
+        # Line tables are bytes objects, which marshal always writes
+        # as TYPE_STRING.
+        self._write(TYPE_STRING)
         self.w_long(len(s))
         self._write(s)
 
@@ -384,7 +553,9 @@ class _Marshaller:
         self.w_long(x >> 32)
 
     def dump_name(self, name: str, flag_ref: int) -> None:
-        if flag_ref:
+        if self.optimize_refs:
+            self.dump(name)
+        elif flag_ref:
             if len(name) < 256:
                 self.dump_short_ascii_interned(name)
             else:
@@ -395,7 +566,9 @@ class _Marshaller:
 
     def dump_names(self, names, flag_ref: int) -> None:
         n = len(names)
-        if flag_ref:
+        if self.optimize_refs:
+            self.dump(names)
+        elif flag_ref:
 
             # We have reference objects. Has "names" already been seen as a reference object?
             if names in self.intern_objects:
@@ -455,7 +628,7 @@ class _Marshaller:
 
     dispatch[int] = dump_int
 
-    def dump_list(self, x) -> None:
+    def dump_list(self, x, flag_ref: int = 0) -> None:
         self._write(TYPE_LIST)
         self.w_long(len(x))
         for item in x:
@@ -463,7 +636,7 @@ class _Marshaller:
 
     dispatch[list] = dump_list
 
-    def dump_long(self, x) -> None:
+    def dump_long(self, x, flag_ref: int = 0) -> None:
         self._write(TYPE_LONG)
         sign = 1
         if x < 0:
@@ -488,7 +661,7 @@ class _Marshaller:
         self._write(TYPE_REF)
         self.w_long(ref)
 
-    def dump_set(self, s: Set[Any]) -> None:
+    def dump_set(self, s: Set[Any], flag_ref: int = 0) -> None:
         """
         Save marshalled version of set s.
         """
@@ -544,7 +717,7 @@ class _Marshaller:
 
     dispatch[TYPE_SMALL_TUPLE] = dump_small_tuple
 
-    def dump_stopiter(self, x) -> None:
+    def dump_stopiter(self, x, flag_ref: int = 0) -> None:
         if x is not StopIteration:
             raise ValueError("unmarshallable object")
         self._write(TYPE_STOPITER)
@@ -587,6 +760,9 @@ class _Marshaller:
     dispatch[TYPE_LIST] = dump_tuple
 
     def dump_unicode(self, s, flag_ref: int = 0) -> None:
+        if self.optimize_refs:
+            self.dump_unicode_compact(s)
+            return
         if self.python_version < (2, 0):
             type_code = TYPE_STRING
         elif (2, 0) <= self.python_version < (3, 0):
@@ -608,6 +784,29 @@ class _Marshaller:
         self.w_long(len(s))
         self._write(s)
 
+    def dump_unicode_compact(self, s: str) -> None:
+        """
+        Write a string the way marshal.c does in Python 3.4 and
+        later: ASCII strings use the ASCII type codes, with
+        the interned variants for identifier-like strings.
+        """
+        if s.isascii():
+            interned = s.isidentifier()
+            if len(s) < 256:
+                type_code = TYPE_SHORT_ASCII_INTERNED if interned else TYPE_SHORT_ASCII
+                self._write(type_code)
+                self._write(chr(len(s)))
+            else:
+                type_code = TYPE_ASCII_INTERNED if interned else TYPE_ASCII
+                self._write(type_code)
+                self.w_long(len(s))
+            self._write(s)
+        else:
+            encoded = s.encode("utf-8", "surrogatepass")
+            self._write(TYPE_UNICODE)
+            self.w_long(len(encoded))
+            self._write(encoded)
+
     try:
         unicode
     except NameError:
@@ -1171,6 +1370,53 @@ _load_dispatch = _FastUnmarshaller.dispatch
 version = 1
 
 
+def _to_bytes(piece, python_version: tuple) -> bytes:
+    """
+    Convert a single piece handed to ``_Marshaller._write`` into bytes.
+
+    _Marshaller writes a mixture of ``str`` pieces, where each character
+    stands for a byte, and ``bytes`` pieces. For Python 2.x string
+    output, characters outside of latin-1 are written as UTF-8.
+    """
+    if isinstance(piece, str):
+        if python_version and (2, 0) <= python_version < (3, 0):
+            try:
+                return piece.encode("latin-1")
+            except ValueError:
+                return piece.encode("utf-8")
+        return piece.encode("latin-1")
+    elif isinstance(piece, bytearray):
+        return bytes(piece)
+    return piece
+
+
+class _StreamWriter:
+    """
+    Incremental writer used by :func:`dump`.
+
+    Pieces written by _Marshaller are converted to bytes and collected
+    in a small buffer which is flushed to the underlying binary file
+    object whenever it grows past ``buffer_size``. So memory use stays
+    bounded no matter how large the object being marshalled is.
+    """
+
+    def __init__(self, fp, python_version: tuple, buffer_size: int = 1 << 16) -> None:
+        self.fp = fp
+        self.python_version = python_version
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+
+    def write(self, piece) -> None:
+        self.buffer += _to_bytes(piece, self.python_version)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.fp.write(self.buffer)
+            self.buffer = bytearray()
+
+
 @builtinify
 def dump(
     x,
@@ -1178,10 +1424,46 @@ def dump(
     version: int = version,
     python_version: tuple = PYTHON_VERSION_TRIPLE,
     is_pypy: Optional[bool] = None,
+    optimize_refs: bool = False,
 ) -> None:
+    """
+    Marshal ``x`` as bytecode for ``python_version`` and write it to
+    the binary file object ``f``.
+
+    Output is streamed to ``f`` as it is produced, rather than being
+    built up in memory first.
+
+    If ``optimize_refs`` is True, objects that occur more than once,
+    such as names, filenames and constants, are written once and
+    shared via references, as CPython does for Python 3.4 and later.
+    Use this for code objects built or changed in memory, which have
+    no reference information saved from unmarshalling.
+    """
     # XXX 'version' is ignored, we always dump in a version-0-compatible format
-    m = _Marshaller(f.write, python_version, is_pypy)
-    m.dump(x)
+    writer = _StreamWriter(f, python_version)
+    collection_order = x.collection_order if hasattr(x, "collection_order") else {}
+    reference_objects = (
+        x.reference_objects if hasattr(x, "reference_objects") else set()
+    )
+    m = _Marshaller(
+        writer.write,
+        python_version=python_version,
+        is_pypy=is_pypy,
+        collection_order=collection_order,
+        reference_objects=reference_objects,
+        optimize_refs=optimize_refs,
+    )
+    if m.optimize_refs:
+        m.count_refs(x)
+        key = _ref_key(x)
+        if hasattr(x, "co_code") and key is not None:
+            # CPython always has FLAG_REF on the module code object,
+            # and load_module() uses that to tell CPython 3.12 from
+            # RustPython, which share a magic number.
+            m.ref_counts[key] += 1
+    flag_ref = FLAG_REF if python_version >= (3, 4) else 0
+    m.dump(x, flag_ref)
+    writer.flush()
 
 
 @builtinify
@@ -1195,66 +1477,17 @@ def dumps(
     x,
     python_version: tuple[int, ...] = PYTHON_VERSION_TRIPLE,
     is_pypy: Optional[bool] = None,
-) -> bytes | str:
-    buffer = []
-    collection_order = x.collection_order if hasattr(x, "collection_order") else {}
-    reference_objects = (
-        x.reference_objects if hasattr(x, "reference_objects") else set()
-    )
-    m = _Marshaller(
-        buffer.append,
+    optimize_refs: bool = False,
+) -> bytes:
+    buffer = io.BytesIO()
+    dump(
+        x,
+        buffer,
         python_version=python_version,
         is_pypy=is_pypy,
-        collection_order=collection_order,
-        reference_objects=reference_objects,
+        optimize_refs=optimize_refs,
     )
-    flag_ref = FLAG_REF if python_version >= (3, 4) else 0
-    m.dump(x, flag_ref)
-    if python_version:
-        is_python3 = python_version >= (3, 0)
-    else:
-        is_python3 = True
-
-    if is_python3:
-        if PYTHON_VERSION_TRIPLE >= (3, 0):
-            # Python 3.x handling  Python 3.x
-            buf = []
-            for b in buffer:
-                if isinstance(b, str):
-                    s2b = bytes(ord(b[j]) for j in range(len(b)))
-                    buf.append(s2b)
-                elif isinstance(b, bytearray):
-                    buf.append(str(b))
-                else:
-                    buf.append(b)
-            return b"".join(buf)
-        else:
-            # Python 2.x handling Python 3.x
-            buf = b""
-            for b in buffer:
-                buf += b.decode(errors="ignore")
-                pass
-            return buf
-    else:
-        # Python 2 or 3 handling Python 2.x
-        buf = []
-        for b in buffer:
-            if isinstance(b, str):
-                if python_version < (2, 0):
-                    # Python 1.x has no notion of Unicode. It uses strings.
-                    buf.append(b)
-                else:
-                    try:
-                        s2b = bytes(ord(b[j]) for j in range(len(b)))
-                    except ValueError:
-                        s2b = b.encode("utf-8")
-                    buf.append(s2b)
-            elif isinstance(b, bytearray):
-                buf.append(str(b))
-            else:
-                buf.append(b)
-
-        return b"".join(buf)
+    return buffer.getvalue()
 
 
 @builtinify
@@ -129,7 +129,16 @@ JAVA_MARSHAL_SHIFT = 15
 JAVA_MARSHAL_BASE = 1 << JAVA_MARSHAL_SHIFT
 
 class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
-    def __init__(self, fp, magic_int, bytes_for_s, code_objects={}) -> None:
+    def __init__(
+        self,
+        fp,
+        magic_int,
+        bytes_for_s,
+        code_objects=None,
+        limits=None,
+        track_roundtrip_metadata: bool = True,
+        intern_pool=None,
+    ) -> None:
         """
         Marshal versions:
             2: [2.5, 3.4a0) (self.magic_int: 62071 until 3250)
@@ -141,7 +150,9 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         """
         self.fp = fp
         self.magic_int = magic_int
-        self.code_objects = code_objects
+        self.track_roundtrip_metadata = track_roundtrip_metadata
+        self.intern_pool = intern_pool
+        self.code_objects = {} if code_objects is None else code_objects
 
         # Save a list of offsets in the bytecode file where code
         # objects starts.
@@ -181,6 +192,8 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         self.graal_code_info = {}
 
         self.UNMARSHAL_DISPATCH_TABLE = UNMARSHAL_DISPATCH_TABLE
+        self.init_dispatch()
+        self.init_limits(limits)
 
 
     # Python equivalents for graal unmarshal routines.
@@ -235,7 +248,8 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         Reads a marshaled big integer from the input stream.
         """
         negative = False
-        sz = self.read_uint32() # Get the size in shorts
+        # Get the size in shorts
+        sz = self.check_read_size(self.read_uint32(), "big integer", 2)
         if sz < 0:
             negative = True
             sz = -sz
@@ -243,7 +257,7 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         # size is in shorts, convert to size in bytes
         sz *= 2
 
-        data = bytes([self.graal_readByte() for _ in range(sz)])
+        data = self.graal_readExactly(sz)
 
         i = 0
 
@@ -277,47 +291,62 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         Python equivalent of Python Graal's readBooleanArray() from
         MarshalModuleBuiltins.java
         """
-        length: int = self.read_uint32()
-        return tuple([bool(self.graal_readByte()) for _ in range(length)])
+        length: int = self.check_container_length(self.read_uint32(), "array")
+        return tuple(map(bool, self.graal_readExactly(length)))
 
     def graal_readByte(self) -> int:
         """
         Python equivalent of Python Graal's readBytes() from
         MarshalModuleBuiltins.java
         """
-        return ord(unpack("c", self.fp.read(1))[0])
+        return self.graal_readExactly(1)[0]
 
     def graal_readBytes(self) -> bytes:
         """
         Python equivalent of Python Graal's readBytes() from
         MarshalModuleBuiltins.java
         """
-        length: int = self.read_uint32()
-        return bytes([self.graal_readByte() for _ in range(length)])
+        length: int = self.check_read_size(self.read_uint32(), "bytes")
+        return self.graal_readExactly(length)
+
+    def graal_readExactly(self, n: int) -> bytes:
+        """
+        Read ``n`` bytes in one go. Arrays are read this way rather
+        than an element at a time.
+        """
+        data = self.fp.read(n)
+        if len(data) != n:
+            raise EOFError(
+                f"expected {n} bytes at offset {self.fp.tell() - len(data)}; "
+                f"got {len(data)}"
+            )
+        return data
 
     def graal_readDoubleArray(self) -> tuple[float, ...]:
         """
         Python equivalent of Python Graal's readDoubleArray() from
         MarshalModuleBuiltins.java
         """
-        length: int = self.read_uint32()
-        return tuple([self.read_float() for _ in range(length)])
+        length: int = self.check_container_length(self.read_uint32(), "array", 8)
+        return unpack(f"<{length}d", self.graal_readExactly(8 * length))
 
     def graal_readIntArray(self) -> tuple[int, ...]:
         """
         Python equivalent of Python Graal's readIntArray() from
         MarshalModuleBuiltins.java
         """
-        length: int = self.read_uint32()
-        return tuple([self.read_int32() for _ in range(length)])
+        length: int = self.check_container_length(self.read_uint32(), "array", 4)
+        return unpack(f"<{length}i", self.graal_readExactly(4 * length))
 
     def graal_readLongArray(self) -> tuple[int, ...]:
         """
         Python equivalent of Python Graal's readLong() from
         MarshalModuleBuiltins.java
         """
-        length: int = int(unpack("<i", self.fp.read(4))[0])
-        return tuple([self.read_float() for _ in range(length)])
+        length: int = self.check_container_length(
+            int(unpack("<i", self.fp.read(4))[0]), "array", 8
+        )
+        return unpack(f"<{length}q", self.graal_readExactly(8 * length))
 
     def graal_readObjectArray(self) -> tuple:
         """
@@ -325,7 +354,9 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         MarshalModuleBuiltins.java
         """
 
-        length: int = int(unpack("<i", self.fp.read(4))[0])
+        length: int = self.check_container_length(
+            int(unpack("<i", self.fp.read(4))[0]), "array"
+        )
         # # Debug code
         # result = []
         # for i in range(length):
@@ -341,7 +372,7 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         Python equvalent of Python Graal's readString() from
         MarshalModuleBuiltins.java
         """
-        strsize: int = self.read_uint32()
+        strsize: int = self.check_read_size(self.read_uint32(), "string")
         return self.fp.read(strsize).decode("utf-8", errors="ignore")
 
     def graal_readStringArray(self) -> tuple[str, ...]:
@@ -349,7 +380,7 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
         Python equvalent of Python Graal's readObjectArray() from
         MarshalModuleBuiltins.java
         """
-        length: int = self.read_uint32()
+        length: int = self.check_container_length(self.read_uint32(), "array", 4)
         return tuple([self.graal_readString() for _ in range(length)])
 
     def graal_readSparseTable(self) -> Dict[int, tuple]:
@@ -365,6 +396,18 @@ class VersionIndependentUnmarshallerGraal(VersionIndependentUnmarshaller):
                 return table
             table[i] = self.graal_readIntArray()
 
+    def t_object_reference(self, save_ref=None, bytes_for_s: bool = False):
+        """
+        Graal numbers its references differently from us around nested
+        code units, so a reference to 0 does not mean the first object
+        we saved. Until that is worked out, treat it like any other
+        out-of-range reference and use the last object saved.
+        """
+        refnum = self.read_uint32()
+        if not (0 < refnum < len(self.intern_objects)):
+            return self.intern_objects[-1]
+        return self.intern_objects[refnum]
+
     def t_code_graal(self, save_ref, bytes_for_s: bool = False):
         """
         Graal Python code. This has fewer fields than Python
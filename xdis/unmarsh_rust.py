@@ -24,10 +24,13 @@ you can use Python's built-in ``marshal.loads()`` to produce a code
 object.
 """
 
-from typing import Any, Dict, List, Tuple, Union
+import sys
+from array import array
+from typing import Any, Dict, Tuple, Union
 
 from xdis.codetype.code312rust import Code312Rust
-from xdis.codetype.code313rust import Code313Rust, SourceLocation
+from xdis.codetype.code312rust import SourceLocation as SourceLocation312
+from xdis.codetype.code313rust import Code313Rust, SourceLocations
 from xdis.magics import magic_int2tuple
 from xdis.unmarshal import (
     TYPE_ASCII,
@@ -118,7 +121,16 @@ class MarshalError(Exception):
     pass
 
 class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
-    def __init__(self, fp, magic_int, bytes_for_s, code_objects={}) -> None:
+    def __init__(
+        self,
+        fp,
+        magic_int,
+        bytes_for_s,
+        code_objects=None,
+        limits=None,
+        track_roundtrip_metadata: bool = True,
+        intern_pool=None,
+    ) -> None:
         """
         Marshal versions:
             4: [3.4a3, 3.13) (self.magic_int: 3280 onwards)
@@ -128,7 +140,9 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
         """
         self.fp = fp
         self.magic_int = magic_int
-        self.code_objects = code_objects
+        self.track_roundtrip_metadata = track_roundtrip_metadata
+        self.intern_pool = intern_pool
+        self.code_objects = {} if code_objects is None else code_objects
 
         # Save a list of offsets in the bytecode file where code
         # objects starts.
@@ -157,33 +171,30 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
         self.is_rust = True
 
         self.UNMARSHAL_DISPATCH_TABLE = UNMARSHAL_DISPATCH_TABLE
+        self.init_dispatch()
+        self.init_limits(limits)
 
     def t_code_rust(self, save_ref, bytes_for_s: bool = False) -> Code313Rust:
         # read instructions
-        instr_count = self.read_int32()
+        instr_count = self.check_read_size(self.read_int32(), "instructions", 2)
         co_code = self.read_slice(instr_count * 2)
 
         # instructions = [int(co_code[i]) for i in range(len(co_code))] # debug
-        co_lnotab = {}
 
-        # read locations
-        loc_count = self.read_int32()
-        locations: List[SourceLocation] = []
+        # read locations: (line, zero-indexed column) int32 pairs, read
+        # in one go and split into columns.
+        loc_count = self.check_container_length(self.read_int32(), "locations", 8)
+        line_columns = self.read_int32_array(2 * loc_count)
+        line_numbers = line_columns[0::2]
+        # OneIndexed::new used in Rust requires line != 0
+        if 0 in line_numbers:
+            raise MarshalError("invalid source location")
+        column_offsets = line_columns[1::2]
+
+        co_lnotab = {}
         last_line_number = -1
-        for i in range(loc_count):
-            offset = i * 2
-            line_number = self.read_int32()
-            if line_number == 0:
-                raise MarshalError("invalid source location")
-            # OneIndexed::new used in Rust requires line != 0
-            char_off_zero_indexed = self.read_int32()
-            locations.append(
-                SourceLocation(
-                    line_number=line_number,
-                    column_offset=char_off_zero_indexed + 1  # convert from zero-indexed
-                )
-            )
-            if line_number != last_line_number and offset not in co_lnotab:
+        for offset, line_number in zip(range(0, 2 * loc_count, 2), line_numbers):
+            if line_number != last_line_number:
                 co_lnotab[offset] = line_number
                 last_line_number = line_number
 
@@ -209,17 +220,13 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
             qualname_len = self.read_int32()
             co_qualname = self.read_string(qualname_len, False)
 
-        cell2arg_len = self.read_int32()
+        cell2arg_len = self.check_container_length(self.read_int32(), "cell2arg", 4)
         if cell2arg_len != 0:
-            cell2arg = []
-            for _ in range(cell2arg_len):
-                raw = self.read_int32()
-                # convert raw (u32) to signed i32
-                signed = raw if raw < (1 << 31) else raw - (1 << 32)
-                cell2arg.append(signed)
+            # The code types don't keep cell2arg; skip over it.
+            self.read_int32_array(cell2arg_len)
 
         # constants
-        const_count = self.read_int32()
+        const_count = self.check_container_length(self.read_int32(), "constants")
         constants = []
 
         for _ in range(const_count):
@@ -228,7 +235,7 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
             constants.append(self.r_object(bytes_for_s=bytes_for_s))
 
         def read_names():
-            n = self.read_int32()
+            n = self.check_container_length(self.read_int32(), "names", 4)
             out = []
             for _ in range(n):
                 length = self.read_int32()
@@ -243,10 +250,14 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
 
         if self.magic_int in (24881, 35310):
             linetable_len = self.read_int32()
-            co_linetable = self.read_slice(linetable_len)
+            co_linetable = self.read_slice(
+                self.check_read_size(linetable_len, "line table")
+            )
 
             exceptiontable_len = self.read_int32()
-            co_exceptiontable = self.read_slice(exceptiontable_len)
+            co_exceptiontable = self.read_slice(
+                self.check_read_size(exceptiontable_len, "exception table")
+            )
             return Code313Rust(
                 co_argcount=arg_count,
                 co_posonlyargcount=posonlyarg_count,
@@ -267,7 +278,7 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
                 co_cellvars=co_cellvars,
                 co_exceptiontable=co_exceptiontable,
                 version_triple=self.version_triple,
-                locations=tuple(locations),
+                locations=SourceLocations(line_numbers, column_offsets),
             )
 
         else:
@@ -288,7 +299,9 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
                 co_freevars=co_freevars,
                 co_cellvars=co_cellvars,
                 version_triple=self.version_triple,
-                locations=tuple(locations),
+                locations=SourceLocations(
+                    line_numbers, column_offsets, SourceLocation312
+                ),
             )
 
 
@@ -296,12 +309,24 @@ class VersionIndependentUnmarshallerRust(VersionIndependentUnmarshaller):
     def t_bigint(self, save_ref: bool=False, bytes_for_s: bool=False):
         len = self.read_int32()
         is_positive = len >= 0
-        byte_data = self.read_slice(abs(len))
+        byte_data = self.read_slice(self.check_read_size(abs(len), "big integer"))
         value = int.from_bytes(byte_data, byteorder='little')
         return value if is_positive else -value
 
+    def read_int32_array(self, n: int) -> array:
+        """
+        Read ``n`` little-endian signed 32-bit ints with a single read.
+        """
+        data = self.read_slice(self.check_read_size(n, "int array", 4) * 4)
+        if len(data) != 4 * n:
+            raise MarshalError("unexpected end of input reading an int array")
+        ints = array("i", data)
+        if sys.byteorder == "big":
+            ints.byteswap()
+        return ints
+
     def read_string(self, n: int, bytes_for_s: bool=False) -> Union[bytes, str]:
-        s = self.read_slice(n)
+        s = self.read_slice(self.check_read_size(n, "string"))
         if not bytes_for_s:
             s = compat_str(s)
         return s
@@ -28,10 +28,13 @@ object.
 
 import io
 import sys
+from collections import OrderedDict
+from dataclasses import dataclass
 from struct import unpack
 from types import EllipsisType
-from typing import Any, Dict, Tuple, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
+import xdis.instrument
 from xdis.codetype import to_portable
 from xdis.cross_types import LongTypeForPython3, UnicodeForPython3, FrozenDictPrePython315
 from xdis.magics import GRAAL3_MAGICS, PYPY3_MAGICS, RUSTPYTHON_MAGICS, magic_int2tuple
@@ -133,6 +136,96 @@ UNMARSHAL_DISPATCH_TABLE = {
     TYPE_UNKNOWN: "unknown",
 }
 
+
+class UnmarshalLimitError(ValueError):
+    """
+    Raised when the data being unmarshalled declares more than is left
+    in the input, or goes past one of the bounds in UnmarshalLimits.
+    """
+
+
+@dataclass(frozen=True)
+class UnmarshalLimits:
+    """
+    Bounds on what unmarshalling a single code object may do, for
+    bytecode from untrusted sources. None means no bound.
+
+    max_bytes:            input bytes that may be read
+    max_container_length: elements in a tuple, list, set or frozenset
+    max_depth:            nesting of objects inside other objects
+    max_objects:          objects unmarshalled in total
+    """
+
+    max_bytes: Optional[int] = None
+    max_container_length: Optional[int] = None
+    max_depth: Optional[int] = None
+    max_objects: Optional[int] = None
+
+
+class CodeObjectRegistry(OrderedDict):
+    """
+    A ``code_objects`` mapping for load_code() that holds at most
+    ``max_size`` code objects, dropping the oldest first. Use this for
+    a registry shared by many loads in a long-running process.
+    """
+
+    def __init__(self, max_size: int = 10000) -> None:
+        super().__init__()
+        self.max_size = max_size
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class StringInternPool:
+    """
+    Strings shared by the loads of a batch of bytecode files, so that a
+    name such as "self" or a co_filename appearing in thousands of files
+    is kept in memory once.
+
+    Unlike sys.intern(), the strings are dropped when the pool is. Pass
+    the same pool as ``intern_pool`` to each load_code() or
+    load_module() call of the batch.
+    """
+
+    def __init__(self) -> None:
+        self.strings: Dict[str, str] = {}
+        self.hits = 0
+        self.bytes_saved = 0
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, s: str) -> str:
+        """
+        Return the pool's copy of ``s``, adding ``s`` if there isn't one.
+        """
+        pooled = self.strings.setdefault(s, s)
+        if pooled is not s:
+            self.hits += 1
+            self.bytes_saved += sys.getsizeof(s)
+        return pooled
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of distinct strings in the pool, the number of
+        duplicates replaced by a pooled string, and an estimate of the
+        bytes that saved.
+        """
+        return {
+            "strings": len(self.strings),
+            "hits": self.hits,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def clear(self) -> None:
+        self.strings.clear()
+        self.hits = 0
+        self.bytes_saved = 0
+
+
 def compat_str(s: Union[str, bytes]) -> Union[str, bytes]:
     """
     This handles working with strings between Python2 and Python3.
@@ -149,8 +242,36 @@ def compat_u2s(u) -> str:
     return str(u)
 
 
+def _profiled_code_handler(handler, profiler):
+    """
+    Wrap the t_code* method ``handler`` so that each code object read is
+    an "unmarshal" span of ``profiler``.
+    """
+
+    def profiled(*args):
+        token = profiler.begin("unmarshal")
+        code = None
+        try:
+            code = handler(*args)
+            return code
+        finally:
+            profiler.end(token, code)
+            profiler.count("code objects")
+
+    return profiled
+
+
 class VersionIndependentUnmarshaller:
-    def __init__(self, fp, magic_int, bytes_for_s, code_objects={}) -> None:
+    def __init__(
+        self,
+        fp,
+        magic_int,
+        bytes_for_s,
+        code_objects=None,
+        limits=None,
+        track_roundtrip_metadata: bool = True,
+        intern_pool: Optional[StringInternPool] = None,
+    ) -> None:
         """
         Marshal versions:
             0/Historical: Until 2.4/magic int 62041
@@ -161,10 +282,22 @@ class VersionIndependentUnmarshaller:
             5: [3.14, current) (self.magic_int: circa 3608)
 
         In Python 3, a ``bytes`` type is used for strings.
+
+        If ``track_roundtrip_metadata`` is False, the order of frozenset
+        elements, the objects referenced by FLAG_REF, and code object
+        file offsets are not recorded. Those are needed only to write
+        the code back out byte for byte.
+
+        Strings read are replaced by the copy in ``intern_pool`` if that
+        is given.
         """
         self.fp = fp
         self.magic_int = magic_int
-        self.code_objects = code_objects
+        self.track_roundtrip_metadata = track_roundtrip_metadata
+        self.intern_pool = intern_pool
+        # Code objects built are recorded here. Unless the caller supplies
+        # a registry, this lives only as long as this unmarshaller.
+        self.code_objects = {} if code_objects is None else code_objects
 
         # Save a list of offsets in the bytecode file where code
         # objects starts.
@@ -196,6 +329,106 @@ class VersionIndependentUnmarshaller:
         self.is_rust = magic_int in RUSTPYTHON_MAGICS
 
         self.UNMARSHAL_DISPATCH_TABLE = UNMARSHAL_DISPATCH_TABLE
+        self.init_dispatch()
+        self.init_limits(limits)
+
+    def init_dispatch(self) -> None:
+        """
+        Build ``self.dispatch`` from UNMARSHAL_DISPATCH_TABLE. It is
+        indexed by the type byte as read, with or without FLAG_REF, and
+        gives the bound t_* method for that type and whether FLAG_REF is
+        set. Bytes without a handler give (None, False).
+
+        Subclasses change what is dispatched to by setting their own
+        UNMARSHAL_DISPATCH_TABLE before calling this.
+        """
+        dispatch = [(None, False)] * 256
+        profiler = xdis.instrument.profiler
+        for marshal_type, func_suffix in self.UNMARSHAL_DISPATCH_TABLE.items():
+            handler = getattr(self, "t_" + func_suffix)
+            if profiler is not None and func_suffix.startswith("code"):
+                handler = _profiled_code_handler(handler, profiler)
+            byte1 = ord(marshal_type)
+            dispatch[byte1] = (handler, False)
+            dispatch[byte1 | FLAG_REF] = (handler, True)
+        self.dispatch = dispatch
+
+    def init_limits(self, limits: Optional[UnmarshalLimits]) -> None:
+        """
+        Set up checking of sizes read from the input against ``limits``
+        and against the amount of input that is left.
+        """
+        self.limits = limits
+        self.depth = 0
+        self.object_count = 0
+
+        # Find where the input ends, if we can, so that sizes read can be
+        # checked against the number of bytes actually left.
+        try:
+            start = self.fp.tell()
+            self.fp.seek(0, io.SEEK_END)
+            end = self.fp.tell()
+            self.fp.seek(start)
+        except (AttributeError, OSError, ValueError):
+            start = end = None
+        if limits is not None and limits.max_bytes is not None and start is not None:
+            limit_end = start + limits.max_bytes
+            end = limit_end if end is None else min(end, limit_end)
+        self.input_end = end
+
+    def check_read_size(self, n: int, what: str, item_size: int = 1) -> int:
+        """
+        Check that reading ``n`` items of at least ``item_size`` bytes
+        each, for a ``what``, doesn't go past the end of the input.
+        Return ``n``.
+        """
+        if self.input_end is not None:
+            offset = self.fp.tell()
+            if n * item_size > self.input_end - offset:
+                raise UnmarshalLimitError(
+                    f"{what} of size {n} at offset {offset} is larger than "
+                    f"the {self.input_end - offset} bytes of input left"
+                )
+        return n
+
+    def check_container_length(self, n: int, what: str, item_size: int = 1) -> int:
+        """
+        Like check_read_size(), but also check ``n`` against the maximum
+        container length.
+        """
+        limits = self.limits
+        if (
+            limits is not None
+            and limits.max_container_length is not None
+            and n > limits.max_container_length
+        ):
+            raise UnmarshalLimitError(
+                f"{what} of length {n} is longer than the limit of "
+                f"{limits.max_container_length}"
+            )
+        return self.check_read_size(n, what, item_size)
+
+    def enter_object(self) -> None:
+        """
+        Account for one more object and one more level of nesting when
+        there are UnmarshalLimits.
+        """
+        limits = self.limits
+        self.depth += 1
+        self.object_count += 1
+        if limits.max_depth is not None and self.depth > limits.max_depth:
+            raise UnmarshalLimitError(
+                f"objects are nested more than {limits.max_depth} deep"
+            )
+        if limits.max_objects is not None and self.object_count > limits.max_objects:
+            raise UnmarshalLimitError(
+                f"more than {limits.max_objects} objects in the input"
+            )
+        if self.input_end is not None and self.fp.tell() >= self.input_end:
+            raise UnmarshalLimitError(
+                f"input ends, or passed the limit of {limits.max_bytes} bytes, "
+                f"at offset {self.fp.tell()}"
+            )
 
     def read_float(self) -> float:
         return unpack("<d", self.fp.read(8))[0]
@@ -215,6 +448,11 @@ class VersionIndependentUnmarshaller:
     def read_uint32(self) -> int:
         return unpack("<I", self.fp.read(4))[0]
 
+    def pool_str(self, s: str) -> str:
+        if self.intern_pool is None:
+            return s
+        return self.intern_pool.intern(s)
+
     def load(self):
         """
         ``marshal.load()`` written in Python. When the Python bytecode magic loaded is the
@@ -262,31 +500,28 @@ class VersionIndependentUnmarshaller:
     def r_object(self, bytes_for_s: bool = False):
         """
         Main object unmarshaling read routine.  Reads from self.fp
-        the next byte which is a key in UNMARSHAL_DISPATCH_TABLE
-        defined above clearing the high-order bit, FLAG_REF.
-        FLAG_REF indicates whether to save the resulting object in
-        our internal object cache.
+        the next byte, whose low 7 bits are a key in
+        UNMARSHAL_DISPATCH_TABLE defined above, and whose high-order
+        bit, FLAG_REF, indicates whether to save the resulting object in
+        our internal object cache. self.dispatch, built from
+        UNMARSHAL_DISPATCH_TABLE, maps the byte to both.
         """
+        limited = self.limits is not None
+        if limited:
+            self.enter_object()
+
         byte1 = ord(self.fp.read(1))
+        unmarshal_func, save_ref = self.dispatch[byte1]
 
-        # FLAG_REF indicates whether we "intern" or
-        # save a reference to the object.
-        # byte1 without that reference is the
-        # marshal type code, an ASCII character.
-        save_ref = False
-        if byte1 & FLAG_REF:
-            # Since 3.4, "flag" is the marshal.c name
-            save_ref = True
-            byte1 = byte1 & (FLAG_REF - 1)
-        marshal_type = chr(byte1)
-
-        # print(marshal_type)  # debug
-
-        if marshal_type in self.UNMARSHAL_DISPATCH_TABLE:
-            func_suffix = self.UNMARSHAL_DISPATCH_TABLE[marshal_type]
-            unmarshal_func = getattr(self, "t_" + func_suffix)
-            return unmarshal_func(save_ref, bytes_for_s)
+        if unmarshal_func is not None:
+            obj = unmarshal_func(save_ref, bytes_for_s)
+            if limited:
+                self.depth -= 1
+            return obj
         else:
+            # Without FLAG_REF, byte1 is the marshal type code, an
+            # ASCII character.
+            marshal_type = chr(byte1 & (FLAG_REF - 1))
             try:
                 sys.stderr.write(
                     "Unknown type %i (hex %x) %c\n"
@@ -297,6 +532,8 @@ class VersionIndependentUnmarshaller:
                     "Unknown type %i %c\n" % (ord(marshal_type), marshal_type)
                 )
 
+        if limited:
+            self.depth -= 1
         return
 
     # In C this NULL. Not sure what it should
@@ -328,7 +565,7 @@ class VersionIndependentUnmarshaller:
         n = self.read_int32()
         if n == 0:
             return long(0)
-        size = abs(n)
+        size = self.check_read_size(abs(n), "long", 2)
         d = long(0)
         for j in range(0, size):
             md = self.read_int16()
@@ -362,7 +599,7 @@ class VersionIndependentUnmarshaller:
             return float(self.fp.read(unpack("B", self.fp.read(1))[0]))
 
         def unpack_newer() -> float:
-            return float(self.fp.read(self.read_int32()))
+            return float(self.fp.read(self.check_read_size(self.read_int32(), "float")))
 
         get_float = unpack_pre_24 if self.magic_int <= 62061 else unpack_newer
 
@@ -383,10 +620,10 @@ class VersionIndependentUnmarshaller:
         In Python3, this is a ``bytes`` type.  In Python2, it is a string type;
         ``bytes_for_s`` is True when a Python 3 interpreter is reading Python 2 bytecode.
         """
-        strsize = self.read_uint32()
+        strsize = self.check_read_size(self.read_uint32(), "string")
         s = self.fp.read(strsize)
         if not bytes_for_s:
-            s = compat_str(s)
+            s = self.pool_str(compat_str(s))
         return self.r_ref(s, save_ref)
 
     # Python 3.4
@@ -397,8 +634,8 @@ class VersionIndependentUnmarshaller:
         the string.
         """
         # FIXME: check
-        strsize = self.read_uint32()
-        interned = compat_str(self.fp.read(strsize))
+        strsize = self.check_read_size(self.read_uint32(), "string")
+        interned = self.pool_str(compat_str(self.fp.read(strsize)))
         self.intern_strings.append(interned)
         return self.r_ref(interned, save_ref)
 
@@ -408,32 +645,32 @@ class VersionIndependentUnmarshaller:
         There are true strings in Python3 as opposed to
         bytes.
         """
-        strsize = self.read_uint32()
+        strsize = self.check_read_size(self.read_uint32(), "string")
         s = self.fp.read(strsize)
-        s = compat_str(s)
+        s = self.pool_str(compat_str(s))
         return self.r_ref(s, save_ref)
 
     # Since Python 3.4
     def t_short_ASCII(self, save_ref, bytes_for_s: bool = False):
         strsize = unpack("B", self.fp.read(1))[0]
-        return self.r_ref(compat_str(self.fp.read(strsize)), save_ref)
+        return self.r_ref(self.pool_str(compat_str(self.fp.read(strsize))), save_ref)
 
     # Since Python 3.4
     def t_short_ASCII_interned(self, save_ref, bytes_for_s: bool = False):
         # FIXME: check
         strsize = unpack("B", self.fp.read(1))[0]
-        interned = compat_str(self.fp.read(strsize))
+        interned = self.pool_str(compat_str(self.fp.read(strsize)))
         self.intern_strings.append(interned)
         return self.r_ref(interned, save_ref)
 
     def t_interned(self, save_ref, bytes_for_s: bool = False):
-        strsize = self.read_uint32()
-        interned = compat_str(self.fp.read(strsize))
+        strsize = self.check_read_size(self.read_uint32(), "string")
+        interned = self.pool_str(compat_str(self.fp.read(strsize)))
         self.intern_strings.append(interned)
         return self.r_ref(interned, save_ref)
 
     def t_unicode(self, save_ref, bytes_for_s: bool = False):
-        strsize = self.read_uint32()
+        strsize = self.check_read_size(self.read_uint32(), "string")
         unicodestring = self.fp.read(strsize)
         if self.version_triple < (3, 0):
             string = UnicodeForPython3(unicodestring)
@@ -443,32 +680,31 @@ class VersionIndependentUnmarshaller:
             # dependency (for colored CLI/REPL output), and its source
             # contains surrogate code points that cause stdlib test
             # disassembly to fail without this error handler.
-            string = unicodestring.decode("utf-8", "surrogatepass")
+            string = self.pool_str(unicodestring.decode("utf-8", "surrogatepass"))
 
         return self.r_ref(string, save_ref)
 
     # Since Python 3.4
     def t_small_tuple(self, save_ref, bytes_for_s: bool = False):
         # small tuple - since Python 3.4
-        tuplesize = unpack("B", self.fp.read(1))[0]
-        ret, i = self.r_ref_reserve(tuple(), save_ref)
-        while tuplesize > 0:
-            ret += (self.r_object(bytes_for_s=bytes_for_s),)
-            tuplesize -= 1
-            pass
-        return self.r_ref_insert(ret, i)
+        tuplesize = self.check_container_length(
+            unpack("B", self.fp.read(1))[0], "tuple"
+        )
+        _, i = self.r_ref_reserve(tuple(), save_ref)
+        ret = [self.r_object(bytes_for_s=bytes_for_s) for _ in range(tuplesize)]
+        return self.r_ref_insert(tuple(ret), i)
 
     def t_tuple(self, save_ref, bytes_for_s: bool = False):
-        tuplesize = self.read_uint32()
-        ret = self.r_ref(tuple(), save_ref)
-        while tuplesize > 0:
-            ret += (self.r_object(bytes_for_s=bytes_for_s),)
-            tuplesize -= 1
-        return ret
+        tuplesize = self.check_container_length(self.read_uint32(), "tuple")
+        # Items are collected in a list: adding to a tuple one item at
+        # a time copies it each time, which is quadratic in its size.
+        _, i = self.r_ref_reserve(tuple(), save_ref)
+        ret = [self.r_object(bytes_for_s=bytes_for_s) for _ in range(tuplesize)]
+        return self.r_ref_insert(tuple(ret), i)
 
     def t_list(self, save_ref, bytes_for_s: bool = False):
         # FIXME: check me
-        n = self.read_uint32()
+        n = self.check_container_length(self.read_uint32(), "list")
         ret = self.r_ref(list(), save_ref)
         while n > 0:
             ret += (self.r_object(bytes_for_s=bytes_for_s),)
@@ -476,22 +712,21 @@ class VersionIndependentUnmarshaller:
         return ret
 
     def t_frozenset(self, save_ref, bytes_for_s: bool = False):
-        setsize = self.read_uint32()
+        setsize = self.check_container_length(self.read_uint32(), "frozenset")
         collection, i = self.r_ref_reserve([], save_ref)
         while setsize > 0:
             collection.append(self.r_object(bytes_for_s=bytes_for_s))
             setsize -= 1
         final_frozenset = frozenset(collection)
         # Note the order of the frozenset elements.
-        self.collection_order[final_frozenset] = tuple(collection)
+        if self.track_roundtrip_metadata:
+            self.collection_order[final_frozenset] = tuple(collection)
         return self.r_ref_insert(final_frozenset, i)
 
     def t_set(self, save_ref, bytes_for_s: bool = False) -> set:
-        setsize = self.read_uint32()
-        ret, i = self.r_ref_reserve(tuple(), save_ref)
-        while setsize > 0:
-            ret += (self.r_object(bytes_for_s=bytes_for_s),)
-            setsize -= 1
+        setsize = self.check_container_length(self.read_uint32(), "set")
+        _, i = self.r_ref_reserve(tuple(), save_ref)
+        ret = [self.r_object(bytes_for_s=bytes_for_s) for _ in range(setsize)]
         return self.r_ref_insert(set(ret), i)
 
     def t_frozendict(self, save_ref, bytes_for_s: bool = False):
@@ -687,7 +922,12 @@ class VersionIndependentUnmarshaller:
             co_firstlineno = -1  # Bogus sentinel value
             co_lnotab = b""
 
-        reference_objects = set(self.intern_objects + self.intern_strings)
+        if self.track_roundtrip_metadata:
+            collection_order = self.collection_order
+            reference_objects = set(self.intern_objects + self.intern_strings)
+        else:
+            collection_order = {}
+            reference_objects = set()
 
         code = to_portable(
             co_argcount=co_argcount,
@@ -709,11 +949,15 @@ class VersionIndependentUnmarshaller:
             co_cellvars=co_cellvars,
             co_exceptiontable=co_exceptiontable,
             version_triple=self.version_triple,
-            collection_order=self.collection_order,
+            collection_order=collection_order,
             reference_objects=reference_objects,
         )
 
-        self.code_to_file_offsets[code] = (code_offset_in_file, co_code_offset_in_file)
+        if self.track_roundtrip_metadata:
+            self.code_to_file_offsets[code] = (
+                code_offset_in_file,
+                co_code_offset_in_file,
+            )
 
         self.code_objects[str(code)] = code
         ret = code
@@ -781,7 +1025,12 @@ class VersionIndependentUnmarshaller:
         co_firstlineno = -1  # Bogus sentinel value
         co_lnotab = b""
 
-        reference_objects = set(self.intern_objects + self.intern_strings)
+        if self.track_roundtrip_metadata:
+            collection_order = self.collection_order
+            reference_objects = set(self.intern_objects + self.intern_strings)
+        else:
+            collection_order = {}
+            reference_objects = set()
 
         code = to_portable(
             co_argcount=co_argcount,
@@ -803,11 +1052,15 @@ class VersionIndependentUnmarshaller:
             co_cellvars=co_cellvars,
             co_exceptiontable=co_exceptiontable,
             version_triple=self.version_triple,
-            collection_order=self.collection_order,
+            collection_order=collection_order,
             reference_objects=reference_objects,
         )
 
-        self.code_to_file_offsets[code] = (code_offset_in_file, co_code_offset_in_file)
+        if self.track_roundtrip_metadata:
+            self.code_to_file_offsets[code] = (
+                code_offset_in_file,
+                co_code_offset_in_file,
+            )
 
         self.code_objects[str(code)] = code
         ret = code
@@ -817,7 +1070,7 @@ class VersionIndependentUnmarshaller:
     # Since Python 3.4
     def t_object_reference(self, save_ref=None, bytes_for_s: bool = False):
         refnum = self.read_uint32()
-        if not (0 < refnum < len(self.intern_objects)):
+        if not (0 <= refnum < len(self.intern_objects)):
             return self.intern_objects[-1]
         return self.intern_objects[refnum]
 
@@ -830,42 +1083,92 @@ class VersionIndependentUnmarshaller:
 # user interface
 
 
-def load_code(fp, magic_int, bytes_for_s: bool = False, code_objects={}):
+def load_code(
+    fp,
+    magic_int,
+    bytes_for_s: bool = False,
+    code_objects: Optional[dict] = None,
+    limits: Optional[UnmarshalLimits] = None,
+    track_roundtrip_metadata: bool = True,
+    intern_pool: Optional[StringInternPool] = None,
+):
+    """
+    Unmarshal a code object for ``magic_int`` from ``fp``, a file object
+    or bytes. If ``limits`` is given, UnmarshalLimitError is raised as
+    soon as the data goes past one of its bounds. It is also raised,
+    with or without ``limits``, for a size that runs past the end of the
+    input.
+
+    Each code object built is added to ``code_objects`` if that is given;
+    a CodeObjectRegistry keeps this from growing without bound when it is
+    shared across many loads.
+
+    Set ``track_roundtrip_metadata`` to False when the code won't be
+    written back out with xdis.marsh. That skips recording what is needed
+    to reproduce the original bytes exactly, which saves time and memory.
+
+    ``intern_pool`` is a StringInternPool shared by a batch of loads;
+    strings that appear in more than one file are then stored once.
+    """
     if isinstance(fp, bytes):
         fp = io.BytesIO(fp)
 
     if magic_int in GRAAL3_MAGICS:
         from xdis.unmarsh_graal import VersionIndependentUnmarshallerGraal
-        um_gen = VersionIndependentUnmarshallerGraal(fp, magic_int, bytes_for_s, code_objects)
+        um_gen = VersionIndependentUnmarshallerGraal(
+            fp,
+            magic_int,
+            bytes_for_s,
+            code_objects=code_objects,
+            limits=limits,
+            track_roundtrip_metadata=track_roundtrip_metadata,
+            intern_pool=intern_pool,
+        )
     elif magic_int in RUSTPYTHON_MAGICS:
         from xdis.unmarsh_rust import VersionIndependentUnmarshallerRust
         um_gen = VersionIndependentUnmarshallerRust(
-            fp, magic_int, bytes_for_s, code_objects
+            fp,
+            magic_int,
+            bytes_for_s,
+            code_objects=code_objects,
+            limits=limits,
+            track_roundtrip_metadata=track_roundtrip_metadata,
+            intern_pool=intern_pool,
         )
     else:
         um_gen = VersionIndependentUnmarshaller(
-            fp, magic_int, bytes_for_s, code_objects=code_objects
+            fp,
+            magic_int,
+            bytes_for_s,
+            code_objects=code_objects,
+            limits=limits,
+            track_roundtrip_metadata=track_roundtrip_metadata,
+            intern_pool=intern_pool,
         )
     return um_gen.load()
 
 
 def load_code_and_get_file_offsets(
-    fp, magic_int, bytes_for_s: bool = False, code_objects={}
+    fp,
+    magic_int,
+    bytes_for_s: bool = False,
+    code_objects: Optional[dict] = None,
+    limits: Optional[UnmarshalLimits] = None,
 ) -> tuple:
     if isinstance(fp, bytes):
         fp = io.BytesIO(fp)
     if magic_int in GRAAL3_MAGICS:
         from xdis.unmarsh_graal import VersionIndependentUnmarshallerGraal
         um_gen = VersionIndependentUnmarshallerGraal(
-            fp, magic_int, bytes_for_s, code_objects
+            fp, magic_int, bytes_for_s, code_objects=code_objects, limits=limits
         )
     elif magic_int in RUSTPYTHON_MAGICS:
         from xdis.unmarsh_rust import VersionIndependentUnmarshallerRust
         um_gen = VersionIndependentUnmarshallerRust(
-            fp, magic_int, bytes_for_s, code_objects
+            fp, magic_int, bytes_for_s, code_objects=code_objects, limits=limits
         )
     else:
         um_gen = VersionIndependentUnmarshaller(
-            fp, magic_int, bytes_for_s, code_objects=code_objects
+            fp, magic_int, bytes_for_s, code_objects=code_objects, limits=limits
         )
     return um_gen.load(), um_gen.code_to_file_offsets